@@ -0,0 +1,71 @@
+"""
+JSON codec benchmark
+
+Parses and encodes payload shapes the application opens (log records,
+a wide object, a numeric matrix, long strings) with the json module and with
+qjsoncodec, which uses orjson when it is installed and pauses the cyclic
+garbage collector while parsing.
+
+Usage:
+    python benchmarks/bench_codec.py [--scale 1.0]
+"""
+
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qjsoncodec  # noqa: E402
+
+
+def makePayloads(scale):
+    """
+    Payloads as (name, value)
+    """
+    count = int(200000 * scale)
+    records = [{'ts': 1700000000 + i, 'level': 'info', 'msg': 'request {} served'.format(i),
+                'http': {'status': 200, 'path': '/api/v1/items/{}'.format(i), 'ms': i % 97 * 0.25},
+                'tags': ['api', 'prod']} for i in range(count)]
+    wide = {'key{}'.format(i): i for i in range(count)}
+    matrix = [[(row * col) % 1000 / 7.0 for col in range(100)] for row in range(count // 100)]
+    text = ['lorem ipsum dolor sit amet ' * 40 for _ in range(count // 20)]
+    return [('records', records), ('wide object', wide), ('float matrix', matrix), ('long strings', text)]
+
+
+def best(function, repeat=3):
+    """
+    Best time of a few runs
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1.0)
+    args = parser.parse_args()
+
+    print('qjsoncodec backend: {}'.format(qjsoncodec.BACKEND))
+    print('{:<14} {:>8} {:>12} {:>12} {:>12} {:>12}'.format(
+        'payload', 'MB', 'json.loads', 'codec.loads', 'json.dumps', 'fast dumps'))
+    for name, value in makePayloads(args.scale):
+        text = json.dumps(value)
+        data = text.encode('utf-8')
+        print('{:<14} {:>8.1f} {:>11.3f}s {:>11.3f}s {:>11.3f}s {:>11.3f}s'.format(
+            name, len(data) / 1048576.0,
+            best(lambda: json.loads(data)),
+            best(lambda: qjsoncodec.loads(data)),
+            best(lambda: qjsoncodec.dumps(value, None)),
+            best(lambda: qjsoncodec.dumps(value, None, exact=False))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Tree painting benchmark
+
+Paints a tree view scrolled through a list of long strings and of objects,
+as when browsing a document holding large text fields: the values as they
+are (what QJsonModel.data() used to return, the delegate lays out every
+string whole) against the cached display values of QJsonNode.displayValue().
+
+Requires a Qt binding, runs without a display (offscreen platform).
+
+Usage:
+    python benchmarks/bench_display.py [--entries 400] [--length 200000] [--pages 5]
+"""
+
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtCore, QtWidgets  # noqa: E402
+
+from qjsonfilter import QJsonFilterProxyModel  # noqa: E402
+from qjsonmodel import QJsonModel  # noqa: E402
+from qjsonnode import QJsonNode  # noqa: E402
+from qjsonview import QJsonView  # noqa: E402
+
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+class RawValueModel(QJsonModel):
+    def data(self, index, role):
+        # what QJsonModel.data used to return
+        if role == QtCore.Qt.DisplayRole and index.column() == 1:
+            return self.getNode(index).value
+        if role == QtCore.Qt.SizeHintRole:
+            return QtCore.QSize(-1, 22)
+        return super(RawValueModel, self).data(index, role)
+
+
+def document(entries, length):
+    # one string per entry, each its own object as in a parsed document
+    text = 'lorem ipsum dolor sit amet ' * (length // 27 + 1)
+    items = []
+    for i in range(entries):
+        if i % 2:
+            items.append({'id': i, 'tags': list(range(i % 50))})
+        else:
+            items.append(str(i) + text[:length])
+    return {'items': items}
+
+
+def bench(label, modelClass, value, pages):
+    model = modelClass(QJsonNode.load(value))
+    proxy = QJsonFilterProxyModel()
+    proxy.setSourceModel(model)
+    view = QJsonView()
+    view.setModel(proxy)
+    view.resize(1200, 800)
+    view.expand(proxy.index(0, 0))
+    view.grab()
+
+    scrollBar = view.verticalScrollBar()
+    start = time.perf_counter()
+    for page in range(pages):
+        scrollBar.setValue(page * scrollBar.pageStep())
+        view.grab()
+    elapsed = time.perf_counter() - start
+    print('  {:<14} {:>8.3f} s  ({:.1f} ms per page)'.format(label, elapsed, elapsed / pages * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=400)
+    parser.add_argument('--length', type=int, default=200000)
+    parser.add_argument('--pages', type=int, default=5)
+    args = parser.parse_args()
+
+    value = document(args.entries, args.length)
+    print('{:,} entries, strings of {:,} characters, {} pages'.format(args.entries, args.length, args.pages))
+    bench('raw values', RawValueModel, value, args.pages)
+    bench('displayValue', QJsonModel, value, args.pages)
+
+
+if __name__ == '__main__':
+    main()
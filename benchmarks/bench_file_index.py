@@ -0,0 +1,87 @@
+"""
+Indexed file benchmark
+
+Writes an array of records to a temporary file and compares the time until
+the first page of the tree is available: parsing the whole file with
+json.loads against the memory-mapped index, which only scans the entries it
+hands out. The time of a full scan of the index is shown as well, and the
+time to expand an object holding the records in its last entry, where the
+index skips the whole array to reach the end of the object.
+
+Usage:
+    python benchmarks/bench_file_index.py [--records 300000]
+"""
+
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qjsonindex import QJsonFileIndex  # noqa: E402
+from qjsonnode import QJsonNode  # noqa: E402
+
+
+PAGE = 1000
+
+
+def makeRecords(count):
+    """
+    Array of small records
+    """
+    return [{'id': i, 'name': 'user{}'.format(i), 'tags': ['a', 'b'], 'score': i * 0.5,
+             'address': {'city': 'Lisbon', 'zip': '1000-{:03d}'.format(i % 1000)}}
+            for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=300000)
+    args = parser.parse_args()
+
+    handle, path = tempfile.mkstemp(suffix='.json')
+    try:
+        with os.fdopen(handle, 'w') as f:
+            json.dump(makeRecords(args.records), f, indent=4)
+        size = os.path.getsize(path)
+        print('{:,} records, {:.1f} MB file, time to the first {} rows'.format(
+            args.records, size / 1048576.0, PAGE))
+
+        start = time.perf_counter()
+        with open(path, 'r', encoding='utf-8') as f:
+            root = QJsonNode.load(json.loads(f.read()), lazy=True)
+        root.fetchMore(PAGE)
+        print('  json.loads + lazy tree  {:>8.3f} s'.format(time.perf_counter() - start))
+        del root
+
+        start = time.perf_counter()
+        index = QJsonFileIndex(path)
+        root = QJsonNode.load(index.root(), lazy=True)
+        root.fetchMore(root.fetchCount(PAGE))
+        print('  file index              {:>8.3f} s'.format(time.perf_counter() - start))
+
+        start = time.perf_counter()
+        root.fetchCount(None)
+        print('  index, scan all rows    {:>8.3f} s'.format(time.perf_counter() - start))
+        del root
+        index.close()
+
+        with open(path, 'w') as f:
+            json.dump({'meta': {'records': args.records}, 'data': makeRecords(args.records)}, f, indent=4)
+        start = time.perf_counter()
+        index = QJsonFileIndex(path)
+        root = QJsonNode.load(index.root(), lazy=True)
+        root.fetchMore(root.fetchCount(PAGE))
+        print('  index, nested records   {:>8.3f} s'.format(time.perf_counter() - start))
+        del root
+        index.close()
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Tree filter benchmark
+
+Filters a generated tree by key/value text as if typed character by
+character: QJsonFilterIndex queries (index built on the first one) on the
+full tree, and, on a smaller tree, the stock QSortFilterProxyModel with
+recursive filtering on the filter role against QJsonFilterProxyModel, both
+answering the rows a view asks for (top two levels).
+
+Usage:
+    python benchmarks/bench_filter.py [--records 300000] [--proxy-records 20000]
+"""
+
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtCore, QtWidgets  # noqa: E402
+
+from qjsonfilter import QJsonFilterIndex, QJsonFilterProxyModel  # noqa: E402
+from qjsonmodel import QJsonModel  # noqa: E402
+from qjsonnode import QJsonNode  # noqa: E402
+
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+TYPED = ('u', 'us', 'use', 'user', 'user1', 'user12', 'user123', 'user12', 'user1')
+
+
+def records(count):
+    # 10 nodes per record
+    return [{'id': i, 'name': 'user{}'.format(i), 'tags': ['a', 'b'],
+             'address': {'city': 'City{}'.format(i % 100), 'zip': None}, 'score': i * 0.5}
+            for i in range(count)]
+
+
+def visitTop(proxy):
+    """
+    Ask for the rows a view shows on a filter change: the top two levels
+    """
+    count = 0
+    for row in range(proxy.rowCount()):
+        top = proxy.index(row, 0)
+        count += proxy.rowCount(top)
+    return count
+
+
+def benchIndex(count):
+    model = QJsonModel(QJsonNode.load({'records': records(count)}))
+    print('QJsonFilterIndex, {:,} nodes'.format(10 * count + 2))
+    start = time.perf_counter()
+    index = QJsonFilterIndex.fromModel(model)
+    print('  {:<22} {:>8.3f} s  ({:,} terms)'.format('build index', time.perf_counter() - start, len(index)))
+    for text in TYPED:
+        start = time.perf_counter()
+        visible = index.query(text)
+        print('  {:<22} {:>8.3f} s  ({:,} visible)'.format(repr(text), time.perf_counter() - start, len(visible)))
+
+
+def benchProxy(count):
+    print('Proxy models, {:,} nodes, filter change + top two levels'.format(10 * count + 2))
+    for label in ('QSortFilterProxyModel', 'QJsonFilterProxyModel'):
+        model = QJsonModel(QJsonNode.load({'records': records(count)}))
+        if label == 'QSortFilterProxyModel':
+            proxy = QtCore.QSortFilterProxyModel()
+            proxy.setFilterRole(QJsonModel.filterRole)
+            proxy.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
+            proxy.setRecursiveFilteringEnabled(True)
+            setText = proxy.setFilterFixedString
+        else:
+            proxy = QJsonFilterProxyModel()
+            setText = proxy.setFilterText
+        proxy.setSourceModel(model)
+
+        total = 0.0
+        for text in TYPED:
+            start = time.perf_counter()
+            setText(text)
+            visitTop(proxy)
+            total += time.perf_counter() - start
+        print('  {:<22} {:>8.3f} s  ({} filter changes)'.format(label, total, len(TYPED)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=300000)
+    parser.add_argument('--proxy-records', type=int, default=20000)
+    args = parser.parse_args()
+
+    benchIndex(args.records)
+    benchProxy(args.proxy_records)
+
+
+if __name__ == '__main__':
+    main()
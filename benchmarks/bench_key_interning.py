@@ -0,0 +1,113 @@
+"""
+Memory benchmark for keys and list labels in the QJsonNode tree
+
+Builds an array of records whose key strings are separate objects per record
+(as produced by ast.literal_eval or by parsing records one at a time) and
+compares the previous tree, which kept every key object and a formatted
+'list[i]' label per element, with the current one, which interns keys and
+derives list labels when displayed.
+
+Usage:
+    python benchmarks/bench_key_interning.py [--records 200000]
+"""
+
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qjsonnode import QJsonNode  # noqa: E402
+
+
+FIELDS = ('id', 'timestamp', 'status', 'message', 'tags')
+
+
+class LabelledNode(QJsonNode):
+    """
+    Node type reproducing the previous key handling, kept for comparison
+    """
+    __slots__ = ()
+
+    @classmethod
+    def _build(cls, rootNode, value):
+        new = object.__new__
+        stack = [(rootNode, value)]
+        while stack:
+            node, value = stack.pop()
+            if isinstance(value, dict):
+                entries = list(value.items())
+            elif isinstance(value, list):
+                entries = [('list[{}]'.format(index), item) for index, item in enumerate(value)]
+            else:
+                node._value = value
+                continue
+
+            children = []
+            for row, (key, item) in enumerate(entries):
+                child = new(cls)
+                child._key = key
+                child._dtype = type(item)
+                child._parent = node
+                child._children = ()
+                child._row = row
+                child._pending = None
+                child._value = ""
+                children.append(child)
+                if isinstance(item, (dict, list)):
+                    if item:
+                        stack.append((child, item))
+                else:
+                    child._value = item
+            if children:
+                node._children = children
+
+
+def makeRecords(count):
+    """
+    Array of records with one key object per record and field
+    """
+    records = []
+    for i in range(count):
+        # ''.join creates a new string object, like a fresh parse would
+        keys = [''.join(field) for field in FIELDS]
+        records.append(dict(zip(keys, (i, 1700000000 + i, 'ok', 'm', ['a', 'b']))))
+    return records
+
+
+def retainedSize(cls, count):
+    """
+    Parse-like build of the document, build the tree, drop the document and
+    return the bytes the tree keeps alive (including key strings)
+    """
+    gc.collect()
+    tracemalloc.start()
+    document = makeRecords(count)
+    root = cls.load(document)
+    del document
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del root
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=200000)
+    args = parser.parse_args()
+
+    before = retainedSize(LabelledNode, args.records)
+    after = retainedSize(QJsonNode, args.records)
+
+    print('{:,} records, memory kept by the tree once the document is released'.format(args.records))
+    print('  labels, no interning           {:>8.1f} MB'.format(before / 1048576.0))
+    print('  interned keys, derived labels  {:>8.1f} MB'.format(after / 1048576.0))
+    print('  saved                          {:>8.1f} MB'.format((before - after) / 1048576.0))
+
+
+if __name__ == '__main__':
+    main()
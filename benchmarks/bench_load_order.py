@@ -0,0 +1,90 @@
+"""
+Load-time benchmark for wide objects
+
+Times QJsonNode.load on objects with many keys, which now keeps the document
+order, against the previous behaviour of sorting the items of every object
+while loading.
+
+Usage:
+    python benchmarks/bench_load_order.py [--keys 200000]
+"""
+
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qjsonnode import QJsonNode  # noqa: E402
+
+
+class SortedLoadNode(QJsonNode):
+    """
+    Node type reproducing the previous sorted load, kept for comparison
+    """
+    __slots__ = ()
+
+    @classmethod
+    def _build(cls, rootNode, value):
+        new = object.__new__
+        stack = [(rootNode, value)]
+        while stack:
+            node, value = stack.pop()
+            if isinstance(value, dict):
+                entries = sorted(value.items())
+            elif isinstance(value, list):
+                entries = [('list[{}]'.format(index), item) for index, item in enumerate(value)]
+            else:
+                node._value = value
+                continue
+
+            children = []
+            for row, (key, item) in enumerate(entries):
+                child = new(cls)
+                child._key = key
+                child._dtype = type(item)
+                child._parent = node
+                child._children = ()
+                child._row = row
+                child._pending = None
+                child._value = ""
+                children.append(child)
+                if isinstance(item, (dict, list)):
+                    if item:
+                        stack.append((child, item))
+                else:
+                    child._value = item
+            if children:
+                node._children = children
+
+
+def makeObject(keys):
+    """
+    Object with shuffled keys, each holding a small record
+    """
+    names = ['key%07d' % i for i in range(keys)]
+    random.shuffle(names)
+    return {name: {'n': i} for i, name in enumerate(names)}
+
+
+def timed(label, func, document):
+    start = time.perf_counter()
+    func(document)
+    print('  {:<22} {:>8.3f} s'.format(label, time.perf_counter() - start))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--keys', type=int, default=200000)
+    args = parser.parse_args()
+
+    print('object with {:,} keys'.format(args.keys))
+    timed('sorted load (before)', SortedLoadNode.load, makeObject(args.keys))
+    timed('ordered load (after)', QJsonNode.load, makeObject(args.keys))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Qt model call benchmark
+
+Builds a tree of about a million nodes and measures the QJsonModel calls a
+tree view makes while painting and expanding: index(), parent() and data()
+on the display role. A view asks for the same rows again on every repaint,
+the calls go over a working set of rows (--visible) many times.
+
+Requires a Qt binding, runs without a display (offscreen platform).
+
+Usage:
+    python benchmarks/bench_model_calls.py [--records 100000] [--calls 300000] [--visible 2000]
+"""
+
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtCore, QtWidgets  # noqa: E402
+
+from qjsonmodel import QJsonModel  # noqa: E402
+from qjsonnode import QJsonNode  # noqa: E402
+
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def measure(label, function, samples):
+    """
+    Call function on every sample and print the throughput
+
+    :param label: str. label of the measurement
+    :param function: callable. function taking a sample
+    :param samples: list. arguments
+    """
+    start = time.perf_counter()
+    for sample in samples:
+        function(sample)
+    elapsed = time.perf_counter() - start
+    print('  {:<24} {:>12,.0f} calls/s'.format(label, len(samples) / max(elapsed, 1e-9)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--calls', type=int, default=300000)
+    parser.add_argument('--visible', type=int, default=2000)
+    args = parser.parse_args()
+
+    # 10 nodes per record
+    records = [{'id': i, 'name': 'user{}'.format(i), 'tags': ['a', 'b'],
+                'address': {'city': 'X', 'zip': None}, 'score': i * 0.5}
+               for i in range(args.records)]
+    root = QJsonNode.load({'records': records})
+    model = QJsonModel(root)
+
+    array = model.index(0, 0)
+    random.seed(0)
+    visible = [random.randrange(args.records) for _ in range(args.visible)]
+    rows = [random.choice(visible) for _ in range(args.calls)]
+    parents = [model.index(row, 0, array) for row in rows]
+    children = [model.index(row % 5, column, parent)
+                for row, column, parent in zip(rows, [0, 1] * args.calls, parents)]
+    grandchildren = [model.index(0, 0, model.index(3, 0, parent)) for parent in parents]
+    display = QtCore.Qt.DisplayRole
+
+    print('{:,} records, {:,} nodes, {:,} calls'.format(args.records, 10 * args.records + 2, args.calls))
+    measure('index(row, 0, parent)', lambda parent: model.index(2, 0, parent), parents)
+    measure('index(row, 1, parent)', lambda parent: model.index(2, 1, parent), parents)
+    measure('parent(child)', model.parent, children)
+    measure('parent(grandchild)', model.parent, grandchildren)
+    measure('data(DisplayRole)', lambda index: model.data(index, display), children)
+
+
+if __name__ == '__main__':
+    main()
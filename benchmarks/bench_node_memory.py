@@ -0,0 +1,125 @@
+"""
+Memory benchmark for the QJsonNode tree
+
+Builds synthetic documents of roughly one million nodes and reports how many
+bytes the node tree costs per node (the parsed source data is excluded), for
+the QJsonNode tree and for the array-backed QJsonStore.
+
+Usage:
+    python benchmarks/bench_node_memory.py [--nodes 1000000] [--budget 120]
+"""
+
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qjsonnode import QJsonNode  # noqa: E402
+from qjsonstore import QJsonStore  # noqa: E402
+
+
+def makeRecords(nodes):
+    """
+    Array of flat records, the typical shape of exports and logs
+
+    :param nodes: int. approximate number of nodes to produce
+    :return: list. document
+    """
+    count = max(1, nodes // 6)
+    return [
+        {'id': i, 'name': 'item%d' % i, 'status': 'ok', 'score': i * 0.5, 'active': True}
+        for i in range(count)
+    ]
+
+
+def makeNested(nodes):
+    """
+    Configuration-like document with nested objects and small arrays
+
+    :param nodes: int. approximate number of nodes to produce
+    :return: dict. document
+    """
+    count = max(1, nodes // 12)
+    return {
+        'section%d' % i: {
+            'enabled': bool(i % 2),
+            'limits': {'min': 0, 'max': i},
+            'tags': ['a', 'b', 'c'],
+            'owner': {'name': 'team%d' % (i % 10)},
+        }
+        for i in range(count)
+    }
+
+
+def countNodes(node):
+    """
+    Count the nodes of a tree, root included
+
+    :param node: QJsonNode. root node
+    :return: int. node count
+    """
+    total = 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        total += 1
+        stack.extend(current.children)
+    return total
+
+
+def traced(func, *args):
+    """
+    Call func and return (result, bytes still allocated by the call)
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = func(*args)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def measure(name, document):
+    """
+    Build the tree for a document and report its memory footprint
+
+    :param name: str. label of the document shape
+    :param document: dict or list. parsed document
+    :return: float. bytes per node of the QJsonNode tree
+    """
+    root, size = traced(QJsonNode.load, document)
+    nodes = countNodes(root)
+    del root
+    store, storeSize = traced(QJsonStore.load, document)
+    del store
+
+    perNode = size / float(nodes)
+    print('{:<10} nodes={:>9,}  tree={:>8.1f} MB  bytes/node={:>6.1f}  store bytes/node={:>6.1f}'.format(
+        name, nodes, size / 1024.0 / 1024.0, perNode, storeSize / float(nodes)))
+    return perNode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=1000000)
+    parser.add_argument('--budget', type=float, default=None,
+                        help='fail when bytes/node exceeds this value')
+    args = parser.parse_args()
+
+    results = [
+        measure('records', makeRecords(args.nodes)),
+        measure('nested', makeNested(args.nodes)),
+    ]
+
+    if args.budget is not None and max(results) > args.budget:
+        print('over budget: {:.1f} > {:.1f} bytes/node'.format(max(results), args.budget))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Document profile benchmark
+
+Profiles generated documents of growing size with qjsonprofile.profile and
+reports time and peak memory, which should stay flat as the documents grow.
+Parsing the same file with the json module is timed for reference.
+
+Usage:
+    python benchmarks/bench_profile.py [--records 20000 80000 320000]
+"""
+
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qjsonprofile  # noqa: E402
+
+
+def measure(function, *args):
+    """
+    Run function(*args), return (seconds, peak bytes)
+    """
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def parse(path):
+    with open(path, 'rb') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, nargs='+', default=[20000, 80000, 320000])
+    args = parser.parse_args()
+
+    for count in args.records:
+        records = [{'id': i, 'name': 'user{}'.format(i), 'active': i % 2 == 0,
+                    'tags': ['a', 'b', 'c'], 'address': {'city': 'X', 'zip': None},
+                    'scores': [i, i * 0.5]} for i in range(count)]
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump(records, f, indent=2)
+            path = f.name
+        del records
+
+        try:
+            size = os.path.getsize(path) / 1048576.0
+            print('{:,} records, {:.1f} MB'.format(count, size))
+            for label, function in (('json.load', parse), ('profile', qjsonprofile.profile)):
+                elapsed, peak = measure(function, path)
+                print('  {:<10} {:>7.2f} s  {:>6.1f} MB/s  peak {:>8.1f} MB'.format(
+                    label, elapsed, size / elapsed, peak / 1048576.0))
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
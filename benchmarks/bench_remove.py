@@ -0,0 +1,82 @@
+"""
+Batch removal benchmark
+
+Removes half of the elements of a list shown in a tree view (through the
+filter proxy), as when deleting a selection: every other element (one range
+per element) and one contiguous half. The old way removes the rows one at a
+time with removeChild(), each with its own signals, QJsonModel.removeIndices()
+removes them as one edit.
+
+Requires a Qt binding, runs without a display (offscreen platform).
+
+Usage:
+    python benchmarks/bench_remove.py [--entries 100000] [--legacy-entries 2000]
+"""
+
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtWidgets  # noqa: E402
+
+from qjsonfilter import QJsonFilterProxyModel  # noqa: E402
+from qjsonmodel import QJsonModel  # noqa: E402
+from qjsonnode import QJsonNode  # noqa: E402
+from qjsonview import QJsonView  # noqa: E402
+
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def removeOneByOne(model, indices):
+    # what QJsonView.remove used to do
+    for index in indices:
+        model.removeChild(index.internalPointer().row(), index.parent())
+
+
+def removeBatch(model, indices):
+    model.removeIndices(indices)
+
+
+def bench(label, remove, count, pattern):
+    model = QJsonModel(QJsonNode.load({'items': list(range(count))}))
+    proxy = QJsonFilterProxyModel()
+    proxy.setSourceModel(model)
+    view = QJsonView()
+    view.setModel(proxy)
+    view.expandAll()
+
+    items = model.index(0, 0)
+    if pattern == 'alternate':
+        rows = range(0, count, 2)
+    else:
+        rows = range(count // 2)
+    indices = [model.index(row, 0, items) for row in rows]
+
+    start = time.perf_counter()
+    remove(model, indices)
+    elapsed = time.perf_counter() - start
+    assert model.rowCount(items) == count - len(indices)
+    print('  {:<16} {:<10} {:>8,} rows  {:>8.3f} s'.format(label, pattern, len(indices), elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--legacy-entries', type=int, default=2000)
+    args = parser.parse_args()
+
+    print('Removing half of a list')
+    for pattern in ('alternate', 'contiguous'):
+        bench('one by one', removeOneByOne, args.legacy_entries, pattern)
+        bench('removeIndices', removeBatch, args.legacy_entries, pattern)
+        bench('removeIndices', removeBatch, args.entries, pattern)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Row lookup benchmark on wide arrays
+
+Compares the old ``parent.children.index(node)`` lookup with the row position
+kept by QJsonNode, and, when a Qt binding is importable, measures
+``QJsonModel.parent()`` throughput on the same tree.
+
+Usage:
+    python benchmarks/bench_row_lookup.py [--width 100000] [--samples 20000]
+"""
+
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qjsonnode import QJsonNode  # noqa: E402
+
+
+def timeCalls(label, func, nodes):
+    """
+    Call func on every node and print the throughput
+
+    :param label: str. label of the measurement
+    :param func: callable. function taking a node
+    :param nodes: list of QJsonNode. nodes to look up
+    """
+    start = time.perf_counter()
+    for node in nodes:
+        func(node)
+    elapsed = time.perf_counter() - start
+    print('{:<28} {:>12,.0f} calls/s'.format(label, len(nodes) / max(elapsed, 1e-9)))
+
+
+def benchModel(root, rows):
+    """
+    Measure QJsonModel.parent() on grandchildren of the wide array
+
+    :param root: QJsonNode. root of the tree
+    :param rows: list of int. rows to sample
+    """
+    try:
+        from Qt import QtWidgets
+        from qjsonmodel import QJsonModel
+    except ImportError:
+        print('Qt binding not available, skipping QJsonModel.parent()')
+        return
+
+    # the application only has to exist while the model is used
+    _ = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    model = QJsonModel(root)
+    array = model.index(0, 0)
+    indices = [model.index(0, 0, model.index(row, 0, array)) for row in rows]
+
+    start = time.perf_counter()
+    for index in indices:
+        model.parent(index)
+    elapsed = time.perf_counter() - start
+    print('{:<28} {:>12,.0f} calls/s'.format('QJsonModel.parent()', len(indices) / max(elapsed, 1e-9)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--width', type=int, default=100000)
+    parser.add_argument('--samples', type=int, default=20000)
+    args = parser.parse_args()
+
+    root = QJsonNode.load({'items': [{'id': i} for i in range(args.width)]})
+    array = root.child(0)
+    rows = [random.randrange(args.width) for _ in range(args.samples)]
+    nodes = [array.child(row) for row in rows]
+
+    print('array width: {:,}'.format(args.width))
+    timeCalls('children.index() (before)', lambda node: node.parent.children.index(node), nodes)
+    timeCalls('QJsonNode.row() (after)', QJsonNode.row, nodes)
+    benchModel(root, rows)
+
+
+if __name__ == '__main__':
+    main()
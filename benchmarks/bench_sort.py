@@ -0,0 +1,87 @@
+"""
+Tree sorting benchmark
+
+Sorts an object of many entries by key, then pastes a few entries into it
+while it is sorted, as the tree view does: the stock QSortFilterProxyModel
+sorting on the sort role (a paste sorts the whole proxy again) against
+QJsonModel sorting its own rows behind QJsonFilterProxyModel (a paste only
+merges the new rows into the cached order of the object).
+
+Requires a Qt binding, runs without a display (offscreen platform).
+
+Usage:
+    python benchmarks/bench_sort.py [--entries 20000] [--pastes 3]
+"""
+
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtCore, QtWidgets  # noqa: E402
+
+from qjsonfilter import QJsonFilterProxyModel  # noqa: E402
+from qjsonmodel import QJsonModel  # noqa: E402
+from qjsonnode import QJsonNode  # noqa: E402
+
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def document(count):
+    keys = ['key{}'.format(i) for i in range(count)]
+    random.Random(0).shuffle(keys)
+    return {key: i for i, key in enumerate(keys)}
+
+
+def visitTop(proxy, rows=50):
+    """
+    Ask for the first rows, as a view showing the top of the tree does
+    """
+    return [proxy.index(row, 0).data() for row in range(min(rows, proxy.rowCount()))]
+
+
+def bench(label, proxy, count, pastes):
+    model = QJsonModel(QJsonNode.load(document(count)))
+    proxy.setSourceModel(model)
+    proxy.setDynamicSortFilter(False)
+
+    start = time.perf_counter()
+    proxy.sort(0, QtCore.Qt.AscendingOrder)
+    visitTop(proxy)
+    print('  {:<22} sort  {:>8.3f} s'.format(label, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    for i in range(pastes):
+        entries = QJsonNode.load({'pasted{}'.format(i): i, 'key{}b'.format(i): i}).children
+        model.addChildren(entries)
+        # what QJsonView.add used to do after every paste
+        if not isinstance(proxy, QJsonFilterProxyModel):
+            proxy.sort(-1)
+            proxy.sort(0, QtCore.Qt.AscendingOrder)
+        visitTop(proxy)
+    elapsed = time.perf_counter() - start
+    print('  {:<22} paste {:>8.3f} s  ({:.1f} ms per paste)'.format(label, elapsed, elapsed / pastes * 1000))
+    return visitTop(proxy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=20000)
+    parser.add_argument('--pastes', type=int, default=3)
+    args = parser.parse_args()
+
+    print('Object of {:,} entries, sorted by key'.format(args.entries))
+    stock = QtCore.QSortFilterProxyModel()
+    stock.setSortRole(QJsonModel.sortRole)
+    bench('QSortFilterProxyModel', stock, args.entries, args.pastes)
+    bench('QJsonModel.sort', QJsonFilterProxyModel(), args.entries, args.pastes)
+
+
+if __name__ == '__main__':
+    main()
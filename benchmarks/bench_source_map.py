@@ -0,0 +1,71 @@
+"""
+Full-mode open and source map benchmark
+
+Times the work of a full-mode open of a formatted file: before, the text was
+parsed, turned into a tree and formatted again for the Raw View. Now the
+stored text is shown as it is. Then times QJsonSourceMap lookups between tree
+paths and text positions: the first lookups scan the containers on their
+path, the next ones are binary searches.
+
+Usage:
+    python benchmarks/bench_source_map.py [--records 100000]
+"""
+
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qjsoncodec  # noqa: E402
+from qjsonnode import QJsonNode  # noqa: E402
+from qjsonsourcemap import QJsonSourceMap  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=100000)
+    args = parser.parse_args()
+
+    records = [{'id': i, 'name': 'user{}'.format(i), 'tags': ['a', 'b'],
+                'address': {'city': 'Lisbon', 'zip': '1000-{:03d}'.format(i % 1000)}}
+               for i in range(args.records)]
+    raw = json.dumps({'records': records}, indent=4).encode('utf-8')
+    print('{:,} records, {:.1f} MB'.format(args.records, len(raw) / 1048576.0))
+
+    start = time.perf_counter()
+    data = qjsoncodec.loads(raw)
+    QJsonNode.load(data)
+    qjsoncodec.dumps(data)
+    print('  parse + tree + format  {:>7.3f} s'.format(time.perf_counter() - start))
+
+    start = time.perf_counter()
+    data = qjsoncodec.loads(raw)
+    QJsonNode.load(data)
+    text = raw.decode('utf-8')
+    print('  parse + tree           {:>7.3f} s'.format(time.perf_counter() - start))
+
+    random.seed(0)
+    paths = [(0, random.randrange(args.records), random.randrange(4)) for _ in range(1000)]
+    sourceMap = QJsonSourceMap(text)
+    for label in ('first lookups', 'next lookups'):
+        start = time.perf_counter()
+        for path in paths:
+            sourceMap.span(path)
+        elapsed = time.perf_counter() - start
+        print('  span(), {:<14} {:>7.1f} us each'.format(label, elapsed * 1e6 / len(paths)))
+
+    positions = [random.randrange(len(text)) for _ in range(1000)]
+    start = time.perf_counter()
+    for position in positions:
+        sourceMap.path(position)
+    elapsed = time.perf_counter() - start
+    print('  path()                 {:>7.1f} us each'.format(elapsed * 1e6 / len(positions)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Large file loading benchmark
+
+Writes an array of records to a temporary file, then compares json.loads on
+the whole text with the chunked qjsonstream.load: time and peak memory.
+The same records are then written as the last entry of an object, a single
+top-level entry spanning the whole file. The peak of json.loads includes
+the text of the whole file, the streaming parser only keeps the chunk and
+the entry being decoded.
+
+Usage:
+    python benchmarks/bench_stream_load.py [--records 300000]
+"""
+
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qjsonstream  # noqa: E402
+
+
+def makeRecords(count):
+    """
+    Array of small records
+    """
+    return [{'id': i, 'name': 'user{}'.format(i), 'tags': ['a', 'b'], 'score': i * 0.5,
+             'address': {'city': 'Lisbon', 'zip': '1000-{:03d}'.format(i % 1000)}}
+            for i in range(count)]
+
+
+def measure(function, path):
+    """
+    Run function(path), return (seconds, peak bytes), the time is taken
+    without tracemalloc which slows allocations down
+    """
+    start = time.perf_counter()
+    function(path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def loadWhole(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.loads(f.read())
+
+
+def loadStream(path):
+    with open(path, 'rb') as f:
+        return qjsonstream.load(f, os.path.getsize(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=300000)
+    args = parser.parse_args()
+
+    handle, path = tempfile.mkstemp(suffix='.json')
+    try:
+        os.close(handle)
+        records = makeRecords(args.records)
+        for shape, document in (('array', records), ('object', {'meta': {'records': args.records}, 'data': records})):
+            with open(path, 'w') as f:
+                json.dump(document, f, indent=4)
+            size = os.path.getsize(path)
+
+            print('{:,} records in an {}, {:.1f} MB file'.format(args.records, shape, size / 1048576.0))
+            for label, function in (('json.loads(read())', loadWhole), ('qjsonstream.load', loadStream)):
+                elapsed, peak = measure(function, path)
+                print('  {:<20} {:>7.2f} s  peak {:>8.1f} MB'.format(label, elapsed, peak / 1048576.0))
+        del records
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Raw View parsing benchmark
+
+Times the parsing done by "Update" (Raw View to tree) and by paste/drop:
+ast.literal_eval, used before, against qjsoncodec.loadsLenient, which tries
+strict JSON first. A Python-literal input is timed as well, it still goes
+through ast.literal_eval after the JSON attempt fails.
+
+Usage:
+    python benchmarks/bench_text_parse.py [--records 100000]
+"""
+
+
+import argparse
+import ast
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qjsoncodec  # noqa: E402
+
+
+def measure(function, text):
+    """
+    Run function(text), return (seconds, peak bytes)
+    """
+    start = time.perf_counter()
+    function(text)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=100000)
+    args = parser.parse_args()
+
+    # no true/false/null, which ast.literal_eval does not accept
+    records = [{'id': i, 'name': 'user{}'.format(i), 'tags': ['a', 'b'],
+                'scores': [i, i * 0.5]} for i in range(args.records)]
+    jsonText = json.dumps(records, indent=4)
+    literalText = repr(records)
+
+    print('{:,} records, JSON text {:.1f} MB'.format(args.records, len(jsonText) / 1048576.0))
+    rows = (('JSON', 'ast.literal_eval', ast.literal_eval, jsonText),
+            ('JSON', 'loadsLenient', qjsoncodec.loadsLenient, jsonText),
+            ('Python literal', 'loadsLenient', qjsoncodec.loadsLenient, literalText))
+    for kind, label, function, text in rows:
+        elapsed, peak = measure(function, text)
+        print('  {:<15} {:<17} {:>7.2f} s  peak {:>8.1f} MB'.format(kind, label, elapsed, peak / 1048576.0))
+
+
+if __name__ == '__main__':
+    main()
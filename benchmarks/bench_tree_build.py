@@ -0,0 +1,118 @@
+"""
+Tree build and serialization benchmark on deep and wide documents
+
+Compares the previous recursive QJsonNode.load/getChildrenValue with the
+current explicit-stack implementations.
+
+Usage:
+    python benchmarks/bench_tree_build.py [--depth 5000] [--width 200000]
+"""
+
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qjsonnode import QJsonNode  # noqa: E402
+
+
+def recursiveLoad(value, parent=None):
+    """
+    Previous recursive tree builder, kept for comparison
+    """
+    rootNode = QJsonNode(parent)
+    rootNode.key = "root"
+    rootNode.dtype = type(value)
+
+    if isinstance(value, dict):
+        for key, item in sorted(value.items()):
+            child = recursiveLoad(item, rootNode)
+            child.key = key
+            child.dtype = type(item)
+            rootNode.addChild(child)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            child = recursiveLoad(item, rootNode)
+            child.key = 'list[{}]'.format(index)
+            child.dtype = type(item)
+            rootNode.addChild(child)
+    else:
+        rootNode.value = value
+    return rootNode
+
+
+def recursiveValue(node):
+    """
+    Previous recursive serializer, kept for comparison
+    """
+    if node.dtype is dict:
+        return {child.key: recursiveValue(child) for child in node.children}
+    elif node.dtype == list:
+        return [recursiveValue(child) for child in node.children]
+    return node.value
+
+
+def makeDeep(depth):
+    """
+    Linked structure nested depth levels deep, built without recursion
+    """
+    document = {'value': 0, 'next': None}
+    for level in range(1, depth):
+        document = {'value': level, 'next': document}
+    return document
+
+
+def makeWide(width):
+    """
+    Array of small records
+    """
+    return [{'id': i, 'tags': ['x', 'y'], 'meta': {'ok': True}} for i in range(width)]
+
+
+def timed(func, *args):
+    """
+    Run func and return (seconds, result), or (None, error name) on failure
+    """
+    start = time.perf_counter()
+    try:
+        result = func(*args)
+    except RecursionError:
+        return None, 'RecursionError'
+    return time.perf_counter() - start, result
+
+
+def report(label, seconds):
+    if seconds is None:
+        print('  {:<22} RecursionError'.format(label))
+    else:
+        print('  {:<22} {:>9.3f} s'.format(label, seconds))
+
+
+def run(name, document):
+    print(name)
+    oldLoad, oldRoot = timed(recursiveLoad, document)
+    newLoad, newRoot = timed(QJsonNode.load, document)
+    report('load (recursive)', oldLoad)
+    report('load (iterative)', newLoad)
+
+    oldDump, _ = timed(recursiveValue, newRoot)
+    newDump, _ = timed(newRoot.getChildrenValue, newRoot)
+    report('serialize (recursive)', oldDump)
+    report('serialize (iterative)', newDump)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--depth', type=int, default=5000)
+    parser.add_argument('--width', type=int, default=200000)
+    args = parser.parse_args()
+
+    run('deep ({:,} levels)'.format(args.depth), makeDeep(args.depth))
+    run('wide ({:,} records)'.format(args.width), makeWide(args.width))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,17 +3,25 @@ Main window to launch JsonViewer
 """
 
 
-import ast
-import json
+import multiprocessing
 import os
 import sys
+import tempfile
 
 from Qt import QtWidgets, QtCore, QtGui
 from Qt import _loadUi
 
+import qjsoncodec
 from qjsonnode import QJsonNode
 from qjsonview import QJsonView
-from qjsonmodel import QJsonModel
+from qjsonmodel import QJsonModel, QJsonStoreModel
+from qjsonfilter import QJsonFilterProxyModel
+from qjsonstore import QJsonStore
+from qjsonloader import QJsonLoader, QJsonProfiler, QJsonSaver, MODE_FULL, MODE_STREAM, MODE_INDEX, MODE_LINES
+import qjsonlines
+import qjsonfile
+from pagedTextView import PagedTextView, TextLineIndex
+from qjsonsourcemap import QJsonSourceMap
 from codeEditor.highlighter.jsonHighlight import JsonHighlighter
 from findDialog import FindDialog
 from optionsDialog import OptionsDialog
@@ -45,10 +53,26 @@ STYLE_PREF_PATH = os.path.join(MODULE_PATH, 'ui', 'settings.json')
 ICON_PATH = os.path.join(MODULE_PATH, 'snap', 'gui', 'logo.png')
 
 # Large-file handling thresholds
-# Above this size, avoid full JSON parse and use preview-only mode
+# Above this size, parse the file in chunks and only preview it in Raw View
 LARGE_FILE_BYTES = 200 * 1024 * 1024  # 200 MB
 # Raw preview size to load into text editor when in large-file mode
 PREVIEW_BYTES = 2 * 1024 * 1024  # 2 MB
+# Above this size, skip parsing: the file is memory-mapped and the entries of
+# a container are located and decoded when it is expanded
+INDEX_FILE_BYTES = 1024 * 1024 * 1024  # 1 GB
+# Above this size of content, compressed documents are only previewed and
+# profiled: they cannot be mapped, their tree would hold the whole document
+STREAM_TREE_BYTES = 1024 * 1024 * 1024  # 1 GB
+# Above this size, build the tree lazily (children created when expanded)
+LAZY_TREE_BYTES = 16 * 1024 * 1024  # 16 MB
+# Above this size, Raw View pages the text from the file (read-only) instead
+# of holding it in the text editor
+PAGED_VIEW_BYTES = 32 * 1024 * 1024  # 32 MB
+# Pause in typing after which the tree filter is applied
+FILTER_DELAY_MS = 150
+# Tree backend for loaded files: 'node' (QJsonNode objects) or 'store'
+# (flat arrays, read-only structure, far less memory on huge documents)
+TREE_BACKEND = os.environ.get('JSONSTUDIO_TREE_BACKEND', 'node')
 
 
 class MainWindow(QtWidgets.QMainWindow):
@@ -65,6 +89,21 @@ class MainWindow(QtWidgets.QMainWindow):
         self.ui_tree_view = QJsonView()
         self.ui_tree_view.setStyleSheet('QWidget{font: 10pt "Bahnschrift";}')
         self.ui_grid_layout.addWidget(self.ui_tree_view, 1, 0)
+        # tree filter, applied once typing pauses, see _apply_filter
+        self.ui_filter_edit = QtWidgets.QLineEdit()
+        self.ui_filter_edit.setPlaceholderText('Filter keys and values…')
+        self.ui_filter_edit.setClearButtonEnabled(True)
+        self.ui_grid_layout.addWidget(self.ui_filter_edit, 0, 0)
+        self._filter_timer = QtCore.QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(FILTER_DELAY_MS)
+        self._filter_timer.timeout.connect(self._apply_filter)
+        self.ui_filter_edit.textChanged.connect(self._filter_timer.start)
+        # Raw View for large documents, shown in place of ui_view_edit
+        self.ui_paged_view = PagedTextView()
+        self.ui_grid_layout.addWidget(self.ui_paged_view, 0, 2, 2, 1)
+        self.ui_paged_view.hide()
+        self._raw_paged = False
         try:
             self.ui_tree_view.fileDropped.connect(self._load_json_from_path)
         except Exception:
@@ -79,21 +118,51 @@ class MainWindow(QtWidgets.QMainWindow):
         self._style_actions = []
         # dialogs
         self._options_dialog = None
+        # file read on demand by the tree (huge files)
+        self._indexed_path = None
+        # last file opened, see profileDocument
+        self._document_path = None
+        # background loading, see _load_json_from_path
+        self._loader = None
+        # background profiling, see _start_profile; the result replaces the
+        # tree of a preview, or is shown in a dialog
+        self._profiler = None
+        self._profile_in_tree = False
+        # background saving of a snapshot of the tree, see saveJson
+        self._saver = None
+        self._load_progress = QtWidgets.QProgressBar(self)
+        self._load_progress.setRange(0, 100)
+        self._load_progress.setMaximumWidth(320)
+        self._load_cancel_btn = QtWidgets.QPushButton('Cancel', self)
+        self._load_cancel_btn.clicked.connect(self._request_cancel_load)
+        self.statusBar().addPermanentWidget(self._load_progress)
+        self.statusBar().addPermanentWidget(self._load_cancel_btn)
+        self._load_progress.hide()
+        self._load_cancel_btn.hide()
+        # entries of indexed files are only filtered once expanded
+        self._filter_partial_label = QtWidgets.QLabel('Filter: partial results', self)
+        self._filter_partial_label.setToolTip(
+            'Entries read from the file on demand are only searched once their parent is expanded')
+        self.statusBar().addPermanentWidget(self._filter_partial_label)
+        self._filter_partial_label.hide()
 
         root = QJsonNode.load(TEST_DICT)
         self._model = QJsonModel(root, self)
 
         # proxy model
-        self._proxyModel = QtCore.QSortFilterProxyModel(self)
+        self._proxyModel = QJsonFilterProxyModel(self)
         self._proxyModel.setSourceModel(self._model)
         self._proxyModel.setDynamicSortFilter(False)
         self._proxyModel.setSortRole(QJsonModel.sortRole)
-        self._proxyModel.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
-        self._proxyModel.setFilterRole(QJsonModel.filterRole)
-        self._proxyModel.setFilterKeyColumn(0)
+        self._proxyModel.partialChanged.connect(self._on_filter_partial)
 
         self.ui_tree_view.setModel(self._proxyModel)
 
+        # tree selection and Raw View cursor follow each other
+        self._syncing = False
+        self.ui_tree_view.selectionModel().currentChanged.connect(self._on_tree_current_changed)
+        self.ui_view_edit.cursorPositionChanged.connect(self._on_raw_cursor_moved)
+
         self.ui_out_btn.clicked.connect(self.updateBrowser)
         self.ui_update_btn.clicked.connect(self.updateModel)
         # schema related
@@ -126,6 +195,8 @@ class MainWindow(QtWidgets.QMainWindow):
             self.ui_view_edit.installEventFilter(self)
             if hasattr(self.ui_view_edit, 'viewport'):
                 self.ui_view_edit.viewport().installEventFilter(self)
+            self.ui_paged_view.setAcceptDrops(True)
+            self.ui_paged_view.viewport().installEventFilter(self)
         except Exception:
             pass
         # Build top menu bar for styles
@@ -133,23 +204,162 @@ class MainWindow(QtWidgets.QMainWindow):
         # Load previously selected style if available
         self._load_saved_style()
 
+    def _apply_filter(self):
+        """
+        Filter the tree by the text of the filter field, the first filter
+        of a tree indexes it
+        """
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        try:
+            self._proxyModel.setFilterText(self.ui_filter_edit.text())
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+
+    def _on_filter_partial(self, partial):
+        """Tell when the filter may hide matches that are not read yet."""
+        self._filter_partial_label.setVisible(partial)
+
     def updateModel(self):
+        if self._raw_paged:
+            QtWidgets.QMessageBox.information(
+                self, 'Read-only Raw View',
+                'Raw View pages a large document and cannot be edited; edit it in the tree.')
+            return
         text = self.ui_view_edit.toPlainText()
-        jsonDict = ast.literal_eval(text)
-        root = QJsonNode.load(jsonDict)
+        try:
+            # strict JSON first, Python literals are still accepted
+            jsonDict = qjsoncodec.loadsLenient(text)
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(self, 'Parse Error', f'Cannot parse Raw View:\n{e}')
+            return
+        root = QJsonNode.load(jsonDict, lazy=len(text) > LAZY_TREE_BYTES)
 
         self._model = QJsonModel(root)
         self._proxyModel.setSourceModel(self._model)
+        self._indexed_path = None
+        self._set_source_map(text)
 
     def updateBrowser(self):
+        if self._raw_paged:
+            # large documents are streamed to a temporary file and paged
+            self._show_raw_serialized()
+            return
         self.ui_view_edit.clear()
-        output = self.ui_tree_view.asDict(None)
-        jsonDict = json.dumps(output, indent=4, sort_keys=True)
-        self.ui_view_edit.setPlainText(str(jsonDict))
+        # only the parts of the tree edited since the last call are re-encoded
+        jsonDict = self._model.toJson()
+        self.ui_view_edit.setPlainText(jsonDict)
+        self._set_source_map(jsonDict)
+
+    def _set_source_map(self, text):
+        """Relate the tree to the Raw View text it was loaded from or written to."""
+        try:
+            # the document stores every line break as a single character
+            if '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+            revision = self.ui_view_edit.document().revision()
+            self._model.setSourceMap(QJsonSourceMap(text, revision))
+        except Exception:
+            pass
+
+    def _current_source_map(self):
+        """The source map of the model, None if the tree or the text changed since."""
+        if self._raw_paged:
+            return None
+        try:
+            source_map = self._model.sourceMap()
+        except Exception:
+            return None
+        document = self.ui_view_edit.document()
+        # the document counts a final paragraph separator
+        if source_map is None or not source_map.isValid(document.revision(), document.characterCount() - 1):
+            return None
+        return source_map
+
+    def _on_tree_current_changed(self, current, previous):
+        """Select the text of the current tree entry in Raw View."""
+        if self._syncing or not current.isValid():
+            return
+        source_map = self._current_source_map()
+        if source_map is None:
+            return
+        index = self._proxyModel.mapToSource(current)
+        span = source_map.span(self._model.indexPath(index))
+        if span is None:
+            return
+        cursor = self.ui_view_edit.textCursor()
+        cursor.setPosition(source_map.toCursor(span[1]))
+        cursor.setPosition(source_map.toCursor(span[0]), QtGui.QTextCursor.KeepAnchor)
+        self._syncing = True
+        try:
+            self.ui_view_edit.setTextCursor(cursor)
+            self.ui_view_edit.ensureCursorVisible()
+        finally:
+            self._syncing = False
+
+    def _on_raw_cursor_moved(self):
+        """Make the tree entry under the Raw View cursor current."""
+        if self._syncing:
+            return
+        source_map = self._current_source_map()
+        if source_map is None:
+            return
+        position = source_map.fromCursor(self.ui_view_edit.textCursor().position())
+        path = source_map.path(position)
+        if not path:
+            return
+        index = self._proxyModel.mapFromSource(self._model.pathIndex(path))
+        if not index.isValid():
+            return
+        self._syncing = True
+        try:
+            self.ui_tree_view.setCurrentIndex(index)
+            self.ui_tree_view.scrollTo(index)
+        finally:
+            self._syncing = False
+
+    def _show_raw_serialized(self):
+        """Write the tree to a temporary file and page it in Raw View."""
+        handle, path = tempfile.mkstemp(prefix='jsonstudio-', suffix='.json')
+        try:
+            with os.fdopen(handle, 'w', encoding='utf-8') as f:
+                self._model.dump(f)
+            lines = TextLineIndex(path, temporary=True)
+        except Exception as e:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            QtWidgets.QMessageBox.critical(self, 'Raw View Error', f'Failed to serialize the tree:\n{e}')
+            return
+        lines.build()
+        self._show_raw_pages(lines)
+
+    def _raw_widget(self):
+        """The Raw View widget in use: the text editor or the paged view."""
+        return self.ui_paged_view if self._raw_paged else self.ui_view_edit
+
+    def _show_raw_pages(self, lines):
+        """Page a line index in Raw View in place of the text editor."""
+        if not self._raw_paged:
+            self.ui_paged_view.setHidden(self.ui_view_edit.isHidden())
+            self.ui_view_edit.hide()
+            self._raw_paged = True
+        # the editor would keep a second copy of the text
+        self.ui_view_edit.clear()
+        self.ui_paged_view.setIndex(lines)
+
+    def _show_raw_editor(self):
+        """Bring the text editor back as Raw View, releasing the paged file."""
+        if not self._raw_paged:
+            return
+        self.ui_view_edit.setHidden(self.ui_paged_view.isHidden())
+        self.ui_paged_view.hide()
+        self.ui_paged_view.setIndex(None)
+        self._raw_paged = False
 
     def pprint(self):
         output = self.ui_tree_view.asDict(self.ui_tree_view.getSelectedIndices())
-        jsonDict = json.dumps(output, indent=4, sort_keys=True)
+        jsonDict = qjsoncodec.dumps(output)
 
         print(jsonDict)
 
@@ -167,7 +377,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         try:
             with open(path, 'r', encoding='utf-8') as f:
-                schema = json.load(f)
+                schema = qjsoncodec.load(f)
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, 'Schema Error', f'Failed to load schema:\n{e}')
             return
@@ -186,77 +396,294 @@ class MainWindow(QtWidgets.QMainWindow):
             self,
             'Select JSON File',
             os.path.expanduser('~'),
-            'JSON Files (*.json);;All Files (*)'
+            'JSON Files (*.json *.json.gz *.json.bz2 *.json.xz);;'
+            'JSON Lines (*.jsonl *.ndjson *.jsonl.gz *.jsonl.bz2 *.jsonl.xz);;All Files (*)'
         )
         if not path:
             return
         self._load_json_from_path(path)
 
-    def _load_json_from_path(self, path):
-        """Load JSON from path into Raw View and UI Tree.
+    def saveJson(self):
+        """Write the tree to a JSON file, streamed without an intermediate copy.
 
-        Uses preview-only mode for very large files to avoid memory exhaustion.
+        A .jsonl/.ndjson path gets the elements of the top-level list, one per line,
+        and a .gz/.bz2/.xz path is compressed. A snapshot of the tree is written on
+        a worker thread, the tree stays editable meanwhile.
         """
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self,
+            'Save JSON File',
+            os.path.expanduser('~'),
+            'JSON Files (*.json);;Compressed JSON (*.json.gz *.json.bz2 *.json.xz);;'
+            'JSON Lines (*.jsonl *.ndjson);;All Files (*)'
+        )
         if not path:
             return
-        # Detect large files and fallback to preview-only mode
-        try:
-            fsize = os.path.getsize(path)
-        except Exception:
-            fsize = None
-        if fsize is not None and fsize > LARGE_FILE_BYTES:
-            return self._load_large_file_preview(path, fsize)
-
-    def _load_json_from_path(self, path):
-        """Load JSON from a filesystem path into both editors (Raw + UI)."""
-        if not path:
+        if self._saver is not None:
+            QtWidgets.QMessageBox.information(
+                self, 'Save', 'The document is still being saved, try again once it is written.')
+            return
+        # trees reading an indexed file, and the store backend, are written
+        # here: the file index and the arrays are not shared with other threads
+        if isinstance(self._model, QJsonModel) and not self._indexed_path:
+            saver = QJsonSaver(self._model.snapshot(), path,
+                               lines=qjsonlines.isJsonLinesPath(path), parent=self)
+            saver.saved.connect(self._on_save_finished)
+            saver.failed.connect(self._on_save_failed)
+            saver.finished.connect(saver.deleteLater)
+            self._saver = saver
+            self.statusBar().showMessage(f'Saving {os.path.basename(path)}…')
+            saver.start()
             return
+        # an indexed file is still read while the tree is written, replace it
+        # once the new content is complete instead of truncating it
+        target = path
+        indexed = self._indexed_path
+        if indexed and os.path.abspath(indexed) == os.path.abspath(path):
+            target = path + '.tmp'
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with qjsonfile.openOutput(path, target) as f:
+                if qjsonlines.isJsonLinesPath(path):
+                    self._model.dumpLines(f)
+                else:
+                    self._model.dump(f)
+            if target != path:
+                os.replace(target, path)
         except Exception as e:
-            QtWidgets.QMessageBox.critical(self, 'Load Error', f'Failed to load JSON file:\n{e}')
-            return
+            QtWidgets.QMessageBox.critical(self, 'Save Error', f'Failed to save JSON file:\n{e}')
+
+    def _on_save_finished(self, path):
+        self._saver = None
+        self.statusBar().showMessage(f'Saved {os.path.basename(path)}', 5000)
 
+    def _on_save_failed(self, message):
+        self._saver = None
+        self.statusBar().clearMessage()
+        QtWidgets.QMessageBox.critical(self, 'Save Error', f'Failed to save JSON file:\n{message}')
 
+    def _load_json_from_path(self, path):
+        """Load JSON from a filesystem path into both editors (Raw + UI).
+
+        The file is read, parsed and turned into a tree on a worker thread;
+        very large files are parsed in chunks, with only a preview in Raw View.
+        JSON Lines files are indexed by line and their records read on demand.
+        """
+        if not path:
+            return
         try:
-            self.ui_view_edit.setReadOnly(False)
+            fsize = os.path.getsize(path)
         except Exception:
-            pass
+            fsize = 0
+        # compressed files are read through a decompressing stream, they
+        # cannot be mapped for the index mode or the paged Raw View
+        compressed = qjsonfile.compression(path) is not None
         try:
-            text = json.dumps(data, indent=4, sort_keys=True)
+            content_size = qjsonfile.contentSize(path)
         except Exception:
-            text = str(data)
-        self.ui_view_edit.setPlainText(text)
+            content_size = fsize
+        if qjsonlines.isJsonLines(path):
+            mode = MODE_LINES
+        elif compressed:
+            mode = MODE_STREAM if content_size > PAGED_VIEW_BYTES else MODE_FULL
+        elif fsize > INDEX_FILE_BYTES:
+            mode = MODE_INDEX
+        elif fsize > LARGE_FILE_BYTES:
+            mode = MODE_STREAM
+        else:
+            mode = MODE_FULL
+
+        # only the latest request is applied
+        self._cancel_load()
+        self._cancel_profile()
+        self._document_path = path
+        if compressed and content_size > STREAM_TREE_BYTES:
+            self._load_too_large(path, fsize, self._too_large_message())
+            return
+        # the size of compressed content is only an estimate until it is read
+        loader = QJsonLoader(path, fsize, mode, lazy=content_size > LAZY_TREE_BYTES,
+                             backend=TREE_BACKEND, previewBytes=PREVIEW_BYTES,
+                             paged=not compressed and fsize > PAGED_VIEW_BYTES,
+                             limit=STREAM_TREE_BYTES if compressed else None, parent=self)
+        loader.progressChanged.connect(self._on_load_progress)
+        loader.loaded.connect(self._on_load_finished)
+        loader.failed.connect(self._on_load_failed)
+        loader.tooLarge.connect(self._on_load_too_large)
+        loader.cancelled.connect(self._on_load_cancelled)
+        loader.finished.connect(loader.deleteLater)
+        self._loader = loader
+
+        self._load_progress.setValue(0)
+        self._load_progress.setFormat(f'{os.path.basename(path)}: %p%')
+        self._load_progress.show()
+        self._load_cancel_btn.show()
+        loader.start()
+
+    def _request_cancel_load(self):
+        """Ask the running load or profiling to stop, see _on_load_cancelled."""
+        if self._loader is not None:
+            self._loader.cancel()
+        elif self._profiler is not None:
+            self._cancel_profile()
+
+    def _cancel_load(self):
+        """Stop the running load, if any; its results are ignored."""
+        if self._loader is not None:
+            try:
+                self._loader.cancel()
+            except Exception:
+                pass
+            self._loader = None
+        self._load_progress.hide()
+        self._load_cancel_btn.hide()
+
+    def _is_current_load(self):
+        """Whether the emitting loader is the latest one."""
+        return self._loader is not None and self.sender() is self._loader
+
+    def _on_load_progress(self, percent, stage):
+        if not self._is_current_load():
+            return
+        self._load_progress.setValue(percent)
+        name = os.path.basename(self._loader.path)
+        self._load_progress.setFormat(f'{name}: {stage} %p%')
+
+    def _on_load_failed(self, message):
+        if not self._is_current_load():
+            return
+        loader = self._loader
+        self._cancel_load()
+        if loader.mode == MODE_FULL:
+            QtWidgets.QMessageBox.critical(self, 'Load Error', f'Failed to load JSON file:\n{message}')
+            return
+        QtWidgets.QMessageBox.warning(self, 'Load Error', f'Failed to parse JSON file, showing a preview:\n{message}')
+        self._load_large_file_preview(loader.path, loader.size)
+
+    def _on_load_too_large(self, message):
+        if not self._is_current_load():
+            return
+        loader = self._loader
+        self._cancel_load()
+        self._load_too_large(loader.path, loader.size, self._too_large_message())
+
+    def _too_large_message(self):
+        return (f'Compressed documents over {STREAM_TREE_BYTES // (1024 * 1024)} MB of JSON text '
+                'are not loaded into the tree: they cannot be read on demand and the tree would '
+                'hold the whole document in memory. Showing a preview and a profile instead; '
+                'decompress the file to browse it as an indexed file.')
+
+    def _load_too_large(self, path, fsize, message):
+        """Show the preview and profile of a document too large to load as a tree."""
+        QtWidgets.QMessageBox.information(self, 'Large compressed file', message)
+        self._load_large_file_preview(path, fsize)
+
+    def _on_load_cancelled(self):
+        if not self._is_current_load():
+            return
+        loader = self._loader
+        self._cancel_load()
+        if loader.mode != MODE_FULL:
+            self._load_large_file_preview(loader.path, loader.size)
+
+    def _on_load_finished(self, result):
+        """Apply a loaded document to both editors (runs on the GUI thread)."""
+        if not self._is_current_load():
+            return
+        self._cancel_load()
+
+        name = os.path.basename(result.path)
+        size_mb = max(1, result.size // (1024 * 1024))
+        text = result.text
+        if result.mode == MODE_STREAM:
+            text = (
+                f"[Large file] Showing first {PREVIEW_BYTES//1024} KB of {size_mb} MB, "
+                f"the tree holds the whole document\n"
+                f"Path: {result.path}\n\n"
+            ) + text
+        elif result.mode == MODE_INDEX:
+            text = (
+                f"[Indexed file] Showing first {PREVIEW_BYTES//1024} KB of {size_mb} MB, "
+                f"tree entries are read from the file when expanded\n"
+                f"Path: {result.path}\n\n"
+            ) + text
+        elif result.mode == MODE_LINES:
+            text = (
+                f"[JSON Lines] Showing first {PREVIEW_BYTES//1024} KB of {size_mb} MB, "
+                f"{result.root.pendingCount:,} records read from the file when shown\n"
+                f"Path: {result.path}\n\n"
+            ) + text
+
+        if result.lines is not None:
+            self._show_raw_pages(result.lines)
+        else:
+            self._show_raw_editor()
+            try:
+                self.ui_view_edit.setReadOnly(result.mode != MODE_FULL)
+            except Exception:
+                pass
+            self.ui_view_edit.setPlainText(text)
 
         try:
-            root = QJsonNode.load(data)
-            self._model = QJsonModel(root, self)
+            if isinstance(result.root, QJsonStore):
+                self._model = QJsonStoreModel(result.root, self)
+            else:
+                self._model = QJsonModel(result.root, self)
             self._proxyModel.setSourceModel(self._model)
             self.ui_tree_view.setModel(self._proxyModel)
         except Exception:
             pass
-
-        self._schema = data
+        if result.mode == MODE_FULL and result.lines is None:
+            # the Raw View text is the whole document
+            self._set_source_map(text)
+        # the previous tree may have read another file on demand
+        self._indexed_path = result.path if result.mode in (MODE_INDEX, MODE_LINES) else None
+
+        self._schema = result.data
+        if result.mode == MODE_STREAM:
+            status = f'Large file: {name}'
+        elif result.mode == MODE_INDEX:
+            status = f'Indexed file: {name}'
+        elif result.mode == MODE_LINES:
+            status = f'JSON Lines: {name}'
+        else:
+            status = f'Schema: {name}'
         if hasattr(self, 'ui_schema_status_label'):
             try:
-                self.ui_schema_status_label.setText(f'Schema: {os.path.basename(path)}')
+                self.ui_schema_status_label.setText(status)
             except Exception:
                 pass
 
+    def closeEvent(self, event):
+        """Stop the running loads before the window owning their threads goes away."""
+        self._cancel_load()
+        self._cancel_profile()
+        for loader in self.findChildren(QJsonLoader) + self.findChildren(QJsonProfiler):
+            loader.cancel()
+            loader.wait()
+        # a file being saved is finished, not left half written
+        for saver in self.findChildren(QJsonSaver):
+            saver.wait()
+        # temporary files of the paged Raw View are deleted
+        self.ui_paged_view.setIndex(None)
+        super(MainWindow, self).closeEvent(event)
+
+    def _read_preview(self, path):
+        """Read the first PREVIEW_BYTES bytes of a file as text, decompressed if needed."""
+        with qjsonfile.QJsonInput(path) as f:
+            chunk = f.read(PREVIEW_BYTES)
+        try:
+            return chunk.decode('utf-8', errors='replace')
+        except Exception:
+            return chunk.decode('latin-1', errors='replace')
+
     def _load_large_file_preview(self, path, fsize):
         """Preview mode for very large JSON files.
 
         - Shows first PREVIEW_BYTES bytes in Raw View (read-only).
-        - Replaces tree with an informational summary to avoid OOM.
+        - Replaces tree with a profile of the document, computed in a
+          background process in one pass, to avoid OOM.
         """
         try:
-            with open(path, 'rb') as f:
-                chunk = f.read(PREVIEW_BYTES)
-            try:
-                text = chunk.decode('utf-8', errors='replace')
-            except Exception:
-                text = chunk.decode('latin-1', errors='replace')
+            text = self._read_preview(path)
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, 'Load Error', f'Failed to preview file:\n{e}')
             return
@@ -265,6 +692,7 @@ class MainWindow(QtWidgets.QMainWindow):
             f"[Large file preview] Showing first {PREVIEW_BYTES//1024} KB of {max(1, fsize//(1024*1024))} MB\n"
             f"Path: {path}\n\n"
         )
+        self._show_raw_editor()
         try:
             self.ui_view_edit.setReadOnly(True)
         except Exception:
@@ -272,32 +700,140 @@ class MainWindow(QtWidgets.QMainWindow):
         self.ui_view_edit.setPlainText(header + text)
 
         info = {
-            'info': 'Large file loaded in preview mode',
             'file': os.path.basename(path),
             'size_bytes': int(fsize) if fsize is not None else None,
-            'note': f'Showing first {PREVIEW_BYTES} bytes in Raw View. The tree is disabled.'
+            'profile': 'Profiling the document…'
         }
+        self._show_tree_summary(info)
+        self._start_profile(path, in_tree=True)
+
+        self._schema = None
+        if hasattr(self, 'ui_schema_status_label'):
+            try:
+                self.ui_schema_status_label.setText(f'Large file (preview): {os.path.basename(path)}')
+            except Exception:
+                pass
+
+    def _show_tree_summary(self, data):
+        """Replace the tree with a read-only summary of a document."""
         try:
-            root = QJsonNode.load(info)
+            root = QJsonNode.load(data)
             self._model = QJsonModel(root, self)
             self._proxyModel.setSourceModel(self._model)
             self.ui_tree_view.setModel(self._proxyModel)
         except Exception:
             pass
+        self._indexed_path = None
 
-        self._schema = None
-        if hasattr(self, 'ui_schema_status_label'):
+    def profileDocument(self):
+        """Profile the last opened file, or a chosen one, without loading it."""
+        path = self._document_path
+        if not path or not os.path.exists(path):
+            path, _ = QtWidgets.QFileDialog.getOpenFileName(
+                self,
+                'Profile JSON File',
+                os.path.expanduser('~'),
+                'JSON Files (*.json *.json.gz *.json.bz2 *.json.xz);;'
+                'JSON Lines (*.jsonl *.ndjson *.jsonl.gz *.jsonl.bz2 *.jsonl.xz);;All Files (*)'
+            )
+            if not path:
+                return
+        self._start_profile(path, in_tree=False)
+
+    def _start_profile(self, path, in_tree):
+        """Profile a file in a background process, see QJsonProfiler."""
+        self._cancel_profile()
+        profiler = QJsonProfiler(path, parent=self)
+        profiler.progressChanged.connect(self._on_profile_progress)
+        profiler.profiled.connect(self._on_profile_finished)
+        profiler.failed.connect(self._on_profile_failed)
+        profiler.cancelled.connect(self._on_profile_cancelled)
+        profiler.finished.connect(profiler.deleteLater)
+        self._profiler = profiler
+        self._profile_in_tree = in_tree
+
+        if self._loader is None:
+            self._load_progress.setValue(0)
+            self._load_progress.setFormat(f'{os.path.basename(path)}: Profiling %p%')
+            self._load_progress.show()
+            self._load_cancel_btn.show()
+        profiler.start()
+
+    def _cancel_profile(self):
+        """Stop the running profiling, if any; its results are ignored."""
+        if self._profiler is not None:
             try:
-                self.ui_schema_status_label.setText(f'Large file (preview): {os.path.basename(path)}')
+                self._profiler.cancel()
             except Exception:
                 pass
+            self._profiler = None
+            if self._loader is None:
+                self._load_progress.hide()
+                self._load_cancel_btn.hide()
+
+    def _is_current_profile(self):
+        """Whether the emitting profiler is the latest one."""
+        return self._profiler is not None and self.sender() is self._profiler
+
+    def _on_profile_progress(self, percent, stage):
+        if not self._is_current_profile() or self._loader is not None:
+            return
+        self._load_progress.show()
+        self._load_cancel_btn.show()
+        self._load_progress.setValue(percent)
+        name = os.path.basename(self._profiler.path)
+        self._load_progress.setFormat(f'{name}: {stage} %p%')
+
+    def _on_profile_failed(self, message):
+        if not self._is_current_profile():
+            return
+        self._cancel_profile()
+        QtWidgets.QMessageBox.warning(self, 'Profile Error', f'Failed to profile JSON file:\n{message}')
+
+    def _on_profile_cancelled(self):
+        if not self._is_current_profile():
+            return
+        self._cancel_profile()
+
+    def _on_profile_finished(self, profile):
+        """Show a document profile in the tree or in a dialog."""
+        if not self._is_current_profile():
+            return
+        in_tree = self._profile_in_tree
+        self._cancel_profile()
+        if in_tree:
+            self._show_tree_summary(profile)
+            try:
+                self.ui_tree_view.expandToDepth(0)
+            except Exception:
+                pass
+            return
+
+        dialog = QtWidgets.QDialog(self)
+        dialog.setWindowTitle(f"Document Profile: {profile.get('file', '')}")
+        # a read-only summary: a plain tree view, QJsonView expects a proxy
+        # model and offers editing, drag and drop
+        view = QtWidgets.QTreeView()
+        view.setUniformRowHeights(True)
+        view.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        model = QJsonModel(QJsonNode.load(profile), dialog)
+        view.setModel(model)
+        try:
+            view.expandToDepth(0)
+        except Exception:
+            pass
+        layout = QtWidgets.QVBoxLayout(dialog)
+        layout.addWidget(view)
+        dialog.resize(640, 480)
+        dialog.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+        dialog.show()
 
     def _get_current_json(self):
         """Parse current text view as JSON; fallback to tree if empty."""
         text = self.ui_view_edit.toPlainText().strip()
         if text:
             try:
-                return json.loads(text)
+                return qjsoncodec.loads(text)
             except Exception as e:
                 raise ValueError(f'Invalid JSON in Raw View: {e}')
         # fallback to model
@@ -309,7 +845,9 @@ class MainWindow(QtWidgets.QMainWindow):
         try:
             edit = getattr(self, 'ui_view_edit', None)
             viewport = edit.viewport() if edit and hasattr(edit, 'viewport') else None
-            if obj is edit or (edit is not None and obj is getattr(edit, 'viewport', lambda: None)()):
+            paged = getattr(self, 'ui_paged_view', None)
+            if obj is edit or (edit is not None and obj is getattr(edit, 'viewport', lambda: None)()) \
+                    or (paged is not None and obj is paged.viewport()):
                 if event.type() == QtCore.QEvent.DragEnter:
                     md = event.mimeData()
                     if md and md.hasUrls():
@@ -348,7 +886,7 @@ class MainWindow(QtWidgets.QMainWindow):
         text = self.ui_view_edit.toPlainText().strip()
         if text:
             try:
-                schema_candidate = json.loads(text)
+                schema_candidate = qjsoncodec.loads(text)
             except Exception as e:
                 QtWidgets.QMessageBox.critical(self, 'Parse Error', f'Cannot parse Raw View as JSON:\n{e}')
                 return
@@ -370,7 +908,9 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def clearAll(self):
         """Clear Raw View, filter, tree model, and loaded schema."""
+        self._cancel_profile()
         # clear text panel
+        self._show_raw_editor()
         try:
             self.ui_view_edit.setReadOnly(False)
         except Exception:
@@ -381,12 +921,14 @@ class MainWindow(QtWidgets.QMainWindow):
             self.ui_filter_edit.clear()
         except Exception:
             pass
-        # clear model/tree
+        # clear model/tree, the undo history belongs to the previous document
         try:
             self._model.clear()
             self._proxyModel.setSourceModel(self._model)
+            self.ui_tree_view.clearHistory()
         except Exception:
             pass
+        self._indexed_path = None
         # clear schema state
         self._schema = None
         try:
@@ -429,6 +971,14 @@ class MainWindow(QtWidgets.QMainWindow):
         open_action.triggered.connect(self.loadJsonToRaw)
         file_menu.addAction(open_action)
 
+        save_action = QtWidgets.QAction('Save As...', self)
+        try:
+            save_action.setShortcut(QtGui.QKeySequence.SaveAs)
+        except Exception:
+            pass
+        save_action.triggered.connect(self.saveJson)
+        file_menu.addAction(save_action)
+
         options_action = QtWidgets.QAction('Options', self)
         try:
             options_action.setShortcut(QtGui.QKeySequence.Preferences)
@@ -546,6 +1096,14 @@ class MainWindow(QtWidgets.QMainWindow):
         replace_action.triggered.connect(self.editReplace)
         edit_menu.addAction(replace_action)
 
+        goto_action = QtWidgets.QAction('Go to Line...', self)
+        try:
+            goto_action.setShortcut(QtGui.QKeySequence('Ctrl+G'))
+        except Exception:
+            pass
+        goto_action.triggered.connect(self.editGoToLine)
+        edit_menu.addAction(goto_action)
+
         edit_menu.addSeparator()
 
         toggle_line_comment_action = QtWidgets.QAction('Toggle Line Comment', self)
@@ -575,6 +1133,11 @@ class MainWindow(QtWidgets.QMainWindow):
         show_both_action.triggered.connect(self.showJsonEditors)
         view_menu.addAction(show_both_action)
 
+        view_menu.addSeparator()
+        profile_action = QtWidgets.QAction('Document Profile...', self)
+        profile_action.triggered.connect(self.profileDocument)
+        view_menu.addAction(profile_action)
+
         # Help menu (after View)
         help_menu = menubar.addMenu('Help')
 
@@ -687,8 +1250,7 @@ class MainWindow(QtWidgets.QMainWindow):
         text = self.ui_view_edit.toPlainText().strip()
         if not text:
             try:
-                data = self.ui_tree_view.asDict(None)
-                text = json.dumps(data, indent=4, sort_keys=True)
+                text = self._model.toJson()
             except Exception:
                 text = ''
         doc = QtGui.QTextDocument(text)
@@ -699,7 +1261,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
     # Edit actions implementations
     def _text_edit(self):
-        return getattr(self, 'ui_view_edit', None)
+        return self._raw_widget()
 
     def editUndo(self):
         w = self._text_edit()
@@ -804,6 +1366,27 @@ class MainWindow(QtWidgets.QMainWindow):
             except Exception:
                 pass
 
+    def editGoToLine(self):
+        """Jump to a line of Raw View (1-based)."""
+        w = self._text_edit()
+        if w is None:
+            return
+        if self._raw_paged:
+            count = w.lineCount()
+        else:
+            count = w.document().blockCount()
+        line, ok = QtWidgets.QInputDialog.getInt(self, 'Go to Line', f'Line (1 - {count:,}):',
+                                                 1, 1, max(1, count))
+        if not ok:
+            return
+        if self._raw_paged:
+            w.goToLine(line - 1)
+        else:
+            cursor = QtGui.QTextCursor(w.document().findBlockByNumber(line - 1))
+            w.setTextCursor(cursor)
+            w.centerCursor()
+        w.setFocus()
+
     def editReplace(self):
         w = self._text_edit()
         if w is None:
@@ -914,7 +1497,7 @@ class MainWindow(QtWidgets.QMainWindow):
     def hideJsonCodeEditor(self):
         try:
             if hasattr(self, 'ui_view_edit') and self.ui_view_edit is not None:
-                self.ui_view_edit.hide()
+                self._raw_widget().hide()
         except Exception:
             pass
         # Ensure UI (tree) editor stays visible
@@ -935,7 +1518,7 @@ class MainWindow(QtWidgets.QMainWindow):
         # Ensure Code editor stays visible
         try:
             if hasattr(self, 'ui_view_edit') and self.ui_view_edit is not None:
-                self.ui_view_edit.show()
+                self._raw_widget().show()
         except Exception:
             pass
         # Hide copy buttons as requested
@@ -944,7 +1527,7 @@ class MainWindow(QtWidgets.QMainWindow):
     def showJsonEditors(self):
         try:
             if hasattr(self, 'ui_view_edit') and self.ui_view_edit is not None:
-                self.ui_view_edit.show()
+                self._raw_widget().show()
         except Exception:
             pass
         try:
@@ -1039,14 +1622,14 @@ class MainWindow(QtWidgets.QMainWindow):
     def _save_style_selection(self, data):
         try:
             with open(STYLE_PREF_PATH, 'w', encoding='utf-8') as f:
-                json.dump(data, f)
+                qjsoncodec.dump(data, f, indent=None)
         except Exception:
             pass
 
     def _load_saved_style(self):
         try:
             with open(STYLE_PREF_PATH, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+                data = qjsoncodec.load(f)
         except Exception:
             return
 
@@ -1099,4 +1682,6 @@ def show():
 
 
 if __name__ == '__main__':
+    # the document profiler runs in a child process
+    multiprocessing.freeze_support()
     show()
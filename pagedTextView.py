@@ -0,0 +1,637 @@
+"""
+Read-only text view for documents too large for QPlainTextEdit. The text
+stays in a memory-mapped file (the loaded file, or a temporary file the tree
+was serialized to) and only the lines and columns in sight are decoded when
+the view is painted. A line index, built in one pass, gives the position of
+any line for scrolling and jumps, so the scroll bars cover the whole document.
+"""
+
+
+from array import array
+from bisect import bisect_right
+import mmap
+import os
+import re
+
+from Qt import QtWidgets, QtCore, QtGui
+
+
+# bytes of the file scanned per checkpoint of the line index
+CHECKPOINT_BYTES = 256 * 1024
+
+# longest text copied from a single line
+COPY_BYTES = 16 * 1024 * 1024
+
+# bytes of a line decoded at a time to find a character column
+COLUMN_CHUNK_BYTES = 1024 * 1024
+
+# scroll bar values are 32-bit
+_SCROLL_MAX = 2 ** 31 - 1
+
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"?')
+_KEY_END = re.compile(r'\s*:')
+_NUMBER = re.compile(r'-?[0-9][0-9.eE+-]*')
+
+
+class TextLineIndex(object):
+    def __init__(self, path, temporary=False):
+        """
+        Initialization, map the file in memory, see build()
+
+        :param path: str. path of the text file
+        :param temporary: bool. delete the file once the index is closed
+        """
+        self._path = path
+        self._temporary = temporary
+        self._file = open(path, 'rb')
+        if os.fstat(self._file.fileno()).st_size:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # empty files cannot be mapped
+            self._data = b''
+        # byte offset of each checkpoint, always a line start, and the number
+        # of lines before it
+        self._offsets = array('q', [0])
+        self._counts = array('q', [0])
+        self._count = 1
+        # (line, byte offset) of the line after the last one read
+        self._cursor = None
+
+    @property
+    def path(self):
+        """
+        Get the path of the file
+        """
+        return self._path
+
+    @property
+    def lineCount(self):
+        """
+        Get the number of lines, a final line break starts an empty line
+        :return: int.
+        """
+        return self._count
+
+    def __len__(self):
+        """
+        Get the size of the file in bytes
+        """
+        return len(self._data)
+
+    def close(self):
+        """
+        Release the mapping, and delete the file if it is temporary
+        """
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+        if self._temporary:
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+
+    def build(self, progress=None):
+        """
+        Scan the file once and record its checkpoints
+
+        :param progress: callable. called as progress(bytesRead, size) after
+                         each checkpoint, returning False stops the scan and
+                         leaves the index empty
+        :return: bool. whether the scan completed
+        """
+        data = self._data
+        size = len(data)
+        offsets = array('q')
+        counts = array('q')
+        count = 0
+
+        position = 0
+        offsets.append(0)
+        counts.append(0)
+        while position < size:
+            if position:
+                offsets.append(position)
+                counts.append(count)
+            end = data.find(b'\n', position + CHECKPOINT_BYTES)
+            end = size if end < 0 else end + 1
+            count += data[position:end].count(b'\n')
+
+            position = end
+            if progress is not None and progress(position, size) is False:
+                return False
+
+        self._offsets = offsets
+        self._counts = counts
+        self._count = count + 1
+        self._cursor = None
+        return True
+
+    def lineRanges(self, first, count):
+        """
+        Iterate over the byte ranges of a run of lines, line breaks excluded
+
+        :param first: int. number of the first line
+        :param count: int. maximum number of lines
+        :return: iterator of tuple. (start, end) offsets
+        """
+        data = self._data
+        size = len(data)
+        last = min(first + count, self._count)
+        if first >= last or first < 0:
+            return
+
+        cursor = self._cursor
+        if cursor is not None and cursor[0] <= first and first - cursor[0] < 1000:
+            line, position = cursor
+        else:
+            checkpoint = bisect_right(self._counts, first) - 1
+            line = self._counts[checkpoint]
+            position = self._offsets[checkpoint]
+
+        while line < last:
+            end = data.find(b'\n', position)
+            if end < 0:
+                end = size
+            if line >= first:
+                stop = end
+                if stop > position and data[stop - 1:stop] == b'\r':
+                    stop -= 1
+                yield position, stop
+            line += 1
+            position = end + 1
+            self._cursor = (line, position)
+
+    def lineRange(self, line):
+        """
+        Get the byte range of a line, line break excluded
+
+        :param line: int. line number
+        :return: tuple. (start, end) offsets, None past the last line
+        """
+        return next(self.lineRanges(line, 1), None)
+
+    def text(self, line, column=0, width=None):
+        """
+        Decode part of a line
+
+        :param line: int. line number
+        :param column: int. first byte of the line to decode
+        :param width: int. maximum number of bytes, None up to the line end
+        :return: str. text, empty past the last line
+        """
+        span = self.lineRange(line)
+        if span is None:
+            return ''
+        start, end = span
+        stop = end if width is None else min(end, start + column + width)
+        return self.decode(start + column, stop)
+
+    def decode(self, start, end):
+        """
+        Decode the text between two offsets, characters cut by them are
+        replaced
+
+        :param start: int. first byte
+        :param end: int. byte after the last one
+        :return: str. text
+        """
+        return self._data[start:end].decode('utf-8', 'replace')
+
+    def column(self, start, offset):
+        """
+        Get the character column of a byte offset, lines are UTF-8 and a
+        character can take several bytes
+
+        :param start: int. first byte of the line
+        :param offset: int. byte offset in the line
+        :return: int. number of characters between the two offsets
+        """
+        column = 0
+        position = start
+        while position < offset:
+            stop = self._boundary(position, min(offset, position + COLUMN_CHUNK_BYTES))
+            chunk = self._data[position:stop]
+            if chunk.isascii():
+                column += len(chunk)
+            else:
+                # invalid bytes count as one character each
+                column += len(chunk.decode('utf-8', 'surrogateescape'))
+            position = stop
+        return column
+
+    def offset(self, start, end, column):
+        """
+        Get the byte offset of a character column, see column()
+
+        :param start: int. first byte of the line
+        :param end: int. byte after the line
+        :param column: int. character column
+        :return: int. byte offset, end past the last character
+        """
+        position = start
+        while column > 0 and position < end:
+            stop = self._boundary(position, min(end, position + COLUMN_CHUNK_BYTES))
+            chunk = self._data[position:stop]
+            if chunk.isascii():
+                if column < len(chunk):
+                    return position + column
+                column -= len(chunk)
+            else:
+                text = chunk.decode('utf-8', 'surrogateescape')
+                if column < len(text):
+                    return position + len(text[:column].encode('utf-8', 'surrogateescape'))
+                column -= len(text)
+            position = stop
+        return position
+
+    def _boundary(self, start, stop):
+        """
+        Move an offset back to the start of the character it falls in, so
+        chunks decode to whole characters
+
+        :param start: int. start of the chunk
+        :param stop: int. end of the chunk
+        :return: int. end of the chunk on a character boundary
+        """
+        data = self._data
+        boundary = stop
+        # continuation bytes are 10xxxxxx, a character has at most three
+        while boundary > start and stop - boundary < 3 and boundary < len(data) \
+                and data[boundary] & 0xC0 == 0x80:
+            boundary -= 1
+        return boundary if boundary > start else stop
+
+    def lineAt(self, offset):
+        """
+        Get the line holding a byte offset
+
+        :param offset: int. byte offset
+        :return: int. line number
+        """
+        checkpoint = bisect_right(self._offsets, offset) - 1
+        start = self._offsets[checkpoint]
+        return self._counts[checkpoint] + self._data[start:offset].count(b'\n')
+
+    def search(self, expression, offset=0):
+        """
+        Find the next match of a regular expression, matches do not span
+        line breaks unless the expression does
+
+        :param expression: re.Pattern. compiled bytes expression
+        :param offset: int. byte offset to search from
+        :return: tuple. (start, end) offsets of the match, None if not found
+        """
+        match = expression.search(self._data, offset)
+        if match is None:
+            return None
+        return match.start(), match.end()
+
+
+class PagedTextView(QtWidgets.QAbstractScrollArea):
+    """
+    Read-only view of a TextLineIndex, painting the visible lines only
+    """
+    def __init__(self, parent=None):
+        """
+        Initialization
+
+        :param parent: QWidget. parent widget
+        """
+        super(PagedTextView, self).__init__(parent)
+        self._index = None
+        # current line and the byte range of the last match on it
+        self._line = 0
+        self._match = None
+        # widest line painted so far, for the horizontal scroll bar
+        self._widest = 0
+
+        try:
+            font = QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont)
+        except Exception:
+            font = QtGui.QFont('Courier')
+        self.setFont(font)
+        self.viewport().setCursor(QtCore.Qt.IBeamCursor)
+        self.setFocusPolicy(QtCore.Qt.StrongFocus)
+
+        self._keyFormat = QtGui.QFont(font)
+        self._keyFormat.setBold(True)
+        self._numberColor = QtGui.QColor(QtCore.Qt.darkBlue)
+        self._stringColor = QtGui.QColor(QtCore.Qt.darkGreen)
+
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+
+    def index(self):
+        """
+        Custom: get the line index shown, None if empty
+        :return: TextLineIndex.
+        """
+        return self._index
+
+    def setIndex(self, index):
+        """
+        Custom: show the text of a line index, the previous index is closed
+
+        :param index: TextLineIndex. built index, None to empty the view
+        """
+        if self._index is not None and self._index is not index:
+            self._index.close()
+        self._index = index
+        self._line = 0
+        self._match = None
+        self._widest = 0
+        self.verticalScrollBar().setValue(0)
+        self.horizontalScrollBar().setValue(0)
+        self._updateScrollBars()
+        self.viewport().update()
+
+    def isReadOnly(self):
+        """
+        Custom: the text cannot be edited, same interface as QPlainTextEdit
+        :return: bool.
+        """
+        return True
+
+    def lineCount(self):
+        """
+        Custom: get the number of lines of the document
+        :return: int.
+        """
+        return self._index.lineCount if self._index is not None else 0
+
+    def currentLine(self):
+        """
+        Custom: get the current (clicked, found or jumped to) line
+        :return: int.
+        """
+        return self._line
+
+    def goToLine(self, line):
+        """
+        Custom: make a line current and scroll it into the middle of the view
+
+        :param line: int. line number, clamped to the document
+        """
+        self._line = max(0, min(line, self.lineCount() - 1))
+        self._match = None
+        self._scrollTo(self._line, 0)
+
+    def find(self, pattern, flags=None):
+        """
+        Custom: find the next match after the current one and make its line
+        current, same interface as QPlainTextEdit.find()
+
+        :param pattern: str or QRegExp. text or regular expression
+        :param flags: QTextDocument.FindFlags. case sensitivity, whole words
+        :return: bool. whether a match was found
+        """
+        if self._index is None:
+            return False
+
+        flags = int(flags) if flags is not None else 0
+        caseSensitive = bool(flags & int(QtGui.QTextDocument.FindCaseSensitively))
+        wholeWords = bool(flags & int(QtGui.QTextDocument.FindWholeWords))
+        if isinstance(pattern, QtCore.QRegExp):
+            caseSensitive = pattern.caseSensitivity() == QtCore.Qt.CaseSensitive
+            expression = pattern.pattern()
+        else:
+            expression = re.escape(pattern)
+        if wholeWords:
+            expression = r'\b' + expression + r'\b'
+        try:
+            expression = re.compile(expression.encode('utf-8'), 0 if caseSensitive else re.IGNORECASE)
+        except re.error:
+            return False
+
+        if self._match is not None:
+            offset = self._match[1]
+        else:
+            span = self._index.lineRange(self._line)
+            offset = span[0] if span is not None else 0
+        found = self._index.search(expression, offset)
+        if found is None or found[0] == found[1]:
+            return False
+
+        line = self._index.lineAt(found[0])
+        start = self._index.lineRange(line)[0]
+        self._line = line
+        self._match = (found[0], found[1])
+        self._scrollTo(line, self._index.column(start, found[0]))
+        return True
+
+    def copy(self):
+        """
+        Custom: copy the current line to the clipboard
+        """
+        if self._index is None:
+            return
+        text = self._index.text(self._line, 0, COPY_BYTES)
+        QtWidgets.QApplication.clipboard().setText(text)
+
+    def _scrollTo(self, line, column):
+        """
+        Scroll a position into view
+
+        :param line: int. line number
+        :param column: int. character column
+        """
+        rows, columns = self._pageSize()
+        vertical = self.verticalScrollBar()
+        if not vertical.value() <= line < vertical.value() + rows:
+            vertical.setValue(max(0, line - rows // 2))
+
+        self._widest = max(self._widest, column + 1)
+        self._updateScrollBars()
+        horizontal = self.horizontalScrollBar()
+        if not horizontal.value() <= column < horizontal.value() + columns - self._gutter():
+            horizontal.setValue(max(0, column - columns // 4))
+        self.viewport().update()
+
+    def _pageSize(self):
+        """
+        Get the number of rows and columns that fit in the viewport
+
+        :return: tuple. (rows, columns)
+        """
+        metrics = self.fontMetrics()
+        size = self.viewport().size()
+        rows = max(1, size.height() // max(1, metrics.lineSpacing()))
+        columns = max(1, size.width() // max(1, metrics.averageCharWidth()))
+        return rows, columns
+
+    def _gutter(self):
+        """
+        Get the width of the line numbers, in columns
+        :return: int.
+        """
+        return len(str(self.lineCount())) + 2
+
+    def _updateScrollBars(self):
+        """
+        Set the scroll bar ranges from the document and the viewport
+        """
+        rows, columns = self._pageSize()
+        vertical = self.verticalScrollBar()
+        vertical.setRange(0, min(_SCROLL_MAX, max(0, self.lineCount() - rows)))
+        vertical.setPageStep(rows)
+        vertical.setSingleStep(1)
+
+        columns -= self._gutter()
+        horizontal = self.horizontalScrollBar()
+        horizontal.setRange(0, min(_SCROLL_MAX, max(0, self._widest - columns // 2)))
+        horizontal.setPageStep(max(1, columns))
+        horizontal.setSingleStep(1)
+
+    def resizeEvent(self, event):
+        """
+        Override: the number of visible lines changes with the size
+        """
+        super(PagedTextView, self).resizeEvent(event)
+        self._updateScrollBars()
+
+    def paintEvent(self, event):
+        """
+        Override: decode and paint the lines in sight
+        """
+        painter = QtGui.QPainter(self.viewport())
+        palette = self.palette()
+        painter.fillRect(self.viewport().rect(), palette.base())
+        if self._index is None:
+            return
+
+        metrics = self.fontMetrics()
+        lineHeight = metrics.lineSpacing()
+        charWidth = metrics.averageCharWidth()
+        rows, columns = self._pageSize()
+        gutter = self._gutter()
+        first = self.verticalScrollBar().value()
+        column = self.horizontalScrollBar().value()
+        width = columns - gutter + 1
+
+        gutterWidth = gutter * charWidth
+        painter.fillRect(0, 0, gutterWidth - charWidth // 2, self.viewport().height(),
+                         palette.alternateBase())
+
+        widest = self._widest
+        y = 0
+        for row, (start, end) in enumerate(self._index.lineRanges(first, rows + 1)):
+            line = first + row
+            # bytes, at least the number of characters: only the scroll range
+            # depends on it
+            widest = max(widest, end - start)
+            if line == self._line:
+                painter.fillRect(gutterWidth, y, self.viewport().width() - gutterWidth, lineHeight,
+                                 palette.alternateBase())
+            if self._match is not None and start <= self._match[0] <= end:
+                matchColumn = self._index.column(start, self._match[0])
+                x = gutterWidth + (matchColumn - column) * charWidth
+                painter.fillRect(x, y, self._index.column(*self._match) * charWidth, lineHeight,
+                                 palette.highlight())
+
+            baseline = y + metrics.ascent()
+            painter.setPen(palette.color(QtGui.QPalette.Disabled, QtGui.QPalette.Text))
+            painter.setFont(self.font())
+            painter.drawText(0, baseline, str(line + 1).rjust(gutter - 1))
+
+            # a character takes up to four bytes
+            position = self._index.offset(start, end, column)
+            text = self._index.decode(position, min(end, position + 4 * width))[:width]
+            self._paintText(painter, text.replace('\t', ' '), gutterWidth, baseline, charWidth)
+            y += lineHeight
+
+        if widest != self._widest:
+            self._widest = widest
+            self._updateScrollBars()
+
+    def _paintText(self, painter, text, x, baseline, charWidth):
+        """
+        Paint the visible part of a line with the colors of the JSON
+        highlighter: bold keys, green strings and blue numbers
+
+        :param painter: QPainter. active painter
+        :param text: str. visible text
+        :param x: int. left of the text
+        :param baseline: int. baseline of the line
+        :param charWidth: int. width of a column
+        """
+        font = self.font()
+        textColor = self.palette().color(QtGui.QPalette.Text)
+        plain = 0
+        position = 0
+        size = len(text)
+        while position < size:
+            char = text[position]
+            if char == '"':
+                match = _STRING.match(text, position)
+            elif char == '-' or char.isdigit():
+                match = _NUMBER.match(text, position)
+            else:
+                position += 1
+                continue
+            end = match.end() if match is not None else position + 1
+
+            if plain < position:
+                painter.setFont(font)
+                painter.setPen(textColor)
+                painter.drawText(x + plain * charWidth, baseline, text[plain:position])
+            if char == '"' and _KEY_END.match(text, end):
+                painter.setFont(self._keyFormat)
+                painter.setPen(textColor)
+            else:
+                painter.setFont(font)
+                painter.setPen(self._stringColor if char == '"' else self._numberColor)
+            painter.drawText(x + position * charWidth, baseline, text[position:end])
+            plain = position = end
+
+        if plain < size:
+            painter.setFont(font)
+            painter.setPen(textColor)
+            painter.drawText(x + plain * charWidth, baseline, text[plain:])
+
+    def mousePressEvent(self, event):
+        """
+        Override: make the clicked line current
+        """
+        row = event.pos().y() // max(1, self.fontMetrics().lineSpacing())
+        line = self.verticalScrollBar().value() + row
+        if line < self.lineCount():
+            self._line = line
+            self._match = None
+            self.viewport().update()
+        super(PagedTextView, self).mousePressEvent(event)
+
+    def keyPressEvent(self, event):
+        """
+        Override: move the current line with the arrow and page keys
+        """
+        rows, _ = self._pageSize()
+        key = event.key()
+        control = bool(event.modifiers() & QtCore.Qt.ControlModifier)
+        if key == QtCore.Qt.Key_Up:
+            line = self._line - 1
+        elif key == QtCore.Qt.Key_Down:
+            line = self._line + 1
+        elif key == QtCore.Qt.Key_PageUp:
+            line = self._line - rows
+        elif key == QtCore.Qt.Key_PageDown:
+            line = self._line + rows
+        elif key == QtCore.Qt.Key_Home and control:
+            line = 0
+        elif key == QtCore.Qt.Key_End and control:
+            line = self.lineCount() - 1
+        elif event.matches(QtGui.QKeySequence.Copy):
+            self.copy()
+            return
+        else:
+            super(PagedTextView, self).keyPressEvent(event)
+            return
+
+        self._line = max(0, min(line, self.lineCount() - 1))
+        self._match = None
+        vertical = self.verticalScrollBar()
+        if self._line < vertical.value():
+            vertical.setValue(self._line)
+        elif self._line >= vertical.value() + rows:
+            vertical.setValue(self._line - rows + 1)
+        self.viewport().update()
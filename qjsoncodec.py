@@ -0,0 +1,200 @@
+"""
+The codec module is the single place where JSON text is parsed and produced.
+It uses orjson when it is importable and the json module otherwise.
+
+Parsing gives the same values with either backend: documents the fast parser
+rejects or reads differently (NaN, integers beyond 64 bits, lone surrogates)
+are parsed again with the json module, and errors are raised as
+json.JSONDecodeError in both cases.
+
+Encoding is exact by default: the text is the one json.dumps writes. The fast
+encoder writes the same JSON values with different number formatting and
+without escaping non-ASCII characters (NaN and infinities become null), it is
+only used when the caller allows it (exact=False) for text that is parsed
+again rather than read.
+
+Text from the user goes through loadsLenient(), which also accepts Python
+literals.
+
+Set JSONSTUDIO_CODEC=json to force the json module.
+"""
+
+
+import ast
+import gc
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+if os.environ.get('JSONSTUDIO_CODEC', '') == 'json':
+    orjson = None
+
+
+# name of the backend in use
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+JSONDecodeError = json.JSONDecodeError
+
+# digits mapped to '0' and everything else to ' ', a run of 19 digits may be
+# an integer the fast parser cannot hold
+_DIGITS = bytes(48 if 48 <= code <= 57 else 32 for code in range(256))
+_LONG_NUMBER = b'0' * 19
+# text scanned at a time for such runs, the input is never copied whole
+_SCAN_SIZE = 1024 * 1024
+
+# the fast parser gives a float for integers outside this range
+_INTEGER_MIN = float(-2 ** 63)
+_INTEGER_MAX = float(2 ** 64)
+
+
+def _hasLongNumber(text):
+    """
+    Check whether a text holds a run of 19 digits or more, in a number or
+    in a string
+
+    :param text: str or bytes. JSON text
+    :return: bool.
+    """
+    for start in range(0, len(text), _SCAN_SIZE):
+        chunk = text[start:start + _SCAN_SIZE + len(_LONG_NUMBER) - 1]
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8', 'surrogatepass')
+        if chunk.translate(_DIGITS).find(_LONG_NUMBER) >= 0:
+            return True
+    return False
+
+
+def _hasLargeFloat(value):
+    """
+    Check whether a parsed value holds a float outside of the 64-bit integer
+    range, what the fast parser turns a longer integer into
+
+    :param value: mixed. parsed value
+    :return: bool.
+    """
+    stack = [value]
+    while stack:
+        current = stack.pop()
+        cls = current.__class__
+        if cls is float:
+            if not _INTEGER_MIN < current < _INTEGER_MAX:
+                return True
+            continue
+        if cls is not dict and cls is not list:
+            continue
+        for item in (current.values() if cls is dict else current):
+            cls = item.__class__
+            if cls is float:
+                if not _INTEGER_MIN < item < _INTEGER_MAX:
+                    return True
+            elif cls is dict or cls is list:
+                stack.append(item)
+    return False
+
+
+def loads(text):
+    """
+    Parse JSON text
+
+    :param text: str or bytes. JSON text, bytes are decoded as UTF-8
+    :return: mixed. parsed value
+    """
+    # a parsed document holds millions of containers, letting the cyclic
+    # collector rescan them while they are created slows parsing down
+    gcEnabled = gc.isenabled()
+    gc.disable()
+    try:
+        if orjson is not None:
+            try:
+                data = orjson.loads(text)
+            except orjson.JSONDecodeError:
+                # the json module is more permissive (lone surrogates, NaN)
+                # and gives its own error messages, only such documents go
+                # through twice
+                pass
+            else:
+                # integers beyond 64 bits silently become floats; the result
+                # is only searched for them when the text has a long run of
+                # digits, and parsed again when it does hold one
+                if not _hasLongNumber(text) or not _hasLargeFloat(data):
+                    return data
+        return json.loads(text)
+    finally:
+        if gcEnabled:
+            gc.enable()
+
+
+def loadsLenient(text):
+    """
+    Parse text typed or pasted by the user: strict JSON first, then Python
+    literal syntax (single quotes, True/False/None) as a fallback, which is
+    much slower and memory-hungry on large inputs
+
+    :param text: str. JSON text or Python literal
+    :return: mixed. parsed value
+    """
+    try:
+        return loads(text)
+    except JSONDecodeError as error:
+        try:
+            return ast.literal_eval(text)
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+            # the JSON error is the more useful one
+            raise error
+
+
+def load(fp):
+    """
+    Parse the JSON text of a file object
+
+    :param fp: file. text or binary file object
+    :return: mixed. parsed value
+    """
+    return loads(fp.read())
+
+
+def dumps(value, indent=4, sortKeys=False, exact=True):
+    """
+    Encode a value to JSON text
+
+    :param value: mixed. value to encode
+    :param indent: int. indentation width, None for compact output
+    :param sortKeys: bool. sort object keys
+    :param exact: bool. produce the text of json.dumps, when False the fast
+                  backend may be used for compact or 2-space indented output
+    :return: str. JSON text
+    """
+    if not exact and orjson is not None and indent in (None, 2):
+        option = orjson.OPT_NON_STR_KEYS
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        if sortKeys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(value, option=option).decode('utf-8')
+        except (TypeError, orjson.JSONEncodeError):
+            # e.g. integers beyond 64 bits
+            pass
+
+    if indent is None:
+        return json.dumps(value, separators=(',', ':'), sort_keys=sortKeys)
+    return json.dumps(value, indent=indent, sort_keys=sortKeys)
+
+
+def dump(value, fp, indent=4, sortKeys=False):
+    """
+    Write a value as JSON text to a file object, see dumps()
+
+    :param value: mixed. value to encode
+    :param fp: file. text file object opened for writing
+    :param indent: int. indentation width, None for compact output
+    :param sortKeys: bool. sort object keys
+    """
+    if indent is None:
+        json.dump(value, fp, separators=(',', ':'), sort_keys=sortKeys)
+    else:
+        json.dump(value, fp, indent=indent, sort_keys=sortKeys)
@@ -0,0 +1,160 @@
+"""
+The file module opens JSON files that may be compressed. Inputs compressed
+with gzip, bzip2 or xz are recognized by their first bytes, whatever their
+name, and decompressed while they are read, so they never go through a
+temporary file. Outputs are compressed when their name ends with .gz, .bz2
+or .xz.
+
+Compressed files cannot be memory-mapped, their content is only available
+as a stream.
+"""
+
+
+import bz2
+import builtins
+import gzip
+import io
+import lzma
+import os
+import struct
+
+
+# compression of a file by its first bytes
+_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+)
+
+# compression of an output by its extension
+EXTENSIONS = {'.gz': 'gzip', '.gzip': 'gzip', '.bz2': 'bz2', '.xz': 'xz'}
+
+# assumed ratio between the content and the size of a compressed file
+# when the format does not record it
+COMPRESSION_RATIO = 8
+
+
+def compression(path):
+    """
+    Get the compression of a file from its first bytes
+
+    :param path: str. file path
+    :return: str. 'gzip', 'bz2' or 'xz', None for an uncompressed file
+    """
+    try:
+        with builtins.open(path, 'rb') as f:
+            head = f.read(6)
+    except OSError:
+        return None
+    for magic, name in _MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def stripExtension(path):
+    """
+    Remove the compression extension of a path, 'a.json.gz' gives 'a.json'
+
+    :param path: str. file path
+    :return: str. path
+    """
+    root, extension = os.path.splitext(path)
+    if extension.lower() in EXTENSIONS:
+        return root
+    return path
+
+
+def contentSize(path):
+    """
+    Estimate the size of the content of a file, its size when it is not
+    compressed
+
+    :param path: str. file path
+    :return: int. size in bytes
+    """
+    size = os.path.getsize(path)
+    kind = compression(path)
+    if kind is None:
+        return size
+    if kind == 'gzip':
+        # the last member records its size modulo 4 GB
+        with builtins.open(path, 'rb') as f:
+            f.seek(-4, os.SEEK_END)
+            recorded = struct.unpack('<I', f.read(4))[0]
+        return max(size, recorded)
+    return size * COMPRESSION_RATIO
+
+
+class QJsonInput(object):
+    """
+    Binary stream of the content of a file, decompressed on the fly
+    """
+    def __init__(self, path):
+        """
+        Initialization, open the file
+
+        :param path: str. file path
+        """
+        self.compression = compression(path)
+        self._file = builtins.open(path, 'rb')
+        if self.compression == 'gzip':
+            self.stream = gzip.GzipFile(fileobj=self._file)
+        elif self.compression == 'bz2':
+            self.stream = bz2.BZ2File(self._file)
+        elif self.compression == 'xz':
+            self.stream = lzma.LZMAFile(self._file)
+        else:
+            self.stream = self._file
+
+    def read(self, size=-1):
+        """
+        Read decompressed bytes
+
+        :param size: int. maximum number of bytes, -1 for all
+        :return: bytes. content
+        """
+        return self.stream.read(size)
+
+    def position(self):
+        """
+        Get the number of bytes of the file read so far, for progress reports
+        :return: int.
+        """
+        return self._file.tell()
+
+    def close(self):
+        """
+        Close the file
+        """
+        if self.stream is not self._file:
+            self.stream.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def openOutput(path, target=None):
+    """
+    Open a text file for writing, compressed according to the extension of
+    its path
+
+    :param path: str. path deciding the compression
+    :param target: str. path actually written, path if None
+    :return: file. text file object
+    """
+    target = target or path
+    kind = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if kind == 'gzip':
+        raw = gzip.open(target, 'wb', compresslevel=6)
+    elif kind == 'bz2':
+        raw = bz2.open(target, 'wb')
+    elif kind == 'xz':
+        raw = lzma.open(target, 'wb')
+    else:
+        return builtins.open(target, 'w', encoding='utf-8')
+    return io.TextIOWrapper(raw, encoding='utf-8')
@@ -0,0 +1,476 @@
+"""
+The filter module shows the entries of a tree whose key or value contains a
+text, with their ancestors so they stay reachable.
+
+QJsonFilterIndex is an inverted index of the tree: every distinct key and
+scalar value text (a term) lists the nodes holding it. Terms repeat a lot in
+JSON documents (keys, enum-like values), there are far fewer terms than nodes.
+A query looks for the text in the terms with C-level iterators, then collects
+the nodes of the matching terms and their ancestors, a level at a time with
+set operations. Typing more characters narrows the previous result instead
+of searching again, and recent results are kept for when characters are
+deleted. Entries a lazily loaded node has not created yet are indexed as
+terms of that node, so it stays visible while it holds a match. Edited nodes
+are matched on their current texts until their postings are rebuilt.
+
+QJsonFilterProxyModel only looks the rows it is asked about up in the set of
+visible nodes, instead of calling data() on every row of the tree. It leaves
+sorting to source models that sort their own rows. Entries of indexed files
+and JSON Lines are only read when they are expanded, until then the results
+are partial, see partialChanged.
+"""
+
+
+import gc
+from itertools import chain, compress, repeat
+from operator import attrgetter, contains
+
+from Qt import QtCore
+
+
+# results kept for recent filter texts
+CACHED_QUERIES = 16
+
+# edited nodes matched on their texts before the postings are rebuilt
+CHANGED_NODES = 1024
+
+
+class QJsonFilterIndex(object):
+    def __init__(self, parentOf, top=None):
+        """
+        Initialization, see add() and the fromModel() constructor
+
+        :param parentOf: callable. gives the parent of a node
+        :param top: mixed. what parentOf gives for the root
+        """
+        self._parentOf = parentOf
+        self._top = top
+        # term -> term id
+        self._ids = {}
+        self._terms = []
+        # nodes holding each term, by term id
+        self._postings = []
+        # lowercase terms, built by the first query after terms are added
+        self._lowered = None
+        # filter text -> (matching term ids, visible nodes)
+        self._results = {}
+        # edited node -> its current entries, its postings may be outdated
+        self._changed = {}
+
+    @classmethod
+    def fromModel(cls, model, unsearched=None):
+        """
+        Index the tree of a QJsonModel or QJsonStoreModel
+
+        :param model: QAbstractItemModel. source model
+        :param unsearched: list. receives the lazily loaded nodes whose
+                           entries cannot be searched before they are
+                           created, see QJsonNode.textEntries()
+        :return: QJsonFilterIndex. index
+        """
+        if hasattr(model, 'store'):
+            store = model.store()
+            index = cls(store.parent, -1)
+            index.add(store.textEntries())
+        else:
+            root = model.getNode(QtCore.QModelIndex())
+            index = cls(_nodeParent)
+            index.add(root.textEntries(unsearched=unsearched))
+            # the rows of the root are indexed as they are created
+            if unsearched is not None and root.canFetchMore() and root.pendingTexts() is None:
+                unsearched.append(root)
+        return index
+
+    def __len__(self):
+        """
+        Get the number of distinct terms
+        """
+        return len(self._terms)
+
+    def add(self, entries):
+        """
+        Index nodes, results of earlier queries are dropped
+
+        :param entries: iterable of tuple. (node, key, value text) as given
+                        by textEntries(), None texts are skipped
+        """
+        # the posting lists are millions of new containers, see
+        # qjsoncodec.loads()
+        gcEnabled = gc.isenabled()
+        gc.disable()
+        try:
+            self._add(entries)
+        finally:
+            if gcEnabled:
+                gc.enable()
+
+        self._lowered = None
+        self._results.clear()
+
+    def update(self, entries):
+        """
+        Replace the entries of edited nodes, they are matched on these texts
+        instead of their postings until the postings are rebuilt
+
+        :param entries: iterable of tuple. (node, key, value text), every
+                        entry of each edited node
+        """
+        changed = dict()
+        for entry in entries:
+            changed.setdefault(entry[0], []).append(entry)
+        self._changed.update(changed)
+        self._results.clear()
+
+        if len(self._changed) > CHANGED_NODES:
+            self._compact()
+
+    def invalidate(self):
+        """
+        Drop the results of earlier queries, to be called when nodes are
+        removed: removed nodes are never asked about, but their ancestors
+        may no longer be visible
+        """
+        self._results.clear()
+
+    def _compact(self):
+        """
+        Remove the edited nodes from the postings and index their current
+        entries
+        """
+        changed = self._changed
+        self._changed = {}
+        self._postings = [[node for node in posting if node not in changed]
+                          for posting in self._postings]
+        self.add(chain.from_iterable(changed.values()))
+
+    def _add(self, entries):
+        ids = self._ids
+        terms = self._terms
+        postings = self._postings
+        for node, key, text in entries:
+            if key is not None:
+                termId = ids.get(key)
+                if termId is None:
+                    termId = ids[key] = len(terms)
+                    terms.append(key)
+                    postings.append([node])
+                else:
+                    postings[termId].append(node)
+            if text is not None:
+                termId = ids.get(text)
+                if termId is None:
+                    termId = ids[text] = len(terms)
+                    terms.append(text)
+                    postings.append([node])
+                else:
+                    postings[termId].append(node)
+
+    def query(self, text):
+        """
+        Get the nodes whose key or value contains a text (case-insensitive),
+        with all their ancestors
+
+        :param text: str. text to look for, not empty
+        :return: set. visible nodes
+        """
+        text = text.lower()
+        result = self._results.get(text)
+        if result is not None:
+            return result[1]
+
+        # a longer text only matches terms the shorter one matched
+        base = None
+        for previous in self._results:
+            if previous in text and (base is None or len(previous) > len(base)):
+                base = previous
+        visible = None
+        if base is not None:
+            lowered = self._lowered
+            baseIds, baseVisible = self._results[base]
+            termIds = [termId for termId in baseIds if text in lowered[termId]]
+            if len(termIds) == len(baseIds) and not self._changed:
+                # the same terms match; edited nodes are matched on their
+                # own text, the longer text may no longer match them
+                visible = baseVisible
+        else:
+            termIds = self._search(text)
+
+        if visible is None:
+            visible = set()
+            postings = self._postings
+            for termId in termIds:
+                visible.update(postings[termId])
+            changed = self._changed
+            if changed:
+                visible.difference_update(changed)
+                visible.update(self.matches(text, chain.from_iterable(changed.values())))
+            self.ancestors(visible, visible)
+
+        if len(self._results) >= CACHED_QUERIES:
+            del self._results[next(iter(self._results))]
+        self._results[text] = (termIds, visible)
+        return visible
+
+    def matches(self, text, entries):
+        """
+        Get the nodes among some entries whose key or value contains a text,
+        without looking at the index
+
+        :param text: str. text to look for
+        :param entries: iterable of tuple. (node, key, value text)
+        :return: list. matching nodes
+        """
+        text = text.lower()
+        return [node for node, key, value in entries
+                if (key is not None and text in key.lower()) or
+                (value is not None and text in value.lower())]
+
+    def ancestors(self, nodes, visible):
+        """
+        Add nodes and their ancestors to a set of visible nodes, one level up
+        at a time with set operations
+
+        :param nodes: iterable. nodes
+        :param visible: set. visible nodes, updated
+        """
+        parentOf = self._parentOf
+        top = self._top
+        level = set(nodes)
+        visible |= level
+        while level:
+            level = set(map(parentOf, level))
+            level.discard(top)
+            level -= visible
+            visible |= level
+
+    def _search(self, text):
+        """
+        Find the terms containing a text, scanning the lowercase terms with
+        C-level iterators (a find() loop in the joined terms is faster for
+        rare texts but far slower for common ones)
+
+        :param text: str. lowercase text
+        :return: list of int. term ids
+        """
+        if self._lowered is None:
+            self._lowered = [term.lower() for term in self._terms]
+        lowered = self._lowered
+        return list(compress(range(len(lowered)), map(contains, lowered, repeat(text))))
+
+
+# parent of a QJsonNode, None for the root (the slot, not the property)
+_nodeParent = attrgetter('_parent')
+
+
+class QJsonFilterProxyModel(QtCore.QSortFilterProxyModel):
+    """
+    Sort/filter proxy showing the entries whose key or value contains the
+    filter text, and their ancestors, see QJsonFilterIndex
+    """
+    # whether entries that are not searched yet may hide matches
+    partialChanged = QtCore.pyqtSignal(bool)
+
+    def __init__(self, parent=None):
+        """
+        Initialization
+        """
+        super(QJsonFilterProxyModel, self).__init__(parent)
+        self._filterText = ''
+        # QJsonFilterIndex of the source model, built on the first filter
+        self._filterIndex = None
+        # visible source nodes, None when everything is shown
+        self._visible = None
+        # lazily loaded nodes whose entries are searched once created
+        self._unsearched = []
+        self._partial = False
+        # last sort asked for, applied to the next source models too
+        self._sort = (-1, QtCore.Qt.AscendingOrder)
+
+    def setSourceModel(self, model):
+        """
+        Override: follow the changes of the source model
+        """
+        previous = self.sourceModel()
+        if previous is not None:
+            for signal, slot in self._sourceSignals(previous):
+                try:
+                    signal.disconnect(slot)
+                except (RuntimeError, TypeError):
+                    pass
+
+        super(QJsonFilterProxyModel, self).setSourceModel(model)
+        if model is not None:
+            for signal, slot in self._sourceSignals(model):
+                signal.connect(slot)
+
+        self._filterIndex = None
+        self._refilter()
+        self.sort(*self._sort)
+
+    def _sourceSignals(self, model):
+        return ((model.rowsInserted, self._onRowsInserted),
+                (model.rowsRemoved, self._onRowsRemoved),
+                (model.dataChanged, self._onDataChanged),
+                (model.layoutChanged, self._onLayoutChanged),
+                (model.modelReset, self._onModelReset))
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        """
+        Override: source models sorting their own rows (QJsonModel) are
+        asked to, the proxy then keeps their order instead of sorting every
+        row with lessThan()
+        """
+        self._sort = (column, order)
+        model = self.sourceModel()
+        if model is not None and getattr(model, 'sortsRows', False):
+            if self.sortColumn() != -1:
+                super(QJsonFilterProxyModel, self).sort(-1)
+            model.sort(column, order)
+        else:
+            super(QJsonFilterProxyModel, self).sort(column, order)
+
+    def filterText(self):
+        """
+        Custom: get the filter text
+        :return: str.
+        """
+        return self._filterText
+
+    def setFilterText(self, text):
+        """
+        Custom: show the entries whose key or value contains a text
+        (case-insensitive) and their ancestors, everything for an empty text
+
+        :param text: str. filter text
+        """
+        if text == self._filterText:
+            return
+        self._filterText = text
+        self._refilter()
+
+    def _refilter(self):
+        """
+        Custom: compute the visible nodes of the filter text and update the
+        rows
+        """
+        if not self._filterText or self.sourceModel() is None:
+            self._visible = None
+        else:
+            if self._filterIndex is None:
+                self._unsearched = []
+                self._filterIndex = QJsonFilterIndex.fromModel(self.sourceModel(), self._unsearched)
+            self._visible = self._filterIndex.query(self._filterText)
+        self.invalidateFilter()
+        self._updatePartial()
+
+    def isPartial(self):
+        """
+        Custom: check whether the filter may hide matches, entries of indexed
+        files and JSON Lines are only searched once their container is
+        expanded
+
+        :return: bool.
+        """
+        return self._partial
+
+    def _updatePartial(self):
+        """
+        Custom: forget the unsearched nodes that were expanded to their end
+        and tell whether the results are partial
+        """
+        self._unsearched = [node for node in self._unsearched if node.canFetchMore()]
+        partial = self._visible is not None and bool(self._unsearched)
+        if partial != self._partial:
+            self._partial = partial
+            self.partialChanged.emit(partial)
+
+    def _onRowsInserted(self, parent, first, last):
+        """
+        Custom: index the rows added to the source model (lazy loading
+        creates rows as they are expanded) and show those that match. The
+        rows are announced where they are displayed, a sorted source model
+        gives their rows in the document order
+        """
+        if self._filterIndex is None:
+            return
+        model = self.sourceModel()
+        parentNode = model.getNode(parent)
+        if not hasattr(parentNode, 'textEntries'):
+            self._filterIndex = None
+            return
+
+        entries = []
+        rows = model.documentRows(parent, first, last)
+        start = previous = rows[0]
+        for row in rows[1:] + [None]:
+            if row != previous + 1:
+                entries.extend(parentNode.textEntries(start, previous, self._unsearched))
+                start = row
+            previous = row
+        self._filterIndex.add(entries)
+
+        if self._visible is not None:
+            matches = self._filterIndex.matches(self._filterText, entries)
+            self._filterIndex.ancestors(matches, self._visible)
+            self.invalidateFilter()
+        self._updatePartial()
+
+    def _onDataChanged(self, topLeft, bottomRight, roles=()):
+        """
+        Custom: keys or values of the source model changed (a lazily loaded
+        node also changes when children are added to it), the entries of
+        the nodes are updated in the index and the rows filtered again
+        """
+        if self._filterIndex is None:
+            return
+        model = self.sourceModel()
+        parent = topLeft.parent()
+        nodes = [model.getNode(model.index(row, 0, parent))
+                 for row in range(topLeft.row(), bottomRight.row() + 1)]
+        if hasattr(model, 'store'):
+            entries = model.store().textEntries(nodes)
+        else:
+            entries = chain.from_iterable(node.ownTextEntries(self._unsearched) for node in nodes)
+        self._filterIndex.update(entries)
+
+        if self._visible is not None:
+            self._refilter()
+
+    def _onRowsRemoved(self, *args):
+        """
+        Custom: rows of the source model were removed, their ancestors are
+        filtered again. Removed nodes have no parent and are never asked
+        about, they stay in the index until it is built again
+        """
+        if self._filterIndex is None:
+            return
+        self._filterIndex.invalidate()
+        if self._visible is not None:
+            self._refilter()
+
+    def _onModelReset(self):
+        """
+        Custom: the source model holds another tree, it is indexed again
+        """
+        self._filterIndex = None
+        self._refilter()
+
+    def _onLayoutChanged(self, parents=(), hint=QtCore.QAbstractItemModel.NoLayoutChangeHint):
+        """
+        Custom: rows of the source model were sorted, moved or removed as
+        one layout change. Sorting only moves rows, the visible nodes stay
+        the same; removed rows are handled as in _onRowsRemoved()
+        """
+        if hint == QtCore.QAbstractItemModel.VerticalSortHint:
+            return
+        self._onRowsRemoved()
+
+    def filterAcceptsRow(self, sourceRow, sourceParent):
+        """
+        Override: a row is shown when its node is visible
+        """
+        visible = self._visible
+        if visible is None:
+            return True
+        model = self.sourceModel()
+        return model.getNode(model.index(sourceRow, 0, sourceParent)) in visible
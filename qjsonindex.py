@@ -0,0 +1,463 @@
+"""
+The index module gives random access to the values of a JSON file without
+parsing it. The file is memory-mapped and the entries of a container are
+located by a structural scan of its bytes, recording the byte offsets of
+each entry: strings and scalars are matched by regular expressions, nested
+containers are skipped by counting brackets, nothing is decoded. Containers
+are only scanned as far as their entries are requested, and an entry is
+decoded when it is handed out, so opening a file of any size is immediate
+and memory does not grow with the size of the entries skipped.
+
+Nested containers are handed out as QJsonSpan objects, which are scanned the
+same way when they are expanded.
+"""
+
+
+from array import array
+import mmap
+import re
+
+import qjsoncodec
+
+
+# entries scanned at a time when all the remaining entries of a container
+# are read
+SCAN_BATCH = 1000
+
+_WHITESPACE_BYTES = re.compile(rb'[ \t\n\r]*')
+# a string, escapes included
+_STRING_BYTES = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# a number or a literal, they are checked when they are decoded
+_SCALAR_BYTES = re.compile(rb'-?[0-9][0-9.eE+\-]*|true|false|null')
+
+
+def _nestedPattern(depth):
+    """
+    Build a regular expression matching a string or a whole container
+    nested at most depth levels deep (regular expressions cannot count
+    brackets)
+
+    :param depth: int. nesting levels
+    :return: bytes. pattern
+    """
+    text = rb'[^"\[\]{}]*'
+    pattern = string = _STRING_BYTES.pattern
+    for _ in range(depth):
+        pattern = string + rb'|[\[{]' + text + rb'(?:(?:' + pattern + rb')' + text + rb')*[\]}]'
+    return pattern
+
+
+# containers up to this deep are skipped by a single match. A match keeps
+# backtracking state for each entry it goes over, so it is bounded to
+# NESTED_WINDOW bytes and larger containers are entered to be skipped
+NESTED_DEPTH = 4
+NESTED_WINDOW = 64 * 1024
+_NESTED = re.compile(_nestedPattern(NESTED_DEPTH), re.DOTALL)
+# the text up to the next bracket that is not part of a string or of a
+# small container, or to a string left open or longer than the window
+_CONTENT = re.compile(rb'[^"\[\]{}]*(?:(?:' + _nestedPattern(NESTED_DEPTH) + rb')[^"\[\]{}]*)*', re.DOTALL)
+
+_OPEN = {ord('{'): dict, ord('['): list}
+_CLOSING = {dict: ord('}'), list: ord(']')}
+_CLOSE = frozenset(_CLOSING.values())
+_QUOTE = ord('"')
+_COLON = ord(':')
+_COMMA = ord(',')
+
+
+class QJsonFileIndex(object):
+    def __init__(self, path):
+        """
+        Initialization, map the file in memory
+
+        :param path: str. path of the JSON file, it must not be empty
+        """
+        self._file = open(path, 'rb')
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+    def close(self):
+        """
+        Release the mapping, spans of the file cannot be read afterwards
+        """
+        self._data.close()
+        self._file.close()
+
+    def __len__(self):
+        """
+        Get the size of the file in bytes
+        """
+        return len(self._data)
+
+    def root(self):
+        """
+        Get the top-level value of the file
+
+        :return: QJsonSpan or mixed. span of a container, decoded scalar value
+        """
+        data = self._data
+        # a byte order mark is not part of the document
+        start = 3 if data[:3] == b'\xef\xbb\xbf' else 0
+        start = _WHITESPACE_BYTES.match(data, start).end()
+        if start < len(data) and data[start] in _OPEN:
+            return QJsonSpan(self, start, len(data), _OPEN[data[start]])
+        return qjsoncodec.loads(data[start:])
+
+    def value(self, start, end):
+        """
+        Get the value stored between two offsets
+
+        :param start: int. offset of the first byte of the value
+        :param end: int. offset after its last byte
+        :return: QJsonSpan or mixed. span of a container, decoded scalar value
+        """
+        dtype = _OPEN.get(self._data[start])
+        if dtype is not None:
+            return QJsonSpan(self, start, end, dtype)
+        return qjsoncodec.loads(self._data[start:end])
+
+    def decode(self, start, end):
+        """
+        Decode the value stored between two offsets
+
+        :param start: int. offset of the first byte of the value
+        :param end: int. offset after its last byte
+        :return: mixed. decoded value
+        """
+        return qjsoncodec.loads(self._data[start:end])
+
+    def _error(self, message, position):
+        """
+        Build a decoding error positioned in the file
+
+        :param message: str. error message
+        :param position: int. byte offset
+        :return: ValueError. the error
+        """
+        return ValueError('{}: byte {}'.format(message, position))
+
+
+class QJsonSpan(object):
+    """
+    Container value of an indexed file that is not decoded
+    """
+    __slots__ = ('index', 'start', 'end', 'dtype', '_container')
+
+    def __init__(self, index, start, end, dtype):
+        """
+        Initialization
+
+        :param index: QJsonFileIndex. file of the value
+        :param start: int. offset of the opening bracket
+        :param end: int. offset after the closing bracket
+        :param dtype: type. dict or list
+        """
+        self.index = index
+        self.start = start
+        self.end = end
+        self.dtype = dtype
+        self._container = None
+
+    def decode(self):
+        """
+        Decode the whole value
+
+        :return: dict or list. value
+        """
+        return self.index.decode(self.start, self.end)
+
+    def children(self):
+        """
+        Get the entries of the container as a pending children source,
+        see QJsonNode.fetchMore()
+
+        :return: QJsonSpanChildren. entries, None for an empty container
+        """
+        if self._container is None:
+            self._container = _SpanContainer(self)
+        children = QJsonSpanChildren(self._container)
+        if children.done:
+            return None
+        return children
+
+
+class _SpanContainer(object):
+    """
+    Byte offsets of the entries of a container, scanned on demand and shared
+    by every reader of the container
+    """
+    __slots__ = ('index', 'keyed', 'closing', 'end', 'position', 'closed',
+                 'keyStarts', 'keyEnds', 'starts', 'ends')
+
+    def __init__(self, span):
+        self.index = span.index
+        self.keyed = span.dtype is dict
+        self.closing = _CLOSING[span.dtype]
+        self.end = span.end
+        self.position = span.start + 1
+        self.closed = False
+        self.keyStarts = array('q')
+        self.keyEnds = array('q')
+        self.starts = array('q')
+        self.ends = array('q')
+
+        # an empty container is known to be empty right away
+        data = self.index._data
+        position = _WHITESPACE_BYTES.match(data, self.position).end()
+        if position < self.end and data[position] == self.closing:
+            self.position = position + 1
+            self.closed = True
+
+    def __len__(self):
+        """
+        Get the number of entries scanned so far
+        """
+        return len(self.starts)
+
+    def scan(self, count):
+        """
+        Record the offsets of the next entries. The bytes of the file are
+        scanned where they are mapped, nothing is decoded: strings and
+        scalars are matched by regular expressions and nested containers
+        are skipped by counting their brackets, see _skipValue()
+
+        :param count: int. maximum number of entries
+        :return: int. number of entries recorded
+        """
+        data = self.index._data
+        end = self.end
+        whitespace = _WHITESPACE_BYTES.match
+        skipValue = self._skipValue
+        keyed = self.keyed
+        closing = self.closing
+
+        found = 0
+        position = self.position
+        while found < count and not self.closed:
+            position = whitespace(data, position, end).end()
+            if keyed:
+                if position >= end or data[position] != _QUOTE:
+                    raise self._error('Expecting property name enclosed in double quotes', position)
+                keyStart = position
+                position = keyEnd = self._skipString(data, position, end)
+                position = whitespace(data, position, end).end()
+                if position >= end or data[position] != _COLON:
+                    raise self._error("Expecting ':' delimiter", position)
+                position = whitespace(data, position + 1, end).end()
+
+            valueStart = position
+            position = valueEnd = skipValue(data, position, end)
+            position = whitespace(data, position, end).end()
+            if position >= end:
+                raise self._error('Unexpected end of file', position)
+            char = data[position]
+            if char != _COMMA and char != closing:
+                raise self._error("Expecting ',' delimiter", position)
+
+            if keyed:
+                self.keyStarts.append(keyStart)
+                self.keyEnds.append(keyEnd)
+            self.starts.append(valueStart)
+            self.ends.append(valueEnd)
+            found += 1
+
+            position += 1
+            self.position = position
+            if char == closing:
+                self.closed = True
+        return found
+
+    def _skipValue(self, data, position, end):
+        """
+        Find the end of the value starting at an offset, without decoding
+        it. A nested container is skipped by counting its brackets; the
+        strings it holds, and the containers that are small and shallow
+        enough, are matched whole along with the text between them.
+
+        :param data: mmap. file content
+        :param position: int. offset of the first byte of the value
+        :param end: int. offset the value cannot reach
+        :return: int. offset after the value
+        """
+        if position >= end:
+            raise self._error('Expecting value', position)
+        char = data[position]
+        if char == _QUOTE:
+            return self._skipString(data, position, end)
+        if char not in _OPEN:
+            match = _SCALAR_BYTES.match(data, position, end)
+            if match is None:
+                raise self._error('Expecting value', position)
+            return match.end()
+
+        nested = _NESTED.match
+        content = _CONTENT.match
+        depth = 0
+        while True:
+            char = data[position]
+            if char in _OPEN:
+                match = nested(data, position, min(end, position + NESTED_WINDOW))
+                if match is None:
+                    depth += 1
+                    position += 1
+                elif depth:
+                    position = match.end()
+                else:
+                    return match.end()
+            elif char == _QUOTE:
+                # a string longer than the window
+                position = self._skipString(data, position, end)
+            elif char in _CLOSE:
+                depth -= 1
+                position += 1
+                if not depth:
+                    return position
+            position = content(data, position, min(end, position + NESTED_WINDOW)).end()
+            if position >= end:
+                raise self._error('Unexpected end of file', position)
+
+    def _skipString(self, data, position, end):
+        """
+        Find the end of the string starting at an offset
+
+        :param data: mmap. file content
+        :param position: int. offset of the opening quote
+        :param end: int. offset the string cannot reach
+        :return: int. offset after the closing quote
+        """
+        match = _STRING_BYTES.match(data, position, end)
+        if match is None:
+            raise self._error('Unterminated string starting at', position)
+        return match.end()
+
+    def _error(self, message, position):
+        return self.index._error(message, position)
+
+
+class QJsonSpanChildren(object):
+    """
+    Entries of an indexed container that have no child node yet, this is the
+    pending children source of QJsonNode for indexed files
+    """
+    __slots__ = ('_container', 'position')
+
+    def __init__(self, container, position=0):
+        """
+        Initialization
+
+        :param container: _SpanContainer. scanned container
+        :param position: int. number of entries already handed out
+        """
+        self._container = container
+        self.position = position
+
+    @property
+    def keyed(self):
+        """
+        Check whether the entries have keys (objects)
+        :return: bool.
+        """
+        return self._container.keyed
+
+    @property
+    def counted(self):
+        """
+        Check whether the container is scanned to its end, remaining is then
+        the exact number of entries left
+        :return: bool.
+        """
+        return self._container.closed
+
+    @property
+    def remaining(self):
+        """
+        Get the number of entries scanned but not handed out yet
+        :return: int.
+        """
+        return len(self._container) - self.position
+
+    @property
+    def done(self):
+        """
+        Check whether every entry has been handed out
+        :return: bool.
+        """
+        container = self._container
+        return container.closed and self.position >= len(container)
+
+    def available(self, count=None):
+        """
+        Get the number of entries the next take(count) hands out, scanning
+        the container as far as needed
+
+        :param count: int. maximum number of entries, None for all
+        :return: int.
+        """
+        container = self._container
+        if count is None:
+            while not container.closed:
+                container.scan(SCAN_BATCH)
+            return len(container) - self.position
+
+        missing = self.position + count - len(container)
+        if missing > 0 and not container.closed:
+            container.scan(missing)
+        return min(count, len(container) - self.position)
+
+    def take(self, count=None):
+        """
+        Hand out the next entries as (key, value) pairs, list entries have a
+        None key and containers are QJsonSpan values
+
+        :param count: int. maximum number of entries, None for all
+        :return: list of tuple. entries
+        """
+        container = self._container
+        index = container.index
+        value = index.value
+        start = self.position
+        end = start + self.available(count)
+        self.position = end
+
+        starts = container.starts
+        ends = container.ends
+        if not container.keyed:
+            return [(None, value(starts[i], ends[i])) for i in range(start, end)]
+
+        decode = index.decode
+        keyStarts = container.keyStarts
+        keyEnds = container.keyEnds
+        return [(decode(keyStarts[i], keyEnds[i]), value(starts[i], ends[i]))
+                for i in range(start, end)]
+
+    def rest(self):
+        """
+        Iterate over the decoded entries not handed out yet, without
+        consuming them
+
+        :return: iterator of tuple. (key, value) pairs
+        """
+        container = self._container
+        decode = container.index.decode
+        position = self.position
+        while True:
+            if position >= len(container):
+                if container.closed or not container.scan(SCAN_BATCH):
+                    return
+
+            key = None
+            if container.keyed:
+                key = decode(container.keyStarts[position], container.keyEnds[position])
+            yield key, decode(container.starts[position], container.ends[position])
+            position += 1
+
+    def copy(self):
+        """
+        Get an independent source of the same remaining entries
+
+        :return: QJsonSpanChildren. copy
+        """
+        return QJsonSpanChildren(self._container, self.position)
@@ -0,0 +1,356 @@
+"""
+The lines module reads JSON Lines (NDJSON) files: one JSON value per line,
+as written by log exports. The file is memory-mapped and scanned once to
+count its records, keeping only a checkpoint (byte offset, records before
+it) every CHECKPOINT_BYTES bytes, so the index stays a few kilobytes per
+gigabyte whatever the number of lines.
+
+Records are located from the nearest checkpoint when they are handed out to
+the tree and only decoded then; records holding a container are handed out
+as QJsonSpan values, scanned when they are expanded like indexed files.
+"""
+
+
+from array import array
+from bisect import bisect_right
+import codecs
+import json
+import os
+import re
+
+import qjsonfile
+from qjsonindex import QJsonFileIndex, QJsonSpan
+from qjsonstream import StreamCancelled
+
+
+# file extensions of JSON Lines documents
+EXTENSIONS = ('.jsonl', '.ndjson', '.ldjson')
+
+# bytes of the file scanned per checkpoint
+CHECKPOINT_BYTES = 256 * 1024
+
+# bytes first read from the start of a file to recognize JSON Lines content,
+# doubled until the first line ends, up to SNIFF_LIMIT bytes
+SNIFF_BYTES = 64 * 1024
+SNIFF_LIMIT = 16 * 1024 * 1024
+
+_BLANKS = b' \t\r'
+# line breaks followed by a blank line, a blank line at the start of a chunk
+# is checked on its own (searching for line starts is several times slower)
+_BEFORE_BLANK_LINE = re.compile(rb'\n(?=[ \t\r]*\n)')
+_BLANK_LINE = re.compile(rb'[ \t\r]*\n')
+_WHITESPACE = re.compile(r'[ \t\r]*')
+_BLANK_TEXT = re.compile(r'[ \t\r\n]*')
+
+
+def isJsonLinesPath(path):
+    """
+    Check whether a path has the extension of a JSON Lines file, compressed
+    or not
+
+    :param path: str. file path
+    :return: bool.
+    """
+    return os.path.splitext(qjsonfile.stripExtension(path))[1].lower() in EXTENSIONS
+
+
+def isJsonLines(path):
+    """
+    Check whether a file holds JSON Lines: by its extension, or by a first
+    line holding a whole JSON value followed by more content. A first line
+    longer than SNIFF_LIMIT is not recognized, see QJsonLoader for the
+    files read as one document that turn out to be JSON Lines
+
+    :param path: str. file path
+    :return: bool.
+    """
+    if isJsonLinesPath(path):
+        return True
+
+    decoder = codecs.getincrementaldecoder('utf-8')('replace')
+    text = ''
+    size = SNIFF_BYTES
+    total = 0
+    try:
+        with qjsonfile.QJsonInput(path) as f:
+            # read until the first line ends and more content follows it
+            while True:
+                chunk = f.read(size)
+                total += len(chunk)
+                text += decoder.decode(chunk, not chunk)
+                start = len(text) - len(text.lstrip('\ufeff \t\r\n'))
+                firstLine = text.find('\n', start)
+                if firstLine >= 0 and _BLANK_TEXT.match(text, firstLine).end() < len(text):
+                    break
+                if not chunk or total >= SNIFF_LIMIT:
+                    return False
+                size = min(total, SNIFF_LIMIT - total)
+    except (OSError, EOFError, ValueError):
+        # unreadable, or not the compressed data it seemed
+        return False
+    text = text[start:]
+    firstLine -= start
+
+    try:
+        _, end = json.JSONDecoder().raw_decode(text)
+    except ValueError:
+        return False
+    # a JSON document has nothing after its value, pretty-printed values
+    # span more than the first line
+    return _WHITESPACE.match(text, end).end() == firstLine
+
+
+class QJsonLinesIndex(QJsonFileIndex):
+    def __init__(self, path):
+        """
+        Initialization, map the file in memory, see build()
+
+        :param path: str. path of the JSON Lines file, it must not be empty
+        """
+        super(QJsonLinesIndex, self).__init__(path)
+        # byte offset of each checkpoint, always a line start
+        self._offsets = array('q')
+        # records before each checkpoint
+        self._counts = array('q')
+        self._count = 0
+        # (record, byte offset) of the line following the last record
+        # handed out, sequential reads go on from there
+        self._cursor = None
+
+    @property
+    def count(self):
+        """
+        Get the number of records, blank lines are not records
+        :return: int.
+        """
+        return self._count
+
+    def build(self, progress=None):
+        """
+        Scan the file once and record its checkpoints
+
+        :param progress: callable. called as progress(bytesRead, size) after
+                         each checkpoint, returning False cancels the scan
+                         with StreamCancelled
+        """
+        data = self._data
+        size = len(data)
+        offsets = array('q')
+        counts = array('q')
+        count = 0
+
+        # a byte order mark is not part of the first record
+        position = 3 if data[:3] == b'\xef\xbb\xbf' else 0
+        while position < size:
+            end = data.find(b'\n', position + CHECKPOINT_BYTES)
+            end = size if end < 0 else end + 1
+            chunk = data[position:end]
+
+            offsets.append(position)
+            counts.append(count)
+            lines = chunk.count(b'\n')
+            if not chunk.endswith(b'\n'):
+                # last line of the file without a line break
+                if chunk[chunk.rfind(b'\n') + 1:].strip(_BLANKS):
+                    lines += 1
+            lines -= len(_BEFORE_BLANK_LINE.findall(chunk))
+            if _BLANK_LINE.match(chunk):
+                lines -= 1
+            count += lines
+
+            position = end
+            if progress is not None and progress(position, size) is False:
+                raise StreamCancelled()
+
+        self._offsets = offsets
+        self._counts = counts
+        self._count = count
+        self._cursor = None
+
+    def root(self):
+        """
+        Override: get the records of the file as a list value
+
+        :return: QJsonLinesSpan. span of the whole file
+        """
+        return QJsonLinesSpan(self)
+
+    def records(self, first, last):
+        """
+        Iterate over the byte ranges of a run of records, whitespace around
+        the value excluded
+
+        :param first: int. number of the first record
+        :param last: int. number after the last record
+        :return: iterator of tuple. (start, end) offsets
+        """
+        data = self._data
+        size = len(data)
+        last = min(last, self._count)
+        if first >= last:
+            return
+
+        cursor = self._cursor
+        if cursor is not None and cursor[0] <= first and first - cursor[0] < 1000:
+            record, position = cursor
+        else:
+            checkpoint = bisect_right(self._counts, first) - 1
+            record = self._counts[checkpoint]
+            position = self._offsets[checkpoint]
+
+        while record < last and position < size:
+            end = data.find(b'\n', position)
+            if end < 0:
+                end = size
+            line = data[position:end]
+            stripped = line.strip(_BLANKS)
+            if stripped:
+                if record >= first:
+                    start = position + line.find(stripped[:1])
+                    yield start, start + len(stripped)
+                record += 1
+            position = end + 1
+            self._cursor = (record, position)
+
+    def value(self, start, end):
+        """
+        Override: get the record stored between two offsets
+
+        :param start: int. offset of the first byte of the record
+        :param end: int. offset after its last byte
+        :return: QJsonSpan or mixed. span of a container, decoded scalar value
+        """
+        try:
+            return super(QJsonLinesIndex, self).value(start, end)
+        except ValueError as e:
+            raise self._error(str(e), start)
+
+    def decode(self, start, end):
+        """
+        Override: decode the record stored between two offsets
+
+        :param start: int. offset of the first byte of the record
+        :param end: int. offset after its last byte
+        :return: mixed. decoded value
+        """
+        try:
+            return super(QJsonLinesIndex, self).decode(start, end)
+        except ValueError as e:
+            raise self._error(str(e), start)
+
+
+class QJsonLinesSpan(QJsonSpan):
+    """
+    Records of a JSON Lines file, seen as one list value
+    """
+    __slots__ = ()
+
+    def __init__(self, index):
+        """
+        Initialization
+
+        :param index: QJsonLinesIndex. built index of the file
+        """
+        super(QJsonLinesSpan, self).__init__(index, 0, len(index), list)
+
+    def decode(self):
+        """
+        Override: decode every record
+
+        :return: list. values
+        """
+        decode = self.index.decode
+        return [decode(start, end) for start, end in self.index.records(0, self.index.count)]
+
+    def children(self):
+        """
+        Override: get the records as a pending children source
+
+        :return: QJsonLinesChildren. records, None for a file without any
+        """
+        if not self.index.count:
+            return None
+        return QJsonLinesChildren(self.index)
+
+
+class QJsonLinesChildren(object):
+    """
+    Records of a JSON Lines file that have no child node yet, a pending
+    children source of QJsonNode, see QJsonSpanChildren
+    """
+    __slots__ = ('_index', 'position')
+    keyed = False
+    # the records are counted when the file is indexed
+    counted = True
+
+    def __init__(self, index, position=0):
+        """
+        Initialization
+
+        :param index: QJsonLinesIndex. built index of the file
+        :param position: int. number of records already handed out
+        """
+        self._index = index
+        self.position = position
+
+    @property
+    def remaining(self):
+        """
+        Get the number of records not handed out yet
+        :return: int.
+        """
+        return self._index.count - self.position
+
+    @property
+    def done(self):
+        """
+        Check whether every record has been handed out
+        :return: bool.
+        """
+        return self.position >= self._index.count
+
+    def available(self, count=None):
+        """
+        Get the number of records the next take(count) hands out
+
+        :param count: int. maximum number of records, None for all
+        :return: int.
+        """
+        if count is None:
+            return self.remaining
+        return min(count, self.remaining)
+
+    def take(self, count=None):
+        """
+        Hand out the next records as (None, value) pairs, containers are
+        QJsonSpan values
+
+        :param count: int. maximum number of records, None for all
+        :return: list of tuple. entries
+        """
+        index = self._index
+        value = index.value
+        start = self.position
+        end = start + self.available(count)
+        self.position = end
+        return [(None, value(first, last)) for first, last in index.records(start, end)]
+
+    def rest(self):
+        """
+        Iterate over the decoded records not handed out yet, without
+        consuming them
+
+        :return: iterator of tuple. (None, value) pairs
+        """
+        index = self._index
+        decode = index.decode
+        for start, end in index.records(self.position, index.count):
+            yield None, decode(start, end)
+
+    def copy(self):
+        """
+        Get an independent source of the same remaining records
+
+        :return: QJsonLinesChildren. copy
+        """
+        return QJsonLinesChildren(self._index, self.position)
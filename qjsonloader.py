@@ -0,0 +1,571 @@
+"""
+The loader module reads a JSON file on a worker thread: read, parse, build the
+tree and format the text for the Raw View. Progress is reported by signals and
+the loading can be cancelled between chunks and stages. Qt objects (models,
+widgets) are left to the GUI thread, the loader only returns plain data.
+
+Document profiles are computed in a child process watched by a worker thread,
+see QJsonProfiler. Documents are saved from a snapshot of the tree on a worker
+thread while the tree can still be edited, see QJsonSaver.
+"""
+
+
+import codecs
+import json
+import multiprocessing
+import os
+import queue
+
+from Qt import QtCore
+
+import qjsoncodec
+import qjsonprofile
+import qjsonstream
+import qjsonfile
+from qjsonfile import QJsonInput
+from qjsonindex import QJsonFileIndex
+from qjsonlines import QJsonLinesIndex
+from qjsonnode import QJsonNode
+from qjsonsnapshot import QJsonSnapshot
+from qjsonstore import QJsonStore
+from pagedTextView import TextLineIndex
+
+
+# files whose lines are longer than this on average (minified JSON) are
+# formatted for the Raw View, the others are shown as stored
+FORMATTED_LINE_BYTES = 200
+
+# how the file is turned into a tree
+MODE_FULL = 'full'      # parsed at once, tree built from the document
+MODE_STREAM = 'stream'  # parsed chunk by chunk, held in memory as a lazy tree
+MODE_INDEX = 'index'    # not parsed, entries read from the file on demand
+MODE_LINES = 'lines'    # JSON Lines, records read from the file on demand
+
+
+
+def _isNextLineError(error):
+    """
+    Check whether a document failed to parse because more content follows
+    its value on the next lines, as the records of JSON Lines
+
+    :param error: ValueError. parsing error
+    :return: bool.
+    """
+    if isinstance(error, qjsonstream.StreamExtraData):
+        return error.lineBreak
+    if isinstance(error, json.JSONDecodeError) and error.msg == 'Extra data':
+        doc = error.doc
+        position = error.pos
+        while position and doc[position - 1] in ' \t\r':
+            position -= 1
+        return '\n' in doc[max(0, position - 1):position]
+    return False
+
+
+class QJsonLoadResult(object):
+    """
+    Outcome of a successful load
+    """
+    def __init__(self, path, size, mode):
+        """
+        Initialization
+
+        :param path: str. path of the file
+        :param size: int. size of the file in bytes
+        :param mode: str. one of the MODE_ constants
+        """
+        self.path = path
+        self.size = size
+        self.mode = mode
+        # QJsonNode, or QJsonStore for the 'store' backend
+        self.root = None
+        # Raw View text, the beginning of the file for stream/index modes
+        self.text = ''
+        # TextLineIndex of the file when the Raw View pages it instead
+        self.lines = None
+        # parsed document, only kept for the full mode
+        self.data = None
+
+
+class QJsonLoader(QtCore.QThread):
+    # percentage, name of the current stage
+    progressChanged = QtCore.pyqtSignal(int, str)
+    # QJsonLoadResult
+    loaded = QtCore.pyqtSignal(object)
+    # error message
+    failed = QtCore.pyqtSignal(str)
+    # error message, the content is larger than the limit
+    tooLarge = QtCore.pyqtSignal(str)
+    cancelled = QtCore.pyqtSignal()
+
+    def __init__(self, path, size, mode, lazy=False, backend='node',
+                 previewBytes=2 * 1024 * 1024, paged=False, limit=None, parent=None):
+        """
+        Initialization
+
+        :param path: str. path of the file
+        :param size: int. size of the file in bytes
+        :param mode: str. one of the MODE_ constants
+        :param lazy: bool. create the children of the tree on demand
+        :param backend: str. 'node' or 'store'
+        :param previewBytes: int. bytes of text shown for stream/index modes
+        :param paged: bool. index the lines of the file for a paged Raw View
+                      instead of reading its text
+        :param limit: int. maximum size of the content parsed into memory,
+                      in bytes; the size of compressed content is only known
+                      once it is read. None for no limit
+        :param parent: QObject. owner of the thread
+        """
+        super(QJsonLoader, self).__init__(parent)
+        self._path = path
+        self._size = size
+        self._mode = mode
+        self._lazy = lazy
+        self._backend = backend
+        self._previewBytes = previewBytes
+        self._paged = paged
+        self._limit = limit
+
+    @property
+    def path(self):
+        """
+        Get the path of the file being loaded
+        """
+        return self._path
+
+    @property
+    def mode(self):
+        """
+        Get how the file is loaded, one of the MODE_ constants
+        """
+        return self._mode
+
+    @property
+    def size(self):
+        """
+        Get the size of the file in bytes
+        """
+        return self._size
+
+    def cancel(self):
+        """
+        Custom: ask the loading to stop at the next chunk or stage
+        """
+        self.requestInterruption()
+
+    def run(self):
+        """
+        Override: run the stages of the selected mode
+        """
+        result = QJsonLoadResult(self._path, self._size, self._mode)
+        try:
+            try:
+                self._loadMode(result)
+            except ValueError as e:
+                # JSON Lines whose first record is too long to be recognized
+                # before loading, see qjsonlines.isJsonLines()
+                if self._mode not in (MODE_FULL, MODE_STREAM) or not _isNextLineError(e):
+                    raise
+                self._mode = MODE_LINES
+                result = QJsonLoadResult(self._path, self._size, self._mode)
+                self._loadMode(result)
+            if isinstance(result.root, QJsonNode):
+                # the first snapshot walks the whole tree, the next ones only
+                # copy the path to an edit: it is taken here rather than on
+                # the GUI thread at the first edit, see QJsonView.pushHistory
+                self._checkpoint(96, 'Recording history')
+                result.root.snapshot()
+            if self._paged:
+                self._indexText(result)
+        except qjsonstream.StreamCancelled:
+            self.cancelled.emit()
+            return
+        except qjsonstream.StreamTooLarge as e:
+            self.tooLarge.emit(str(e))
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+
+        if self.isInterruptionRequested():
+            self.cancelled.emit()
+            return
+        self.progressChanged.emit(100, 'Done')
+        self.loaded.emit(result)
+
+    def _loadMode(self, result):
+        """
+        Run the stages of the selected mode, up to the tree
+
+        :param result: QJsonLoadResult. result being filled
+        """
+        if self._mode == MODE_INDEX:
+            self._loadIndex(result)
+        elif self._mode == MODE_LINES:
+            self._loadLines(result)
+        elif self._mode == MODE_STREAM:
+            self._loadStream(result)
+        else:
+            self._loadFull(result)
+
+    def _checkpoint(self, percent, stage):
+        """
+        Report the start of a stage, stopping if cancelled
+
+        :param percent: int. progress
+        :param stage: str. name of the stage
+        """
+        if self.isInterruptionRequested():
+            raise qjsonstream.StreamCancelled()
+        self.progressChanged.emit(percent, stage)
+
+    def _progress(self, first, last, stage, position=None):
+        """
+        Build a progress callback for qjsonstream.load mapping the bytes read
+        to a range of percentages
+
+        :param first: int. percentage at the start of the stage
+        :param last: int. percentage at its end
+        :param stage: str. name of the stage
+        :param position: callable. gives the bytes of the file read so far,
+                         for compressed files whose content is larger
+        :return: callable. callback
+        """
+        def progress(done, total):
+            if position is not None:
+                done = position()
+            if total:
+                self.progressChanged.emit(first + (last - first) * min(done, total) // total, stage)
+            return not self.isInterruptionRequested()
+        return progress
+
+    def _buildTree(self, result, data, lazy):
+        """
+        Create the tree of the selected backend
+
+        :param result: QJsonLoadResult. result being filled
+        :param data: mixed. parsed document
+        :param lazy: bool. create the children on demand
+        """
+        if self._backend == 'store':
+            result.root = QJsonStore.load(data)
+        else:
+            result.root = QJsonNode.load(data, lazy=lazy)
+
+    def _loadFull(self, result):
+        """
+        Parse the whole file, build the tree and format the text
+
+        :param result: QJsonLoadResult. result being filled
+        """
+        self._checkpoint(0, 'Reading')
+        if self._lazy:
+            # large documents are parsed in chunks so the thread holds the
+            # interpreter lock for short periods only and the GUI stays fluid
+            with QJsonInput(self._path) as f:
+                data = qjsonstream.load(f, self._size, self._progress(0, 80, 'Parsing', f.position),
+                                        limit=self._limit)
+        else:
+            chunks = []
+            length = 0
+            with QJsonInput(self._path) as f:
+                while True:
+                    chunk = f.read(qjsonstream.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    length += len(chunk)
+                    qjsonstream.checkLimit(length, self._limit)
+                    self._checkpoint(40 * min(f.position(), self._size) // max(1, self._size), 'Reading')
+            raw = b''.join(chunks)
+            del chunks
+
+            self._checkpoint(40, 'Parsing')
+            data = qjsoncodec.loads(raw)
+
+        self._checkpoint(80, 'Building tree')
+        self._buildTree(result, data, self._lazy)
+
+        self._checkpoint(90, 'Formatting text')
+        if self._paged:
+            # shown from the file, see _indexText()
+            pass
+        elif self._lazy:
+            # big documents are shown as stored, re-formatting costs about
+            # as much as parsing
+            with QJsonInput(self._path) as f:
+                result.text = f.read().decode('utf-8-sig')
+        else:
+            # a readable file is shown as stored, it is the text the tree was
+            # parsed from and formatting it again costs as much as parsing
+            try:
+                if raw.count(b'\n') * FORMATTED_LINE_BYTES >= len(raw):
+                    result.text = raw.decode('utf-8-sig')
+            except UnicodeDecodeError:
+                pass
+            if not result.text:
+                try:
+                    result.text = qjsoncodec.dumps(data)
+                except Exception:
+                    result.text = str(data)
+        result.data = data
+
+    def _loadStream(self, result):
+        """
+        Parse the file chunk by chunk into a lazily expanded tree, the whole
+        document is held in memory: content over the limit stops the loading
+
+        :param result: QJsonLoadResult. result being filled
+        """
+        with QJsonInput(self._path) as f:
+            data = qjsonstream.load(f, self._size, self._progress(0, 95, 'Parsing', f.position),
+                                    limit=self._limit)
+
+        self._checkpoint(95, 'Building tree')
+        self._buildTree(result, data, True)
+        if not self._paged:
+            result.text = self.preview()
+
+    def _loadIndex(self, result):
+        """
+        Map the file and create the top node of the tree
+
+        :param result: QJsonLoadResult. result being filled
+        """
+        if qjsonfile.compression(self._path) is not None:
+            # compressed content cannot be mapped
+            self._loadStream(result)
+            return
+
+        self._checkpoint(0, 'Indexing')
+        index = QJsonFileIndex(self._path)
+        result.root = QJsonNode.load(index.root(), lazy=True)
+        if not self._paged:
+            result.text = self.preview()
+
+    def _loadLines(self, result):
+        """
+        Index the records of a JSON Lines file and create the top node of the
+        tree, a list of the records
+
+        :param result: QJsonLoadResult. result being filled
+        """
+        self._checkpoint(0, 'Indexing lines')
+        if not self._size:
+            result.root = QJsonNode.load([])
+            return
+        if qjsonfile.compression(self._path) is not None:
+            self._loadLinesStream(result)
+            return
+
+        index = QJsonLinesIndex(self._path)
+        index.build(self._progress(0, 95, 'Indexing lines'))
+        result.root = QJsonNode.load(index.root(), lazy=True)
+        if not self._paged:
+            result.text = self.preview()
+
+    def _loadLinesStream(self, result):
+        """
+        Decode the records of a compressed JSON Lines file as it is read, it
+        cannot be mapped to read them on demand
+
+        :param result: QJsonLoadResult. result being filled
+        """
+        records = []
+        append = records.append
+        loads = qjsoncodec.loads
+        length = 0
+        # number of the next line, blank lines included
+        number = 1
+        with QJsonInput(self._path) as f:
+            progress = self._progress(0, 90, 'Reading lines', f.position)
+            first = True
+            while True:
+                lines = f.stream.readlines(qjsonstream.CHUNK_SIZE)
+                if not lines:
+                    break
+                length += sum(map(len, lines))
+                qjsonstream.checkLimit(length, self._limit)
+                if first:
+                    # the byte order mark, not any run of its bytes
+                    if lines[0].startswith(codecs.BOM_UTF8):
+                        lines[0] = lines[0][len(codecs.BOM_UTF8):]
+                    first = False
+                # each line is decoded on its own, as the index of
+                # uncompressed files does: a line holds exactly one value
+                for line in lines:
+                    if line.strip():
+                        try:
+                            append(loads(line))
+                        except ValueError as e:
+                            raise ValueError('Line {} of the file: {}'.format(number, e))
+                    number += 1
+                if progress(0, self._size) is False:
+                    raise qjsonstream.StreamCancelled()
+
+        self._checkpoint(90, 'Building tree')
+        self._buildTree(result, records, True)
+        if not self._paged:
+            result.text = self.preview()
+
+    def _indexText(self, result):
+        """
+        Index the lines of the file for the paged Raw View
+
+        :param result: QJsonLoadResult. result being filled
+        """
+        self._checkpoint(95, 'Indexing text')
+        lines = TextLineIndex(self._path)
+        if not lines.build(self._progress(95, 100, 'Indexing text')):
+            lines.close()
+            raise qjsonstream.StreamCancelled()
+        result.lines = lines
+
+    def preview(self):
+        """
+        Custom: read the beginning of the file as text
+
+        :return: str. text
+        """
+        with QJsonInput(self._path) as f:
+            chunk = f.read(self._previewBytes)
+        return chunk.decode('utf-8', errors='replace')
+
+
+class QJsonSaver(QtCore.QThread):
+    """
+    Write a snapshot of the tree to a file, the tree keeps being edited on
+    the GUI thread meanwhile
+    """
+    # path of the written file
+    saved = QtCore.pyqtSignal(str)
+    # error message
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, snapshot, path, lines=False, parent=None):
+        """
+        Initialization
+
+        :param snapshot: QJsonSnapshot or mixed. snapshot of the root, see
+                         QJsonModel.snapshot()
+        :param path: str. path of the file, compressed according to its
+                     extension
+        :param lines: bool. write the elements of the top-level list as JSON
+                      Lines
+        :param parent: QObject. owner of the thread
+        """
+        super(QJsonSaver, self).__init__(parent)
+        self._snapshot = snapshot
+        self._path = path
+        self._lines = lines
+
+    @property
+    def path(self):
+        """
+        Get the path of the file being written
+        """
+        return self._path
+
+    def run(self):
+        """
+        Override: write the snapshot next to the file, then replace the file
+        so it is never left half written
+        """
+        target = self._path + '.tmp'
+        try:
+            with qjsonfile.openOutput(self._path, target) as f:
+                snapshot = self._snapshot
+                if isinstance(snapshot, QJsonSnapshot):
+                    if self._lines:
+                        snapshot.dumpLines(f)
+                    else:
+                        snapshot.dump(f)
+                else:
+                    # a scalar document
+                    f.write(qjsoncodec.dumps(snapshot))
+                    if self._lines:
+                        f.write('\n')
+            os.replace(target, self._path)
+        except Exception as e:
+            try:
+                os.remove(target)
+            except OSError:
+                pass
+            self.failed.emit(str(e))
+            return
+        self.saved.emit(self._path)
+
+
+class QJsonProfiler(QtCore.QThread):
+    """
+    Profile a file in a child process, see qjsonprofile, and relay its
+    reports as signals; cancelling terminates the process
+    """
+    # percentage, name of the current stage
+    progressChanged = QtCore.pyqtSignal(int, str)
+    # profile as a dict, see QJsonProfile.asDict()
+    profiled = QtCore.pyqtSignal(object)
+    # error message
+    failed = QtCore.pyqtSignal(str)
+    cancelled = QtCore.pyqtSignal()
+
+    def __init__(self, path, parent=None):
+        """
+        Initialization
+
+        :param path: str. path of the file
+        :param parent: QObject. owner of the thread
+        """
+        super(QJsonProfiler, self).__init__(parent)
+        self._path = path
+
+    @property
+    def path(self):
+        """
+        Get the path of the file being profiled
+        """
+        return self._path
+
+    def cancel(self):
+        """
+        Custom: ask the profiling to stop, the process is terminated
+        """
+        self.requestInterruption()
+
+    def run(self):
+        """
+        Override: start the process and wait for its messages
+        """
+        # a forked copy of a process running Qt threads is not safe
+        context = multiprocessing.get_context('spawn')
+        messages = context.Queue(maxsize=100)
+        process = context.Process(target=qjsonprofile.run, args=(self._path, messages), daemon=True)
+        process.start()
+        try:
+            while True:
+                if self.isInterruptionRequested():
+                    self.cancelled.emit()
+                    return
+                try:
+                    message = messages.get(timeout=0.1)
+                except queue.Empty:
+                    if not process.is_alive() and messages.empty():
+                        self.failed.emit('The profiling process stopped unexpectedly')
+                        return
+                    continue
+
+                if message[0] == 'progress':
+                    done, total = message[1:]
+                    if total:
+                        self.progressChanged.emit(100 * min(done, total) // total, 'Profiling')
+                elif message[0] == 'done':
+                    self.progressChanged.emit(100, 'Done')
+                    self.profiled.emit(message[1])
+                    return
+                else:
+                    self.failed.emit(message[1])
+                    return
+        finally:
+            if process.is_alive():
+                process.terminate()
+            process.join()
@@ -4,14 +4,35 @@ and providing functionalities to manipulate QJsonNode objects within the model
 """
 
 
+from bisect import bisect_left
+import re
+
 from Qt import QtWidgets, QtCore, QtGui
 
-from qjsonnode import QJsonNode
+import qjsoncodec
+from qjsonnode import QJsonNode, displayText
+from qjsonsnapshot import QJsonSnapshot
+from qjsonstore import QJsonStore
+
+
+# size hint of every row, the view has uniform row heights
+_ROW_SIZE = QtCore.QSize(-1, 22)
 
 
 class QJsonModel(QtCore.QAbstractItemModel):
     sortRole = QtCore.Qt.UserRole
     filterRole = QtCore.Qt.UserRole + 1
+    # number of children created per fetchMore() on lazily loaded nodes
+    fetchBatchSize = 1000
+    # whether entries can be added, removed and moved
+    structureEditable = True
+    # whether sort() orders the rows, see QJsonFilterProxyModel.sort()
+    sortsRows = True
+    # row ranges announced one by one by a batch edit, more are announced
+    # as a single layout change
+    batchRangeLimit = 32
+    # indices kept per column before the cache starts over
+    indexCacheSize = 200000
 
     def __init__(self, root, parent=None):
         """
@@ -21,6 +42,18 @@ class QJsonModel(QtCore.QAbstractItemModel):
         """
         super(QJsonModel, self).__init__(parent)
         self._rootNode = root
+        # QJsonSourceMap of the Raw View text, dropped when rows change
+        self._sourceMap = None
+        # index of each node handed out so far, one dict per column; views
+        # ask for the same indices and parents over and over, and the rows
+        # they hold only change when rows are removed or the tree replaced
+        self._indexes = ({}, {})
+        # column the rows are sorted by, -1 for the document order
+        self._sortColumn = -1
+        self._sortReverse = False
+        # _ChildOrder of each container whose rows were asked for while
+        # sorted, kept up to date as its children change
+        self._orders = {}
 
     def rowCount(self, parent=QtCore.QModelIndex()):
         """
@@ -33,6 +66,64 @@ class QJsonModel(QtCore.QAbstractItemModel):
 
         return parentNode.childCount
 
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        """
+        Override: lazily loaded containers have children before they are fetched
+        """
+        parentNode = self.getNode(parent)
+        return parentNode.childCount > 0 or parentNode.canFetchMore()
+
+    def canFetchMore(self, parent):
+        """
+        Override
+        """
+        return self.getNode(parent).canFetchMore()
+
+    def fetchMore(self, parent):
+        """
+        Override: create the next page of children of a lazily loaded node
+        """
+        self._fetch(parent, self.fetchBatchSize)
+
+    def _fetch(self, parent, count=None):
+        """
+        Custom: create pending children of the specified index
+
+        :param parent: QModelIndex. parent index
+        :param count: int. maximum number of children, None for all
+        """
+        parentNode = self.getNode(parent)
+        pending = parentNode.fetchCount(count)
+        if not pending:
+            return
+
+        self._appendRows(parent, parentNode, pending, lambda: parentNode.fetchMore(pending))
+
+    def _appendRows(self, parent, parentNode, count, append):
+        """
+        Custom: announce rows appended to a container, the rows where they
+        land so the row positions kept by the nodes match what the view
+        expects. Sorted rows are shown last, then sorted again with one
+        layout change
+
+        :param parent: QModelIndex. parent index
+        :param parentNode: QJsonNode. node of the parent index
+        :param count: int. number of children appended
+        :param append: callable. appends the children
+        """
+        first = parentNode.childCount
+        self.beginInsertRows(parent, first, first + count - 1)
+        append()
+        # looked up once the rows are appended: a listener of the insertion
+        # may have built the order of the container for the previous rows
+        order = self._orders.get(parentNode)
+        if order is not None:
+            order.extend(count)
+        self.endInsertRows()
+
+        if order is not None:
+            self._sortChildren(parentNode)
+
     def columnCount(self, parent=QtCore.QModelIndex()):
         """
         Override
@@ -49,7 +140,7 @@ class QJsonModel(QtCore.QAbstractItemModel):
             if index.column() == 0:
                 return node.key
             elif index.column() == 1:
-                return node.value
+                return node.displayValue()
 
         elif role == QtCore.Qt.EditRole:
             if index.column() == 0:
@@ -64,7 +155,7 @@ class QJsonModel(QtCore.QAbstractItemModel):
             return node.key
 
         elif role == QtCore.Qt.SizeHintRole:
-            return QtCore.QSize(-1, 22)
+            return _ROW_SIZE
 
     def setData(self, index, value, role):
         """
@@ -75,13 +166,15 @@ class QJsonModel(QtCore.QAbstractItemModel):
         if role == QtCore.Qt.EditRole:
             if index.column() == 0:
                 node.key = value
-                self.dataChanged.emit(index, index)
-                return True
-
-            if index.column() == 1:
+            elif index.column() == 1:
                 node.value = value
-                self.dataChanged.emit(index, index)
-                return True
+            else:
+                return False
+
+            self.dataChanged.emit(index, index)
+            if index.column() == self._sortColumn:
+                self._sortChildren(node.parent, node.row())
+            return True
 
         return False
 
@@ -107,72 +200,252 @@ class QJsonModel(QtCore.QAbstractItemModel):
 
     def index(self, row, column, parent=QtCore.QModelIndex()):
         """
-        Override
+        Override: indices are cached, bounds are checked here rather than
+        with hasIndex(), which calls back rowCount() and columnCount()
         """
-        if not self.hasIndex(row, column, parent):
+        parentNode = parent.internalPointer() if parent.isValid() else self._rootNode
+        if row < 0 or column < 0 or column > 1 or row >= parentNode.childCount:
             return QtCore.QModelIndex()
 
-        parentNode = self.getNode(parent)
-        currentNode = parentNode.child(row)
-        if currentNode:
-            return self.createIndex(row, column, currentNode)
+        if self._sortColumn < 0:
+            currentNode = parentNode.child(row)
         else:
-            return QtCore.QModelIndex()
+            currentNode = parentNode.child(self._order(parentNode).rows[row])
+        return self._index(currentNode, column, row)
 
     def parent(self, index):
         """
-        Override
+        Override: the index of the parent comes from the cache
         """
-        currentNode = self.getNode(index)
-        parentNode = currentNode.parent
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        parentNode = index.internalPointer().parent
 
-        if parentNode == self._rootNode:
+        if parentNode is self._rootNode or parentNode is None:
             return QtCore.QModelIndex()
 
-        return self.createIndex(parentNode.row(), 0, parentNode)
+        return self._index(parentNode, 0)
+
+    def _index(self, node, column, row=None):
+        """
+        Custom: get the cached index of a node, created on first use
+
+        :param node: QJsonNode. node below the root
+        :param column: int. column of the index
+        :param row: int. row of the node, if known
+        :return: QModelIndex. index
+        """
+        cache = self._indexes[column]
+        index = cache.get(node)
+        if index is None:
+            if len(cache) >= self.indexCacheSize:
+                cache.clear()
+            if row is None:
+                row = node.row()
+                if self._sortColumn >= 0:
+                    row = self._order(node.parent).position(row)
+            index = cache[node] = self.createIndex(row, column, node)
+        return index
+
+    def _clearIndexes(self):
+        """
+        Custom: forget the cached indices, the rows of nodes changed
+        """
+        for cache in self._indexes:
+            cache.clear()
 
     def addChildren(self, children, parent=QtCore.QModelIndex()):
         """
         Custom: add children QJsonNode to the specified index
         """
-        self.beginInsertRows(parent, 0, len(children) - 1)
+        if not children:
+            return False
 
         if parent == QtCore.QModelIndex():
             parentNode = self._rootNode
         else:
             parentNode = parent.internalPointer()
 
+        self._sourceMap = None
+        # nodes taken from elsewhere in the tree change rows
+        self._clearIndexes()
+
+        if parentNode.canFetchMore():
+            # new children go after the ones a lazily loaded node has not
+            # created yet, they become rows when the node is fetched to its
+            # end; only the summary of the node changes
+            parentNode.addChildren(children)
+            if parent.isValid():
+                valueIndex = self._index(parentNode, 1)
+                self.dataChanged.emit(valueIndex, valueIndex)
+            return True
+
+        order = self._orders.get(parentNode)
+        if order is None or len(children) > self.batchRangeLimit:
+            self._appendRows(parent, parentNode, len(children), lambda: parentNode.addChildren(children))
+            return True
+
+        # a few sorted rows: each child is announced at its place in the
+        # order, the other rows keep theirs instead of being sorted again
+        keyOf = self._sortKey()
         for child in children:
+            key = None if order.keys is None else keyOf(child)
+            position = order.insertPosition(key)
+            self.beginInsertRows(parent, position, position)
             parentNode.addChild(child)
-
-        self.endInsertRows()
+            order.append(position, key)
+            self._clearIndexes()
+            self.endInsertRows()
         return True
 
     def removeChild(self, position, parent=QtCore.QModelIndex()):
         """
         Custom: remove child of position for the specified index
+
+        :param position: int. row of the child in the document order
         """
-        self.beginRemoveRows(parent, position, position)
+        parentNode = self.getNode(parent)
+        return self.removeIndices([self._index(parentNode.child(position), 0)])
 
-        if parent == QtCore.QModelIndex():
-            parentNode = self._rootNode
-        else:
-            parentNode = parent.internalPointer()
+    def removeIndices(self, indices):
+        """
+        Custom: remove the nodes of several indices as one edit. The rows of
+        each parent are grouped into contiguous ranges, announced and removed
+        from the last one up so the others do not move; beyond
+        batchRangeLimit ranges, every node is removed at once and announced
+        as one layout change. Descendants of removed nodes go with them.
+
+        :param indices: list of QModelIndex. indices to remove
+        :return: bool. whether anything was removed
+        """
+        nodes = {index.internalPointer() for index in indices if index.isValid()}
+        # rows to remove by parent
+        groups = dict()
+        for node in nodes:
+            ancestor = node.parent
+            while ancestor is not None and ancestor is not self._rootNode and ancestor not in nodes:
+                ancestor = ancestor.parent
+            if ancestor is self._rootNode:
+                groups.setdefault(node.parent, []).append(node.row())
+        if not groups:
+            return False
 
-        parentNode.removeChild(position)
+        self._sourceMap = None
+        ranges = []
+        for parentNode, rows in groups.items():
+            order = self._orders.get(parentNode)
+            positions = sorted(rows if order is None else map(order.position, rows))
+            first = last = positions[0]
+            for position in positions[1:]:
+                if position != last + 1:
+                    ranges.append((parentNode, first, last))
+                    first = position
+                last = position
+            ranges.append((parentNode, first, last))
 
-        self.endRemoveRows()
+        if len(ranges) > self.batchRangeLimit:
+            self._removeGroups(groups)
+            return True
+
+        for parentNode, first, last in reversed(ranges):
+            parent = QtCore.QModelIndex() if parentNode is self._rootNode else self._index(parentNode, 0)
+            order = self._orders.get(parentNode)
+            if order is None:
+                rows = range(first, last + 1)
+            else:
+                rows = order.rows[first:last + 1]
+
+            self.beginRemoveRows(parent, first, last)
+            parentNode.removeChildren(rows)
+            if order is not None:
+                order.removeRows(rows)
+            # the following siblings move up
+            self._clearIndexes()
+            self.endRemoveRows()
         return True
 
+    def _removeGroups(self, groups):
+        """
+        Custom: remove rows of several parents at once, announced as one
+        layout change
+
+        :param groups: dict. rows in the document order by parent node
+        """
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        nodes = [(index.internalPointer(), index.column()) for index in persistent]
+
+        for parentNode, rows in groups.items():
+            parentNode.removeChildren(rows)
+            order = self._orders.get(parentNode)
+            if order is not None:
+                order.removeRows(rows)
+        self._clearIndexes()
+
+        self.changePersistentIndexList(
+            persistent, [self._index(node, column) if self._contains(node) else QtCore.QModelIndex()
+                         for node, column in nodes])
+        self.layoutChanged.emit()
+
+    def _contains(self, node):
+        """
+        Custom: check whether a node is still in the tree
+
+        :param node: QJsonNode. node
+        :return: bool.
+        """
+        while node is not None:
+            if node is self._rootNode:
+                return True
+            node = node.parent
+        return False
+
     def clear(self):
         """
         Custom: clear the model data
         """
         self.beginResetModel()
         self._rootNode = QJsonNode()
+        self._sourceMap = None
+        self._clearIndexes()
+        self._orders.clear()
         self.endResetModel()
         return True
 
+    def setRootNode(self, root):
+        """
+        Custom: replace the whole tree of the model
+
+        :param root: QJsonNode. new root node, it is hidden
+        """
+        self.beginResetModel()
+        self._rootNode = root
+        self._sourceMap = None
+        self._clearIndexes()
+        self._orders.clear()
+        self.endResetModel()
+
+    def snapshot(self):
+        """
+        Custom: take an immutable snapshot of the whole tree, cheap enough to
+        take before every edit and safe to read from other threads
+
+        :return: QJsonSnapshot. snapshot of the root
+        """
+        return self._rootNode.snapshot()
+
+    def restore(self, snapshot):
+        """
+        Custom: replace the whole tree with the content of a snapshot
+
+        :param snapshot: QJsonSnapshot. snapshot taken with snapshot()
+        """
+        if isinstance(snapshot, QJsonSnapshot):
+            root = QJsonNode.fromSnapshot(snapshot)
+        else:
+            root = QJsonNode.load(snapshot)
+        self.setRootNode(root)
+
     def getNode(self, index):
         """
         Custom: get QJsonNode from model index
@@ -185,6 +458,15 @@ class QJsonModel(QtCore.QAbstractItemModel):
                 return currentNode
         return self._rootNode
 
+    def dataType(self, index):
+        """
+        Custom: get the value data type of the specified index
+
+        :param index: QModelIndex. specified index
+        :return: type.
+        """
+        return self.getNode(index).dtype
+
     def asDict(self, index=QtCore.QModelIndex()):
         """
         Custom: serialize specified index to dictionary
@@ -200,3 +482,640 @@ class QJsonModel(QtCore.QAbstractItemModel):
             return next(iter(d.values()), None)
 
         return node.asDict()
+
+    def toJson(self, index=QtCore.QModelIndex(), indent=4):
+        """
+        Custom: serialize the value of specified index to JSON text
+        if no index is specified, the whole model will be serialized.
+        Text of unchanged subtrees is cached by the nodes, edits through the
+        model only invalidate the path to the root
+
+        :param index: QModelIndex. specified index
+        :param indent: int. indentation width, None for compact output
+        :return: str. JSON text
+        """
+        return self.getNode(index).toJson(indent)
+
+    def dump(self, fp, index=QtCore.QModelIndex(), indent=4, sortKeys=False):
+        """
+        Custom: stream the value of specified index as JSON text to a file,
+        if no index is specified, the whole model will be written
+
+        :param fp: file. text file object opened for writing
+        :param index: QModelIndex. specified index
+        :param indent: int. indentation width, None for compact output
+        :param sortKeys: bool. sort object keys
+        """
+        self.getNode(index).dump(fp, indent, sortKeys)
+
+    def dumpLines(self, fp, index=QtCore.QModelIndex()):
+        """
+        Custom: write the elements of the list at specified index as JSON
+        Lines, if no index is specified, the whole model will be written
+
+        :param fp: file. text file object opened for writing
+        :param index: QModelIndex. specified index
+        """
+        self.getNode(index).dumpLines(fp)
+
+    def sourceMap(self):
+        """
+        Custom: get the map of the rows to the Raw View text, it is dropped
+        when rows are added or removed (edited keys and values keep their
+        rows)
+
+        :return: QJsonSourceMap. map, None if there is none
+        """
+        return self._sourceMap
+
+    def setSourceMap(self, sourceMap):
+        """
+        Custom: set the map of the rows to the Raw View text
+
+        :param sourceMap: QJsonSourceMap. map of the current text
+        """
+        self._sourceMap = sourceMap
+
+    def indexPath(self, index):
+        """
+        Custom: get the rows leading from the root to an index
+
+        :param index: QModelIndex. specified index
+        :return: tuple of int. rows, empty for the root
+        """
+        path = []
+        while index.isValid():
+            path.append(index.internalPointer().row())
+            index = index.parent()
+        return tuple(reversed(path))
+
+    def pathIndex(self, path):
+        """
+        Custom: get the index at the end of a path of rows, children of lazily
+        loaded nodes are created as far as needed
+
+        :param path: sequence of int. rows from the root in the document
+                     order, see indexPath()
+        :return: QModelIndex. index, invalid if the path does not exist
+        """
+        index = QtCore.QModelIndex()
+        for row in path:
+            node = self.getNode(index)
+            if row >= node.childCount:
+                self._fetch(index, row + 1 - node.childCount)
+            if row < 0 or row >= node.childCount:
+                return QtCore.QModelIndex()
+            index = self._index(node.child(row), 0)
+        return index
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        """
+        Override: show the rows of every container sorted by key (column 0)
+        or value (column 1), a column of -1 restores the document order.
+        The order of a container is computed the first time its rows are
+        asked for and kept until its children change, so edits only sort
+        the container they touch again
+
+        :param column: int. sort column
+        :param order: Qt.SortOrder. sort order
+        """
+        column = column if column in (0, 1) else -1
+        reverse = column >= 0 and order == QtCore.Qt.DescendingOrder
+        if column == self._sortColumn and reverse == self._sortReverse:
+            return
+
+        # rows only move, see QJsonFilterProxyModel._onLayoutChanged()
+        self.layoutAboutToBeChanged.emit([], QtCore.QAbstractItemModel.VerticalSortHint)
+        persistent = self.persistentIndexList()
+        nodes = [(index.internalPointer(), index.column()) for index in persistent]
+        self._sortColumn = column
+        self._sortReverse = reverse
+        self._orders.clear()
+        self._clearIndexes()
+        self.changePersistentIndexList(persistent, [self._index(node, column) for node, column in nodes])
+        self.layoutChanged.emit([], QtCore.QAbstractItemModel.VerticalSortHint)
+
+    def _sortChildren(self, parentNode, changed=None):
+        """
+        Custom: sort the rows of one container again after its children
+        changed, the rows are mostly in order already and are sorted in
+        linear time
+
+        :param parentNode: QJsonNode. container
+        :param changed: int. row of a child whose key or value changed
+        """
+        order = self._orders.get(parentNode)
+        if order is None:
+            return
+        if order.keys is not None:
+            keyOf = self._sortKey()
+            children = parentNode.children
+            if changed is not None:
+                order.keys[changed] = keyOf(children[changed])
+            # appended children
+            order.keys.extend(map(keyOf, children[len(order.keys):]))
+
+        self.layoutAboutToBeChanged.emit([], QtCore.QAbstractItemModel.VerticalSortHint)
+        persistent = self.persistentIndexList()
+        nodes = [(index.internalPointer(), index.column()) for index in persistent]
+        order.sort()
+        self._clearIndexes()
+        self.changePersistentIndexList(persistent, [self._index(node, column) for node, column in nodes])
+        self.layoutChanged.emit([], QtCore.QAbstractItemModel.VerticalSortHint)
+
+    def _sortKey(self):
+        """
+        Custom: get the function giving the sort key of a node
+        :return: callable.
+        """
+        return _nodeKey if self._sortColumn == 0 else _valueKey
+
+    def documentRows(self, parent, first, last):
+        """
+        Custom: get the rows in the document order of a range of displayed
+        rows, e.g. of rows announced as inserted while the rows are sorted
+
+        :param parent: QModelIndex. parent index
+        :param first: int. first displayed row
+        :param last: int. last displayed row
+        :return: list of int. rows of the children, in the document order
+        """
+        order = self._orders.get(self.getNode(parent))
+        if order is None:
+            return list(range(first, last + 1))
+        return sorted(order.rows[first:last + 1])
+
+    def _order(self, parentNode):
+        """
+        Custom: get the sorted order of the children of a container
+
+        :param parentNode: QJsonNode. container
+        :return: _ChildOrder. order
+        """
+        order = self._orders.get(parentNode)
+        if order is None:
+            if self._sortColumn == 0 and parentNode.dtype == list:
+                # list elements are labelled by their row
+                keys = None
+            else:
+                keys = list(map(self._sortKey(), parentNode.children))
+            order = self._orders[parentNode] = _ChildOrder(keys, parentNode.childCount, self._sortReverse)
+        return order
+
+
+class _ChildOrder(object):
+    """
+    Display order of the children of a container sorted by QJsonModel
+    """
+    __slots__ = ('rows', 'keys', 'reverse', '_positions')
+
+    def __init__(self, keys, count, reverse):
+        """
+        Initialization, sort the children
+
+        :param keys: list. sort key of each child, None to sort by row
+        :param count: int. number of children
+        :param reverse: bool. descending order
+        """
+        self.keys = keys
+        self.reverse = reverse
+        # document rows in display order
+        self.rows = list(range(count))
+        # display row of each document row, built when first asked for
+        self._positions = None
+        self.sort()
+
+    def sort(self):
+        """
+        Sort the rows, rows already in order are sorted in linear time and
+        equal keys keep the document order
+        """
+        if self.keys is None:
+            self.rows.sort(reverse=self.reverse)
+        else:
+            self.rows.sort(key=self.keys.__getitem__, reverse=self.reverse)
+        self._positions = None
+
+    def position(self, row):
+        """
+        Get the display row of a child
+
+        :param row: int. row of the child in the document order
+        :return: int. display row
+        """
+        positions = self._positions
+        if positions is None:
+            positions = self._positions = [0] * len(self.rows)
+            for position, other in enumerate(self.rows):
+                positions[other] = position
+        return positions[row]
+
+    def insertPosition(self, key):
+        """
+        Get the display row of a child appended to the container, after the
+        children with the same key
+
+        :param key: mixed. sort key of the child, None when sorted by row
+        :return: int. display row
+        """
+        rows = self.rows
+        if self.keys is None:
+            return 0 if self.reverse else len(rows)
+
+        keys = self.keys
+        reverse = self.reverse
+        low, high = 0, len(rows)
+        while low < high:
+            middle = (low + high) // 2
+            other = keys[rows[middle]]
+            if (other >= key) if reverse else (other <= key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def append(self, position, key):
+        """
+        Record a child appended to the container
+
+        :param position: int. its display row, see insertPosition()
+        :param key: mixed. its sort key
+        """
+        self.rows.insert(position, len(self.rows))
+        if self.keys is not None:
+            self.keys.append(key)
+        self._positions = None
+
+    def extend(self, count):
+        """
+        Record children appended to the container and shown last, their
+        keys are added before the next sort()
+
+        :param count: int. number of children
+        """
+        rows = self.rows
+        rows.extend(range(len(rows), len(rows) + count))
+        self._positions = None
+
+    def removeRows(self, rows):
+        """
+        Record the removal of children, the others keep their order
+
+        :param rows: iterable of int. rows of the children in the document
+                     order
+        """
+        removed = sorted(rows)
+        gone = set(removed)
+        # the following children in the document move up
+        self.rows = [other - bisect_left(removed, other) for other in self.rows if other not in gone]
+        if self.keys is not None:
+            self.keys = [key for row, key in enumerate(self.keys) if row not in gone]
+        self._positions = None
+
+
+_DIGITS = re.compile(r'[0-9]+')
+
+# rank of the types when sorting by value, numbers first
+_VALUE_RANKS = {int: 0, float: 0, str: 1, bool: 2, type(None): 3}
+
+
+def _naturalKey(text):
+    """
+    Get a case-insensitive sort key of a text where runs of digits compare as
+    numbers, 'item2' comes before 'item10'. The key is a string, so that the
+    sort compares keys at C speed
+
+    :param text: str. text
+    :return: str. key
+    """
+    return _DIGITS.sub(_numberKey, text.casefold())
+
+
+def _numberKey(match):
+    # a marker, the number of digits, then the digits: shorter numbers
+    # come first, and numbers come before text
+    digits = match.group().lstrip('0') or '0'
+    return '\x01' + chr(len(digits)) + digits
+
+
+def _nodeKey(node):
+    """
+    Get the sort key of the key of a node
+
+    :param node: QJsonNode. node
+    :return: str. key
+    """
+    return _naturalKey(str(node.key))
+
+
+def _valueKey(node):
+    """
+    Get the sort key of the value of a node, values are grouped by type
+
+    :param node: QJsonNode. node
+    :return: tuple. key
+    """
+    rank = _VALUE_RANKS.get(node.dtype, 4)
+    if rank == 0:
+        return rank, node.value
+    if rank == 1:
+        return rank, _naturalKey(str(node.value))
+    if rank == 2:
+        return rank, int(node.value)
+    if rank == 3:
+        return rank, 0
+    # containers by number of children
+    return rank, node.childCount
+
+
+class QJsonStoreModel(QtCore.QAbstractItemModel):
+    """
+    Read-mostly model over a QJsonStore, model indices carry integer node ids
+    instead of QJsonNode objects. Keys and values can be edited, the structure
+    cannot.
+    """
+    sortRole = QJsonModel.sortRole
+    filterRole = QJsonModel.filterRole
+    structureEditable = False
+    # rows are sorted by the proxy model
+    sortsRows = False
+
+    def __init__(self, store, parent=None):
+        """
+        Initialization
+
+        :param store: QJsonStore. document store, its root is hidden
+        """
+        super(QJsonStoreModel, self).__init__(parent)
+        self._store = store
+        # QJsonSourceMap of the Raw View text, the structure does not change
+        self._sourceMap = None
+        # display value of the containers and long strings shown so far
+        self._display = dict()
+
+    def _createIndex(self, row, column, node):
+        # an int is kept as the internal id of the index, not as a pointer
+        # to a python object that would have to be kept alive
+        return self.createIndex(row, column, node)
+
+    def getNode(self, index):
+        """
+        Custom: get the node id from model index
+
+        :param index: QModelIndex. specified index
+        :return: int. node id, 0 (root) for an invalid index
+        """
+        if index.isValid():
+            return index.internalId()
+        return 0
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        """
+        Override
+        """
+        if parent.column() > 0:
+            return 0
+        return self._store.childCount(self.getNode(parent))
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        """
+        Override
+        """
+        return 2
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        """
+        Override
+        """
+        parentNode = self.getNode(parent)
+        if row < 0 or column < 0 or column > 1 or row >= self._store.childCount(parentNode):
+            return QtCore.QModelIndex()
+        return self._createIndex(row, column, self._store.child(parentNode, row))
+
+    def parent(self, index):
+        """
+        Override
+        """
+        if not index.isValid():
+            return QtCore.QModelIndex()
+
+        parentNode = self._store.parent(self.getNode(index))
+        if parentNode <= 0:
+            return QtCore.QModelIndex()
+        return self._createIndex(self._store.row(parentNode), 0, parentNode)
+
+    def data(self, index, role):
+        """
+        Override
+        """
+        node = self.getNode(index)
+
+        if role == QtCore.Qt.DisplayRole and index.column() == 1:
+            return self._displayValue(node)
+
+        elif role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            if index.column() == 0:
+                return self._store.key(node)
+            elif index.column() == 1:
+                return self._store.value(node)
+
+        elif role in (QJsonModel.sortRole, QJsonModel.filterRole):
+            return self._store.key(node)
+
+        elif role == QtCore.Qt.SizeHintRole:
+            return _ROW_SIZE
+
+    def _displayValue(self, node):
+        """
+        Custom: get the text shown for the value of a node, see displayText(),
+        summaries and cut strings are cached until the value is set
+
+        :param node: int. node id
+        :return: mixed. display value
+        """
+        text = self._display.get(node)
+        if text is not None:
+            return text
+
+        value = self._store.value(node)
+        text = displayText(self._store.dtype(node), value, self._store.childCount(node))
+        if text is not value:
+            self._display[node] = text
+        return text
+
+    def setData(self, index, value, role):
+        """
+        Override
+        """
+        if role != QtCore.Qt.EditRole:
+            return False
+
+        node = self.getNode(index)
+        if index.column() == 0:
+            changed = self._store.setKey(node, value)
+        else:
+            changed = self._store.setValue(node, value)
+
+        if changed:
+            self._display.pop(node, None)
+            self.dataChanged.emit(index, index)
+        return changed
+
+    def headerData(self, section, orientation, role):
+        """
+        Override
+        """
+        if role == QtCore.Qt.DisplayRole:
+            if section == 0:
+                return "Key"
+            elif section == 1:
+                return "Value"
+
+    def flags(self, index):
+        """
+        Override
+        """
+        flags = super(QJsonStoreModel, self).flags(index)
+        return QtCore.Qt.ItemIsEditable | QtCore.Qt.ItemIsDragEnabled | flags
+
+    def addChildren(self, children, parent=QtCore.QModelIndex()):
+        """
+        Custom: the store has a fixed structure, nothing is added
+        """
+        return False
+
+    def removeChild(self, position, parent=QtCore.QModelIndex()):
+        """
+        Custom: the store has a fixed structure, nothing is removed
+        """
+        return False
+
+    def removeIndices(self, indices):
+        """
+        Custom: the store has a fixed structure, nothing is removed
+        """
+        return False
+
+    def clear(self):
+        """
+        Custom: clear the model data
+        """
+        self.beginResetModel()
+        self._store = QJsonStore()
+        self._display = dict()
+        self._sourceMap = None
+        self.endResetModel()
+        return True
+
+    def store(self):
+        """
+        Custom: get the underlying document store
+
+        :return: QJsonStore.
+        """
+        return self._store
+
+    def dataType(self, index):
+        """
+        Custom: get the value data type of the specified index
+
+        :param index: QModelIndex. specified index
+        :return: type.
+        """
+        return self._store.dtype(self.getNode(index))
+
+    def asDict(self, index=QtCore.QModelIndex()):
+        """
+        Custom: serialize specified index to dictionary
+        if no index is specified, the whole model will be serialized
+        but will not include the root key (as it's supposed to be hidden)
+
+        :param index: QModelIndex. specified index
+        :return: dict. output dictionary
+        """
+        node = self.getNode(index)
+        if node == 0:
+            return self._store.toPython(0)
+
+        return {self._store.key(node): self._store.toPython(node)}
+
+    def toJson(self, index=QtCore.QModelIndex(), indent=4):
+        """
+        Custom: serialize the value of specified index to JSON text
+        if no index is specified, the whole model will be serialized
+
+        :param index: QModelIndex. specified index
+        :param indent: int. indentation width, None for compact output
+        :return: str. JSON text
+        """
+        value = self._store.toPython(self.getNode(index))
+        return qjsoncodec.dumps(value, indent)
+
+    def dump(self, fp, index=QtCore.QModelIndex(), indent=4, sortKeys=False):
+        """
+        Custom: write the value of specified index as JSON text to a file,
+        if no index is specified, the whole model will be written
+
+        :param fp: file. text file object opened for writing
+        :param index: QModelIndex. specified index
+        :param indent: int. indentation width, None for compact output
+        :param sortKeys: bool. sort object keys
+        """
+        value = self._store.toPython(self.getNode(index))
+        qjsoncodec.dump(value, fp, indent, sortKeys)
+
+    def dumpLines(self, fp, index=QtCore.QModelIndex()):
+        """
+        Custom: write the elements of the list at specified index as JSON
+        Lines, if no index is specified, the whole model will be written
+
+        :param fp: file. text file object opened for writing
+        :param index: QModelIndex. specified index
+        """
+        value = self._store.toPython(self.getNode(index))
+        for item in value if isinstance(value, list) else [value]:
+            fp.write(qjsoncodec.dumps(item, None))
+            fp.write('\n')
+
+    def sourceMap(self):
+        """
+        Custom: get the map of the rows to the Raw View text
+
+        :return: QJsonSourceMap. map, None if there is none
+        """
+        return self._sourceMap
+
+    def setSourceMap(self, sourceMap):
+        """
+        Custom: set the map of the rows to the Raw View text
+
+        :param sourceMap: QJsonSourceMap. map of the current text
+        """
+        self._sourceMap = sourceMap
+
+    def indexPath(self, index):
+        """
+        Custom: get the rows leading from the root to an index
+
+        :param index: QModelIndex. specified index
+        :return: tuple of int. rows, empty for the root
+        """
+        path = []
+        while index.isValid():
+            path.append(index.row())
+            index = index.parent()
+        return tuple(reversed(path))
+
+    def pathIndex(self, path):
+        """
+        Custom: get the index at the end of a path of rows, see indexPath()
+
+        :param path: sequence of int. rows from the root
+        :return: QModelIndex. index, invalid if the path does not exist
+        """
+        index = QtCore.QModelIndex()
+        for row in path:
+            index = self.index(row, 0, index)
+            if not index.isValid():
+                break
+        return index
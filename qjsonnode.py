@@ -5,7 +5,374 @@ has child and parent relationships
 """
 
 
+import gc
+import json
+from itertools import chain, repeat
+from operator import itemgetter
+from sys import intern
+
+import qjsoncodec
+from qjsonindex import QJsonSpan
+from qjsonsnapshot import QJsonSnapshot
+
+
+# shared, immutable children container for leaf nodes, a real list is only
+# allocated once the first child is added
+_NO_CHILDREN = ()
+
+
+class _PendingChildren(object):
+    """
+    Entries of a lazily loaded container that have no child node yet, files
+    indexed on demand use QJsonSpanChildren which has the same interface
+    """
+    __slots__ = ('entries', 'position', 'keyed')
+    # the number of remaining entries is exact
+    counted = True
+
+    def __init__(self, source):
+        """
+        Initialization
+
+        :param source: dict or list. raw container of the node
+        """
+        self.entries = source
+        self.position = 0
+        self.keyed = isinstance(source, dict)
+
+    @property
+    def remaining(self):
+        """
+        Get the number of entries not handed out yet
+        :return: int.
+        """
+        return len(self.entries) - self.position
+
+    @property
+    def done(self):
+        """
+        Check whether every entry has been handed out
+        :return: bool.
+        """
+        return self.position >= len(self.entries)
+
+    def available(self, count=None):
+        """
+        Get the number of entries the next take(count) hands out
+
+        :param count: int. maximum number of entries, None for all
+        :return: int.
+        """
+        if count is None:
+            return self.remaining
+        return min(count, self.remaining)
+
+    def _ordered(self):
+        # dictionaries are only turned into an indexable sequence
+        # the first time the container is expanded
+        if isinstance(self.entries, dict):
+            self.entries = list(self.entries.items())
+        return self.entries
+
+    def take(self, count=None):
+        """
+        Hand out the next entries as (key, value) pairs, list entries
+        have a None key
+
+        :param count: int. maximum number of entries, None for all
+        :return: list of tuple. entries
+        """
+        entries = self._ordered()
+        start = self.position
+        end = len(entries) if count is None else min(len(entries), start + count)
+        self.position = end
+
+        if self.keyed:
+            return entries[start:end]
+        return [(None, item) for item in entries[start:end]]
+
+    def rest(self):
+        """
+        Iterate over the entries not handed out yet, without consuming them
+
+        :return: iterator of tuple. (key, value) pairs
+        """
+        entries = self.entries
+        if isinstance(entries, dict):
+            # not expanded yet, nothing was handed out
+            return iter(entries.items())
+        if self.keyed:
+            return iter(entries[self.position:])
+        return zip(repeat(None), entries[self.position:])
+
+    def copy(self):
+        """
+        Get an independent source of the same remaining entries
+
+        :return: _PendingChildren. copy
+        """
+        pending = _PendingChildren(self._ordered())
+        pending.position = self.position
+        pending.keyed = self.keyed
+        return pending
+
+
+class _AppendedChildren(object):
+    """
+    Pending children source followed by entries added to the container
+    before every child was created: they go after the entries of the source
+    and are created from their values once the source is exhausted, so
+    adding a child does not create all the others first
+    """
+    __slots__ = ('source', 'entries', 'position')
+
+    def __init__(self, source, entries, position=0):
+        """
+        Initialization
+
+        :param source: object. pending children source of the container
+        :param entries: list of tuple. (key, value) pairs of the added
+                        children
+        :param position: int. number of added entries already handed out
+        """
+        self.source = source
+        self.entries = entries
+        self.position = position
+
+    @property
+    def keyed(self):
+        """
+        Check whether the entries have keys (objects)
+        :return: bool.
+        """
+        return self.source.keyed
+
+    @property
+    def counted(self):
+        """
+        Check whether remaining is the exact number of entries left
+        :return: bool.
+        """
+        return self.source.counted
+
+    @property
+    def remaining(self):
+        """
+        Get the number of entries not handed out yet
+        :return: int.
+        """
+        return self.source.remaining + len(self.entries) - self.position
+
+    @property
+    def done(self):
+        """
+        Check whether every entry has been handed out
+        :return: bool.
+        """
+        return self.source.done and self.position >= len(self.entries)
+
+    def available(self, count=None):
+        """
+        Get the number of entries the next take(count) hands out
+
+        :param count: int. maximum number of entries, None for all
+        :return: int.
+        """
+        added = len(self.entries) - self.position
+        if count is None:
+            return self.source.available() + added
+        available = self.source.available(count)
+        # the source only hands out fewer entries than asked at its end
+        return available + min(count - available, added)
+
+    def take(self, count=None):
+        """
+        Hand out the next entries as (key, value) pairs, the entries of the
+        source first
+
+        :param count: int. maximum number of entries, None for all
+        :return: list of tuple. entries
+        """
+        entries = []
+        if not self.source.done:
+            entries = self.source.take(count)
+            if count is not None:
+                count -= len(entries)
+                if not count:
+                    return entries
+
+        start = self.position
+        end = len(self.entries) if count is None else min(len(self.entries), start + count)
+        self.position = end
+        return entries + self.entries[start:end]
+
+    def rest(self):
+        """
+        Iterate over the entries not handed out yet, without consuming them
+
+        :return: iterator of tuple. (key, value) pairs
+        """
+        return chain(self.source.rest(), self.entries[self.position:])
+
+    def copy(self):
+        """
+        Get an independent source of the same remaining entries
+
+        :return: _AppendedChildren. copy
+        """
+        return _AppendedChildren(self.source.copy(), self.entries[self.position:])
+
+
+class _NodeCache(object):
+    """
+    Values derived from a node and its subtree, dropped (for the node and all
+    its ancestors) whenever the subtree changes
+    """
+    __slots__ = ('fragment', 'fragmentKey', 'snapshot', 'display')
+
+    def __init__(self, snapshot=None):
+        self.fragment = None
+        self.fragmentKey = None
+        self.snapshot = snapshot
+        self.display = None
+
+
+_encodeString = json.encoder.encode_basestring_ascii
+
+# characters of a string value shown in the tree, longer strings are cut
+# (the delegate lays out the whole text before eliding it to the column)
+DISPLAY_LENGTH = 500
+
+# cached fragments shorter than this are kept as one string, larger ones
+# keep referencing the fragments of their children instead of copying them
+FRAGMENT_JOIN_SIZE = 64 * 1024
+
+
+def _scalarText(value):
+    """
+    Encode a scalar value the way json.dumps does
+
+    :param value: mixed. scalar value
+    :return: str. JSON text
+    """
+    cls = value.__class__
+    if cls is str:
+        return _encodeString(value)
+    if value is None:
+        return 'null'
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if cls is int:
+        return int.__repr__(value)
+    if cls is float and value == value and value not in (float('inf'), float('-inf')):
+        return float.__repr__(value)
+    return json.dumps(value)
+
+
+def _filterText(value):
+    """
+    Get the text a filter matches for a scalar value, see textEntries()
+
+    :param value: mixed. scalar value
+    :return: str. text
+    """
+    if value.__class__ is str:
+        return value
+    if value is None:
+        return 'null'
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    return repr(value)
+
+
+def _keyText(key):
+    """
+    Encode an object key the way json.dumps does, non-string keys are
+    converted to their JSON text first
+
+    :param key: mixed. key
+    :return: str. quoted JSON text
+    """
+    if key.__class__ is str:
+        return _encodeString(key)
+    return _encodeString(json.dumps(key))
+
+
+def displayText(dtype, value, count=0, counted=True):
+    """
+    Get the text shown for a value: a summary of the children of containers,
+    long strings cut to DISPLAY_LENGTH characters followed by their size in
+    bytes, other values as they are
+
+    :param dtype: type. value data type
+    :param value: mixed. scalar value, ignored for containers
+    :param count: int. number of children of a container
+    :param counted: bool. whether count is exact, not a lower bound
+    :return: mixed. e.g. '{12 keys}', '[40,000 items]'
+    """
+    if dtype is dict or dtype == list:
+        opening, closing, noun = ('{', '}', 'key') if dtype is dict else ('[', ']', 'item')
+        if not count:
+            return opening + (closing if counted else '\u2026' + closing)
+        return '{}{:,}{} {}{}{}'.format(opening, count, '' if counted else '+', noun,
+                                        '' if count == 1 else 's', closing)
+
+    if value.__class__ is not str or len(value) <= DISPLAY_LENGTH:
+        return value
+    size = len(value) if value.isascii() else len(value.encode('utf-8', errors='replace'))
+    return '{}\u2026 ({})'.format(value[:DISPLAY_LENGTH], _sizeText(size))
+
+
+def _sizeText(size):
+    """
+    Format a size in bytes
+
+    :param size: int. bytes
+    :return: str. e.g. '3.2 MB'
+    """
+    if size < 1024:
+        return '{} B'.format(size)
+    for unit in ('KB', 'MB', 'GB'):
+        size /= 1024.0
+        if size < 1024:
+            break
+    return '{:.1f} {}'.format(size, unit)
+
+
+def _flatten(fragment):
+    """
+    Join a nested fragment (strings and nested fragment lists) into text
+
+    :param fragment: str or list. fragment
+    :return: str. text
+    """
+    if fragment.__class__ is str:
+        return fragment
+
+    output = []
+    append = output.append
+    stack = [iter(fragment)]
+    while stack:
+        for piece in stack[-1]:
+            if piece.__class__ is list:
+                stack.append(iter(piece))
+                break
+            append(piece)
+        else:
+            stack.pop()
+    return ''.join(output)
+
+
 class QJsonNode(object):
+    # a document produces one node per value, dropping the per-instance
+    # __dict__ keeps large trees several times smaller
+    __slots__ = ('_key', '_value', '_dtype', '_parent', '_children', '_row',
+                 '_pending', '_cache')
+
     def __init__(self, parent=None):
         """
         Initialization
@@ -16,51 +383,170 @@ class QJsonNode(object):
         self._value = ""
         self._dtype = None
         self._parent = parent
-        self._children = list()
+        self._children = _NO_CHILDREN
+        self._row = 0
+        self._pending = None
+        self._cache = None
 
     @classmethod
-    def load(cls, value, parent=None):
+    def load(cls, value, parent=None, lazy=False):
         """
         Generate the hierarchical node tree using dictionary
 
         :param value: dict. input dictionary
-        :param parent: QJsonNode. for recursive use only
+        :param parent: QJsonNode. parent of the top node
+        :param lazy: bool. only create the top node, children are created
+                     on demand by fetchMore()
         :return: QJsonNode. the top node
         """
+        if lazy:
+            return cls._loadLazy("root", value, parent)
+
         rootNode = cls(parent)
-        rootNode.key = "root"
-        rootNode.dtype = type(value)
-
-        if isinstance(value, dict):
-            # TODO: not sort will break things, but why?
-            nodes = sorted(value.items())
-
-            for key, value in nodes:
-                child = cls.load(value, rootNode)
-                child.key = key
-                child.dtype = type(value)
-                rootNode.addChild(child)
-        elif isinstance(value, list):
-            for index, value in enumerate(value):
-                child = cls.load(value, rootNode)
-                child.key = 'list[{}]'.format(index)
-                child.dtype = type(value)
-                rootNode.addChild(child)
+        rootNode._key = "root"
+        rootNode._dtype = type(value)
+
+        # a tree holds millions of parent/child reference cycles, letting the
+        # cyclic collector rescan them while they are created roughly doubles
+        # the build time
+        gcEnabled = gc.isenabled()
+        gc.disable()
+        try:
+            cls._build(rootNode, value)
+        finally:
+            if gcEnabled:
+                gc.enable()
+
+        return rootNode
+
+    @classmethod
+    def _build(cls, rootNode, value):
+        """
+        Create the node hierarchy of value under rootNode
+
+        :param rootNode: QJsonNode. node receiving the value
+        :param value: mixed. raw value
+        """
+        new = object.__new__
+
+        # explicit stack of (node, value) pairs still to be expanded, the
+        # nesting depth of the document is not bound by the recursion limit
+        stack = [(rootNode, value)]
+        while stack:
+            node, value = stack.pop()
+
+            # keys keep the document order, sorting for display is done
+            # by the view
+            if isinstance(value, dict):
+                entries = value.items()
+            elif isinstance(value, list):
+                # list elements store no key, the label is derived from the row
+                entries = zip(repeat(None), value)
+            else:
+                node._value = value
+                continue
+
+            children = []
+            append = children.append
+            for row, (key, item) in enumerate(entries):
+                # every slot is assigned here, __init__ would only set
+                # defaults that are overwritten right away
+                child = new(cls)
+                # records repeat the same keys, share one string per key
+                child._key = intern(key) if type(key) is str else key
+                child._dtype = type(item)
+                child._parent = node
+                child._children = _NO_CHILDREN
+                child._row = row
+                child._pending = None
+                child._cache = None
+                append(child)
+
+                if isinstance(item, (dict, list)):
+                    child._value = ""
+                    if item:
+                        stack.append((child, item))
+                else:
+                    child._value = item
+
+            if children:
+                node._children = children
+
+    @classmethod
+    def _loadLazy(cls, key, value, parent=None):
+        """
+        Create a single node whose container value is kept unexpanded
+
+        :param key: str. key of the node, None for list elements
+        :param value: mixed. raw value, or QJsonSpan of an indexed file
+        :param parent: QJsonNode. parent node
+        :return: QJsonNode. the node
+        """
+        node = cls(parent)
+        node._key = intern(key) if type(key) is str else key
+
+        # containers of an indexed file are scanned when they are expanded
+        if isinstance(value, QJsonSpan):
+            node._dtype = value.dtype
+            node._pending = value.children()
+            return node
+
+        node._dtype = type(value)
+        if isinstance(value, (dict, list)):
+            if value:
+                node._pending = _PendingChildren(value)
         else:
-            rootNode.value = value
+            node._value = value
+
+        return node
+
+    @classmethod
+    def fromSnapshot(cls, snapshot):
+        """
+        Generate an editable node tree from a snapshot. The containers keep
+        the snapshot they come from, so the snapshots taken after an undo
+        share the unchanged subtrees with it
+
+        :param snapshot: QJsonSnapshot. snapshot of a container
+        :return: QJsonNode. the top node
+        """
+        rootNode = cls()
+        rootNode._key = "root"
+        rootNode._dtype = snapshot.dtype
+        rootNode._cache = _NodeCache(snapshot=snapshot)
+
+        stack = [(rootNode, snapshot)]
+        while stack:
+            node, current = stack.pop()
+            for key, value in current.items():
+                if isinstance(value, QJsonSnapshot):
+                    child = cls()
+                    child._key = key
+                    child._dtype = value.dtype
+                    child._cache = _NodeCache(snapshot=value)
+                    stack.append((child, value))
+                else:
+                    child = cls._loadLazy(key, value)
+                node._append(child)
+
+            # entries that were never expanded stay lazily loaded
+            node._pending = current.pending()
 
         return rootNode
 
     @property
     def key(self):
         """
-        Get key of the current node
+        Get key of the current node, list elements are labelled by their row
         """
+        if self._key is None:
+            return 'list[{}]'.format(self._row)
         return self._key
 
     @key.setter
     def key(self, key):
         self._key = key
+        self.invalidate()
 
     @property
     def value(self):
@@ -72,6 +558,7 @@ class QJsonNode(object):
     @value.setter
     def value(self, value):
         self._value = value
+        self.invalidate()
 
     @property
     def dtype(self):
@@ -83,6 +570,7 @@ class QJsonNode(object):
     @dtype.setter
     def dtype(self, dtype):
         self._dtype = dtype
+        self.invalidate()
 
     @property
     def parent(self):
@@ -95,7 +583,7 @@ class QJsonNode(object):
     def children(self):
         """
         Get the children of the current node
-        :return: list.
+        :return: sequence. a list, or an empty tuple for leaf nodes
         """
         return self._children
 
@@ -107,14 +595,147 @@ class QJsonNode(object):
         """
         return len(self._children)
 
+    @property
+    def pendingCount(self):
+        """
+        Get the number of children that are not created yet (lazy loading),
+        for indexed files only the entries scanned so far are counted
+        :return: int.
+        """
+        if self._pending is None:
+            return 0
+        return self._pending.remaining
+
+    def fetchCount(self, count=None):
+        """
+        Get the number of children the next fetchMore(count) creates, the
+        containers of indexed files are scanned as far as needed
+
+        :param count: int. maximum number of children, None for all
+        :return: int.
+        """
+        if self._pending is None:
+            return 0
+        return self._pending.available(count)
+
+    def canFetchMore(self):
+        """
+        Check whether the current node still has children to create
+
+        :return: bool.
+        """
+        return self._pending is not None
+
+    def fetchMore(self, count=None):
+        """
+        Create the next children of a lazily loaded node
+
+        :param count: int. maximum number of children, None for all
+        :return: int. number of children created
+        """
+        pending = self._pending
+        if pending is None:
+            return 0
+
+        # the content of the node does not change, cached values stay valid
+        entries = pending.take(count)
+        for key, value in entries:
+            self._append(self._loadLazy(key, value))
+
+        if pending.done:
+            self._pending = None
+        return len(entries)
+
+    def displayValue(self):
+        """
+        Get the text shown for the value of the current node, see
+        displayText(); summaries and cut strings are cached until the node
+        changes
+
+        :return: mixed. display value
+        """
+        dtype = self._dtype
+        isContainer = dtype is dict or dtype == list
+        if not isContainer:
+            value = self._value
+            if value.__class__ is not str or len(value) <= DISPLAY_LENGTH:
+                return value
+
+        cache = self._cache
+        if cache is not None and cache.display is not None:
+            return cache.display
+
+        pending = self._pending
+        if isContainer:
+            counted = pending is None or pending.counted
+            count = len(self._children)
+            if pending is not None:
+                count += pending.remaining
+            text = displayText(dtype, None, count, counted)
+            # indexed containers are still being scanned, their count grows
+            # without the node changing
+            if not counted:
+                return text
+        else:
+            text = displayText(dtype, value)
+
+        if cache is None:
+            cache = self._cache = _NodeCache()
+        cache.display = text
+        return text
+
+    def invalidate(self):
+        """
+        Drop the cached values of the current node and of its ancestors,
+        to be called whenever the subtree of the node changes
+        """
+        node = self
+        while node is not None:
+            node._cache = None
+            node = node._parent
+
     def addChild(self, node):
         """
         Add a new child to the current node
 
         :param node: QJsonNode. child node
         """
-        self._children.append(node)
+        self.addChildren([node])
+
+    def addChildren(self, nodes):
+        """
+        Add several children to the current node at once. Children of a
+        lazily loaded node that are not created yet stay so: the new
+        children go after them and are kept as values until they are
+        fetched, see pendingCount
+
+        :param nodes: iterable of QJsonNode. child nodes
+        """
+        nodes = list(nodes)
+        if self._dtype is dict:
+            # list elements moved into an object keep their label as key
+            for node in nodes:
+                if node._key is None:
+                    node._key = 'list[{}]'.format(node._row)
+
+        if self._pending is not None:
+            entries = [(node._key, node.getChildrenValue(node)) for node in nodes]
+            if isinstance(self._pending, _AppendedChildren):
+                self._pending.entries.extend(entries)
+            else:
+                self._pending = _AppendedChildren(self._pending, entries)
+        else:
+            for node in nodes:
+                self._append(node)
+        self.invalidate()
+
+    def _append(self, node):
+        if self._children is _NO_CHILDREN:
+            self._children = [node]
+        else:
+            self._children.append(node)
         node._parent = self
+        node._row = len(self._children) - 1
 
     def removeChild(self, position):
         """
@@ -124,6 +745,44 @@ class QJsonNode(object):
         """
         node = self._children.pop(position)
         node._parent = None
+        node._row = 0
+
+        # only the siblings after the removed one change position
+        for row in range(position, len(self._children)):
+            self._children[row]._row = row
+
+        self.invalidate()
+
+    def removeChildren(self, rows):
+        """
+        Remove several children of the current node at once, the rows of the
+        others are updated in one pass
+
+        :param rows: iterable of int. rows/positions of the children
+        """
+        rows = set(rows)
+        if not rows:
+            return
+        children = self._children
+        first = min(rows)
+        last = max(rows)
+
+        if last - first + 1 == len(rows):
+            # a contiguous range
+            removed = children[first:last + 1]
+            del children[first:last + 1]
+        else:
+            removed = [children[row] for row in sorted(rows)]
+            children[first:] = [node for row, node in enumerate(children[first:], first)
+                                if row not in rows]
+        for node in removed:
+            node._parent = None
+            node._row = 0
+
+        for row in range(first, len(children)):
+            children[row]._row = row
+
+        self.invalidate()
 
     def child(self, row):
         """
@@ -140,9 +799,89 @@ class QJsonNode(object):
 
         :return: int. index of the current node
         """
-        if self._parent:
-            return self.parent.children.index(self)
-        return 0
+        return self._row
+
+    def textEntries(self, first=0, last=None, unsearched=None):
+        """
+        Iterate over children of the current node and their descendants with
+        the texts a filter matches. Entries of lazily loaded nodes that have
+        no child node yet are given as texts of the lazily loaded node, see
+        ownTextEntries()
+
+        :param first: int. row of the first child
+        :param last: int. row of the last child, None for the last one
+        :param unsearched: list. receives the lazily loaded nodes whose
+                           entries cannot be searched before they are created
+        :return: iterator of tuple. (node, key, value text), the key is None
+                 for list elements and the value text None for containers
+        """
+        stack = [self._children[first:None if last is None else last + 1]]
+        while stack:
+            for child in stack.pop():
+                for entry in child.ownTextEntries(unsearched):
+                    yield entry
+                if child._children:
+                    stack.append(child._children)
+
+    def ownTextEntries(self, unsearched=None):
+        """
+        Iterate over the texts a filter matches for the current node alone:
+        its key and value, then the distinct keys and value texts of the
+        entries it has not created yet (see pendingTexts), as key texts
+
+        :param unsearched: list. receives the node when its entries that are
+                           not created yet cannot be searched
+        :return: iterator of tuple. (node, key, value text), see textEntries()
+        """
+        key = self._key
+        if key is not None and key.__class__ is not str:
+            key = str(key)
+        dtype = self._dtype
+        if dtype is dict or dtype == list:
+            yield self, key, None
+        else:
+            yield self, key, _filterText(self._value)
+
+        if self._pending is not None:
+            texts = self.pendingTexts()
+            if texts is None:
+                if unsearched is not None:
+                    unsearched.append(self)
+            else:
+                for text in texts:
+                    yield self, text, None
+
+    def pendingTexts(self):
+        """
+        Get the distinct keys and value texts of the entries of a lazily
+        loaded node that have no child node yet, at any depth
+
+        :return: set of str. texts, None when the entries are only read from
+                 a file when they are created (indexed files, JSON Lines)
+        """
+        texts = set()
+        pending = self._pending
+        if pending is None:
+            return texts
+        source = pending.source if isinstance(pending, _AppendedChildren) else pending
+        if not isinstance(source, _PendingChildren):
+            return None
+
+        add = texts.add
+        stack = [pending.rest()]
+        while stack:
+            for key, value in stack.pop():
+                if key is not None:
+                    add(key if key.__class__ is str else str(key))
+                if isinstance(value, dict):
+                    stack.append(value.items())
+                elif isinstance(value, list):
+                    stack.append(zip(repeat(None), value))
+                elif isinstance(value, QJsonSpan):
+                    return None
+                else:
+                    add(_filterText(value))
+        return texts
 
     def asDict(self):
         """
@@ -161,13 +900,378 @@ class QJsonNode(object):
         """
         if node.dtype is dict:
             output = dict()
-            for child in node.children:
-                output[child.key] = self.getChildrenValue(child)
-            return output
         elif node.dtype == list:
             output = list()
-            for child in node.children:
-                output.append(self.getChildrenValue(child))
-            return output
         else:
             return node.value
+
+        # containers are created top-down and filled from an explicit stack,
+        # the nesting depth of the tree is not bound by the recursion limit
+        stack = [(node, output)]
+        while stack:
+            current, target = stack.pop()
+
+            if current._dtype is dict:
+                for child in current._children:
+                    dtype = child._dtype
+                    if dtype is dict:
+                        value = dict()
+                        stack.append((child, value))
+                    elif dtype == list:
+                        value = list()
+                        stack.append((child, value))
+                    else:
+                        value = child._value
+                    target[child._key] = value
+            else:
+                append = target.append
+                for child in current._children:
+                    dtype = child._dtype
+                    if dtype is dict:
+                        value = dict()
+                        stack.append((child, value))
+                    elif dtype == list:
+                        value = list()
+                        stack.append((child, value))
+                    else:
+                        value = child._value
+                    append(value)
+
+            # entries of lazily loaded nodes that were never expanded are
+            # still raw values and are passed through as they are
+            if current._pending is not None:
+                if current._dtype is dict:
+                    target.update(current._pending.rest())
+                else:
+                    target.extend(value for _, value in current._pending.rest())
+
+        return output
+
+    def toJson(self, indent=4):
+        """
+        Serialize the value of the current node to JSON text, formatted like
+        json.dumps. The text of every container is cached, so after an edit
+        only the containers on the path to the root are encoded again.
+
+        :param indent: int. indentation width, None for compact output
+        :return: str. JSON text
+        """
+        if self._dtype is not dict and self._dtype != list:
+            return _scalarText(self._value)
+
+        text = _flatten(self._fragment(indent))
+
+        # fragments are cached with the indentation of their depth in the tree
+        depth = self._depth()
+        if depth and indent:
+            text = text.replace('\n' + ' ' * (indent * depth), '\n')
+        return text
+
+    def _depth(self):
+        depth = 0
+        node = self._parent
+        while node is not None:
+            depth += 1
+            node = node._parent
+        return depth
+
+    def _fragment(self, indent):
+        """
+        Get the cached fragment of the current container, encoding the
+        containers of its subtree whose fragment is missing or stale
+
+        :param indent: int. indentation width, None for compact output
+        :return: str or list. fragment, see _flatten()
+        """
+        depth = self._depth()
+
+        # post-order walk with an explicit stack, a container is encoded
+        # once all of its container children have a valid fragment
+        key = (indent, depth)
+        cache = self._cache
+        if cache is not None and cache.fragmentKey == key:
+            return cache.fragment
+
+        stack = [(self, depth, False)]
+        while stack:
+            node, level, ready = stack.pop()
+
+            if not ready:
+                stack.append((node, level, True))
+                childKey = (indent, level + 1)
+                for child in node._children:
+                    if child._children:
+                        cache = child._cache
+                        if cache is None or cache.fragmentKey != childKey:
+                            stack.append((child, level + 1, False))
+                continue
+
+            cache = node._cache
+            if cache is None:
+                cache = node._cache = _NodeCache()
+            cache.fragment = node._encode(indent, level)
+            cache.fragmentKey = (indent, level)
+
+        return self._cache.fragment
+
+    def _encode(self, indent, level):
+        """
+        Encode a container whose container children are already encoded
+
+        :param indent: int. indentation width, None for compact output
+        :param level: int. depth of the node
+        :return: str or list. fragment
+        """
+        keyed = self._dtype is dict
+        children = self._children
+        pending = self._pending
+        if not children and pending is None:
+            return '{}' if keyed else '[]'
+
+        if indent is None:
+            pad, close, colon = '', '', ':'
+            reindent = None
+        else:
+            pad = '\n' + ' ' * (indent * (level + 1))
+            close = '\n' + ' ' * (indent * level)
+            colon = ': '
+            reindent = pad
+
+        fragment = []
+        text = ['{' if keyed else '[']
+        separator = pad
+        for child in children:
+            text.append(separator)
+            separator = ',' + pad
+            if keyed:
+                text.append(_keyText(child._key))
+                text.append(colon)
+
+            if child._children:
+                childFragment = child._cache.fragment
+                if childFragment.__class__ is str:
+                    text.append(childFragment)
+                else:
+                    fragment.append(''.join(text))
+                    fragment.append(childFragment)
+                    text = []
+            elif child._dtype is dict or child._dtype == list:
+                text.append(_flatten(child._encode(indent, level + 1)))
+            else:
+                text.append(_scalarText(child._value))
+
+        # entries of lazily loaded nodes that were never expanded
+        if pending is not None:
+            for key, value in pending.rest():
+                text.append(separator)
+                separator = ',' + pad
+                if keyed:
+                    text.append(_keyText(key))
+                    text.append(colon)
+                if reindent is None:
+                    text.append(qjsoncodec.dumps(value, None))
+                else:
+                    text.append(qjsoncodec.dumps(value, indent).replace('\n', reindent))
+
+        text.append(close)
+        text.append('}' if keyed else ']')
+        text = ''.join(text)
+        if not fragment and len(text) < FRAGMENT_JOIN_SIZE:
+            return text
+
+        fragment.append(text)
+        return fragment
+
+    def iterJson(self, indent=4, sortKeys=False, chunkSize=64 * 1024):
+        """
+        Serialize the value of the current node to JSON text chunk by chunk,
+        without building an intermediate dictionary or the complete text.
+        Valid cached fragments (see toJson()) are reused as they are.
+
+        :param indent: int. indentation width, None for compact output
+        :param sortKeys: bool. sort object keys
+        :param chunkSize: int. approximate size of the yielded chunks
+        :return: iterator of str. JSON text chunks
+        """
+        if self._dtype is not dict and self._dtype != list:
+            yield _scalarText(self._value)
+            return
+
+        if indent is None:
+            colon = ':'
+            encoder = json.JSONEncoder(sort_keys=sortKeys, separators=(',', ':'))
+        else:
+            colon = ': '
+            encoder = json.JSONEncoder(sort_keys=sortKeys, indent=indent)
+
+        # cached fragments are unsorted and indented for their depth in the
+        # whole tree, they only fit when serializing from the root
+        useCache = not sortKeys and self._parent is None
+
+        buffer = []
+        size = 0
+        stack = []
+        pending = [(self, 0)]
+        while pending or stack:
+            # open a container: reuse its fragment or start walking it
+            if pending:
+                node, level = pending.pop()
+                cache = node._cache
+                if useCache and cache is not None and cache.fragmentKey == (indent, level):
+                    fragmentStack = [iter((cache.fragment,))]
+                    while fragmentStack:
+                        for piece in fragmentStack[-1]:
+                            if piece.__class__ is list:
+                                fragmentStack.append(iter(piece))
+                                break
+                            buffer.append(piece)
+                            size += len(piece)
+                        else:
+                            fragmentStack.pop()
+                elif not node._children and node._pending is None:
+                    buffer.append('{}' if node._dtype is dict else '[]')
+                else:
+                    buffer.append('{' if node._dtype is dict else '[')
+                    pad = '' if indent is None else '\n' + ' ' * (indent * (level + 1))
+                    # frame: entries, keyed, level, padding, separator
+                    stack.append([node._entries(sortKeys), node._dtype is dict, level, pad, pad])
+
+            else:
+                frame = stack[-1]
+                entries, keyed, level, pad, separator = frame
+
+                for key, value in entries:
+                    buffer.append(separator)
+                    separator = frame[4] = ',' + pad
+                    if keyed:
+                        buffer.append(_keyText(key))
+                        buffer.append(colon)
+
+                    if not isinstance(value, QJsonNode):
+                        # raw entry of a lazily loaded node
+                        for chunk in encoder.iterencode(value):
+                            buffer.append(chunk if indent is None else chunk.replace('\n', pad))
+                    elif value._dtype is dict or value._dtype == list:
+                        pending.append((value, level + 1))
+                        break
+                    else:
+                        buffer.append(_scalarText(value._value))
+
+                    if len(buffer) >= 4096:
+                        break
+                else:
+                    stack.pop()
+                    if indent is not None:
+                        buffer.append('\n' + ' ' * (indent * level))
+                    buffer.append('}' if keyed else ']')
+
+            # pieces are small except cached fragments, which are counted
+            if size >= chunkSize or len(buffer) >= 4096:
+                yield ''.join(buffer)
+                buffer = []
+                size = 0
+
+        if buffer:
+            yield ''.join(buffer)
+
+    def _entries(self, sortKeys=False):
+        """
+        Iterate over the (key, value) entries of the current container, values
+        are child nodes or, for lazily loaded nodes, raw values
+
+        :param sortKeys: bool. sort object entries by key
+        :return: iterator of tuple. entries
+        """
+        entries = ((child._key, child) for child in self._children)
+        if self._pending is not None:
+            entries = chain(entries, self._pending.rest())
+
+        if sortKeys and self._dtype is dict:
+            return iter(sorted(entries, key=itemgetter(0)))
+        return entries
+
+    def dump(self, fp, indent=4, sortKeys=False):
+        """
+        Write the value of the current node as JSON text to a file object
+
+        :param fp: file. text file object opened for writing
+        :param indent: int. indentation width, None for compact output
+        :param sortKeys: bool. sort object keys
+        """
+        write = fp.write
+        for chunk in self.iterJson(indent, sortKeys):
+            write(chunk)
+
+    def dumpLines(self, fp):
+        """
+        Write the elements of the current list node as JSON Lines, one compact
+        value per line. Any other value is written as a single line.
+
+        :param fp: file. text file object opened for writing
+        """
+        write = fp.write
+        if self._dtype != list:
+            write(self.toJson(None))
+            write('\n')
+            return
+
+        for _, value in self._entries():
+            if isinstance(value, QJsonNode):
+                write(value.toJson(None))
+            else:
+                write(qjsoncodec.dumps(value, None))
+            write('\n')
+
+    def snapshot(self):
+        """
+        Take an immutable snapshot of the current node. Snapshots of unchanged
+        subtrees are cached and shared, after an edit only the containers on
+        the path to the root are copied.
+
+        :return: QJsonSnapshot. snapshot, or the value itself for scalars
+        """
+        if self._dtype is not dict and self._dtype != list:
+            return self._value
+
+        cache = self._cache
+        if cache is not None and cache.snapshot is not None:
+            return cache.snapshot
+
+        # post-order walk, a container is copied once all of its container
+        # children have a snapshot
+        stack = [(self, False)]
+        while stack:
+            node, ready = stack.pop()
+
+            if not ready:
+                stack.append((node, True))
+                for child in node._children:
+                    if child._dtype is dict or child._dtype == list:
+                        cache = child._cache
+                        if cache is None or cache.snapshot is None:
+                            stack.append((child, False))
+                continue
+
+            values = []
+            for child in node._children:
+                if child._dtype is dict or child._dtype == list:
+                    values.append(child._cache.snapshot)
+                else:
+                    values.append(child._value)
+
+            keys = None
+            if node._dtype is dict:
+                keys = [child._key for child in node._children]
+
+            # entries that were never expanded are shared, not copied
+            pending = None
+            if node._pending is not None:
+                pending = node._pending.copy()
+
+            cache = node._cache
+            if cache is None:
+                cache = node._cache = _NodeCache()
+            cache.snapshot = QJsonSnapshot(
+                node._dtype, None if keys is None else tuple(keys), tuple(values), pending)
+
+        return self._cache.snapshot
@@ -0,0 +1,370 @@
+"""
+The profile module summarizes a JSON document of any size in one pass over
+its bytes, without parsing it into values: the number of nodes of each type,
+the maximum depth, the most frequent keys, the lengths of arrays and the
+largest subtrees.
+
+Memory stays constant whatever the size of the document: the file is read
+in chunks, only the containers enclosing the current position are kept, the
+key table is pruned to its most frequent keys when it grows past MAX_KEYS
+(counts are then approximate), and only the LARGEST_SUBTREES largest
+subtrees are remembered. A string value is buffered whole when it spans
+chunks.
+
+Profiling is meant to run in another process, see run(), so it neither
+holds the interpreter lock of the GUI nor keeps memory once it is done.
+Several top-level values (JSON Lines) are profiled as a sequence of
+documents, invalid text is skipped rather than reported.
+"""
+
+
+import heapq
+import json
+import os
+import queue as queueModule
+import re
+
+from qjsonfile import QJsonInput
+from qjsonstream import StreamCancelled
+
+
+# bytes read from the file per chunk
+CHUNK_SIZE = 1024 * 1024
+
+# distinct keys counted exactly, the table is pruned to half beyond
+MAX_KEYS = 100000
+
+# number of largest subtrees reported
+LARGEST_SUBTREES = 20
+
+# number of most frequent keys reported
+TOP_KEYS = 50
+
+# one match per value or bracket, the commas, colons and whitespace before it
+# are part of the match (letting finditer skip them byte by byte is several
+# times slower); the group matched gives the kind of token
+_TOKEN = re.compile(rb'''
+    [\ \t\n\r,:]*
+    (?:
+    "([^"\\]*(?:\\.[^"\\]*)*)"      # 1 string, key or value
+    |([{\[])                        # 2 opening bracket
+    |([}\]])                        # 3 closing bracket
+    |(-?[0-9][0-9.eE+\-]*)          # 4 number
+    |(true|false)                   # 5 boolean
+    |(null)                         # 6 null
+    |("|[a-z]+)                     # 7 string or literal cut by the chunk end
+    )
+''', re.VERBOSE)
+_STRING, _OPEN, _CLOSE, _NUMBER, _BOOLEAN, _NULL, _PARTIAL = range(1, 8)
+
+# fields of the frame of an open container
+_OBJECT, _START, _COUNT, _EXPECT_KEY, _KEY, _NAME = range(6)
+
+
+class QJsonProfile(object):
+    """
+    Summary of a JSON document, see profile()
+    """
+    def __init__(self, path, size):
+        """
+        Initialization
+
+        :param path: str. path of the file
+        :param size: int. size of the file in bytes
+        """
+        self.path = path
+        self.size = size
+        # bytes of JSON text, larger than size for a compressed file
+        self.contentSize = 0
+        # nodes by type name
+        self.counts = {'object': 0, 'array': 0, 'string': 0, 'number': 0, 'boolean': 0, 'null': 0}
+        self.maxDepth = 0
+        # top-level values, more than one for JSON Lines
+        self.documents = 0
+        # occurrences of each key, by raw (still escaped) key bytes
+        self.keys = {}
+        # keys were pruned, counts are lower bounds
+        self.keysApproximate = False
+        self.arrays = 0
+        self.arrayItems = 0
+        self.maxArrayLength = 0
+        # arrays by number of digits of their length, 0 for empty arrays
+        self.arrayLengths = {}
+        # (bytes, order, path, type name, children) of the largest subtrees
+        self.largest = []
+        # every container was closed
+        self.complete = True
+
+    @property
+    def nodes(self):
+        """
+        Get the total number of nodes
+        :return: int.
+        """
+        return sum(self.counts.values())
+
+    def topKeys(self, count=TOP_KEYS):
+        """
+        Get the most frequent keys
+
+        :param count: int. number of keys
+        :return: list of tuple. (key, occurrences), most frequent first
+        """
+        top = heapq.nlargest(count, self.keys.items(), key=lambda item: item[1])
+        return [(_decodeKey(key), occurrences) for key, occurrences in top]
+
+    def largestSubtrees(self):
+        """
+        Get the largest subtrees, the top-level value excluded
+
+        :return: list of tuple. (path, type name, bytes, children), largest
+                 first
+        """
+        entries = sorted(self.largest, reverse=True)
+        return [(path, dtype, size, children) for size, _, path, dtype, children in entries]
+
+    def asDict(self):
+        """
+        Get the profile as plain data, to be shown as a tree
+
+        :return: dict. profile
+        """
+        arrays = {
+            'count': self.arrays,
+            'max_length': self.maxArrayLength,
+            'mean_length': round(self.arrayItems / self.arrays, 2) if self.arrays else 0,
+            'lengths': {_bucketName(digits): self.arrayLengths[digits]
+                        for digits in sorted(self.arrayLengths)},
+        }
+        keys = {
+            'distinct': len(self.keys),
+            'approximate': self.keysApproximate,
+            'most_frequent': dict(self.topKeys()),
+        }
+        subtrees = [{'path': path, 'type': dtype, 'bytes': size, 'children': children}
+                    for path, dtype, size, children in self.largestSubtrees()]
+
+        data = {
+            'file': os.path.basename(self.path),
+            'size_bytes': self.size,
+        }
+        if self.contentSize != self.size:
+            data['content_bytes'] = self.contentSize
+        data.update({
+            'complete': self.complete,
+            'documents': self.documents,
+            'nodes': dict(self.counts, total=self.nodes),
+            'max_depth': self.maxDepth,
+            'keys': keys,
+            'arrays': arrays,
+            'largest_subtrees': subtrees,
+        })
+        return data
+
+
+def _decodeKey(key):
+    """
+    Decode the raw bytes of a key
+
+    :param key: bytes. key as written between its quotes
+    :return: str. key
+    """
+    if b'\\' in key:
+        try:
+            return json.loads(b'"' + key + b'"')
+        except ValueError:
+            pass
+    return key.decode('utf-8', errors='replace')
+
+
+def _bucketName(digits):
+    """
+    Get the name of a range of array lengths
+
+    :param digits: int. number of digits of the lengths, 0 for empty arrays
+    :return: str. e.g. '10-99'
+    """
+    if not digits:
+        return '0'
+    return '{}-{}'.format(10 ** (digits - 1), 10 ** digits - 1)
+
+
+def _path(names):
+    """
+    Build the path of a node from the names of its ancestors
+
+    :param names: list. raw keys (bytes) and indexes (int) from the root
+    :return: str. e.g. '$.users[3].name'
+    """
+    parts = ['$']
+    for name in names:
+        if isinstance(name, int):
+            parts.append('[{}]'.format(name))
+        else:
+            parts.append('.' + _decodeKey(name))
+    return ''.join(parts)
+
+
+def profile(path, progress=None, chunkSize=CHUNK_SIZE):
+    """
+    Profile a JSON file in one pass, compressed files are decompressed while
+    they are read
+
+    :param path: str. path of the file
+    :param progress: callable. called as progress(bytesRead, size) after each
+                     chunk, returning False cancels with StreamCancelled
+    :param chunkSize: int. bytes read per chunk
+    :return: QJsonProfile. profile
+    """
+    size = os.path.getsize(path)
+    result = QJsonProfile(path, size)
+    counts = result.counts
+    keys = result.keys
+    arrayLengths = result.arrayLengths
+    largest = result.largest
+    finditer = _TOKEN.finditer
+
+    stack = []
+    maxDepth = 0
+    documents = 0
+    arrays = arrayItems = maxArrayLength = 0
+    order = 0
+    # counters held in locals, the loop runs once per token
+    strings = numbers = booleans = nulls = 0
+
+    offset = 0
+    carry = b''
+    with QJsonInput(path) as f:
+        while True:
+            chunk = f.read(chunkSize)
+            final = not chunk
+            buffer = carry + chunk if carry else chunk
+            carry = b''
+            end = len(buffer)
+
+            for match in finditer(buffer):
+                kind = match.lastindex
+
+                if kind == _PARTIAL or (kind >= _NUMBER and match.end() == end):
+                    # the token may go on in the next chunk
+                    start = match.start(kind)
+                    if not final and (buffer[start] == 34 or match.end() == end):
+                        carry = buffer[start:]
+                        break
+                    if kind == _PARTIAL:
+                        continue
+
+                frame = stack[-1] if stack else None
+                if frame is not None and frame[_EXPECT_KEY]:
+                    if kind == _STRING:
+                        key = match.group(1)
+                        frame[_KEY] = key
+                        frame[_EXPECT_KEY] = False
+                        keys[key] = keys.get(key, 0) + 1
+                        if len(keys) > MAX_KEYS:
+                            frequent = heapq.nlargest(MAX_KEYS // 2, keys.items(), key=lambda item: item[1])
+                            keys.clear()
+                            keys.update(frequent)
+                            result.keysApproximate = True
+                        continue
+                    if kind != _CLOSE:
+                        # a value without a key, invalid text is skipped
+                        continue
+
+                if kind == _CLOSE:
+                    if frame is None:
+                        continue
+                    stack.pop()
+                    children = frame[_COUNT]
+                    if not frame[_OBJECT]:
+                        arrays += 1
+                        arrayItems += children
+                        if children > maxArrayLength:
+                            maxArrayLength = children
+                        digits = len(str(children)) if children else 0
+                        arrayLengths[digits] = arrayLengths.get(digits, 0) + 1
+                    if stack:
+                        nbytes = offset + match.end() - frame[_START]
+                        if len(largest) < LARGEST_SUBTREES or nbytes > largest[0][0]:
+                            names = [parent[_NAME] for parent in stack[1:]]
+                            names.append(frame[_NAME])
+                            order += 1
+                            entry = (nbytes, -order, _path(names),
+                                     'object' if frame[_OBJECT] else 'array', children)
+                            if len(largest) < LARGEST_SUBTREES:
+                                heapq.heappush(largest, entry)
+                            else:
+                                heapq.heapreplace(largest, entry)
+                    continue
+
+                # a value: the entry of the enclosing container, if any
+                if frame is None:
+                    documents += 1
+                    name = None
+                else:
+                    if frame[_OBJECT]:
+                        name = frame[_KEY]
+                        frame[_EXPECT_KEY] = True
+                    else:
+                        name = frame[_COUNT]
+                    frame[_COUNT] += 1
+
+                if kind == _STRING:
+                    strings += 1
+                elif kind == _OPEN:
+                    start = match.start(_OPEN)
+                    isObject = buffer[start] == 123
+                    stack.append([isObject, offset + start, 0, isObject, None, name])
+                    if len(stack) > maxDepth:
+                        maxDepth = len(stack)
+                    counts['object' if isObject else 'array'] += 1
+                elif kind == _NUMBER:
+                    numbers += 1
+                elif kind == _BOOLEAN:
+                    booleans += 1
+                else:
+                    nulls += 1
+
+            offset += end - len(carry)
+            if progress is not None and progress(f.position(), size) is False:
+                raise StreamCancelled()
+            if final:
+                break
+
+    counts['string'] += strings
+    counts['number'] += numbers
+    counts['boolean'] += booleans
+    counts['null'] += nulls
+    result.contentSize = offset
+    result.maxDepth = maxDepth
+    result.documents = documents
+    result.arrays = arrays
+    result.arrayItems = arrayItems
+    result.maxArrayLength = maxArrayLength
+    result.complete = not stack and documents > 0
+    return result
+
+
+def run(path, queue):
+    """
+    Profile a file in a child process, reporting to the parent through a
+    queue: ('progress', bytesRead, size) messages, then ('done', profile as
+    a dict) or ('error', message)
+
+    :param path: str. path of the file
+    :param queue: multiprocessing.Queue. messages to the parent
+    """
+    def progress(done, total):
+        # the parent drops the stale progress messages it does not read
+        try:
+            queue.put_nowait(('progress', done, total))
+        except queueModule.Full:
+            pass
+        return True
+
+    try:
+        data = profile(path, progress).asDict()
+    except Exception as e:
+        queue.put(('error', str(e)))
+        return
+    queue.put(('done', data))
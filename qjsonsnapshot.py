@@ -0,0 +1,218 @@
+"""
+The snapshot module holds immutable versions of a QJsonNode tree. A snapshot
+shares every unchanged subtree with the previous snapshots of the same tree,
+so taking one after an edit only copies the containers on the edited path.
+Snapshots are never modified, they can be kept for undo or read from another
+thread while the tree keeps being edited, e.g. written to a file by
+qjsonloader.QJsonSaver.
+"""
+
+
+import json
+from itertools import chain
+from operator import itemgetter
+
+import qjsoncodec
+
+
+_encodeString = json.encoder.encode_basestring_ascii
+
+
+class QJsonSnapshot(object):
+    __slots__ = ('_dtype', '_keys', '_values', '_pending')
+
+    def __init__(self, dtype, keys, values, pending=None):
+        """
+        Initialization
+
+        :param dtype: type. dict or list
+        :param keys: tuple. keys of the entries, None for lists
+        :param values: tuple. entry values, QJsonSnapshot for container
+                       nodes, plain python values otherwise
+        :param pending: object. entries following the values that were never
+                        expanded, a pending children source of QJsonNode that
+                        is never consumed by the snapshot
+        """
+        self._dtype = dtype
+        self._keys = keys
+        self._values = values
+        self._pending = pending
+
+    @property
+    def dtype(self):
+        """
+        Get value data type of the snapshot
+        """
+        return self._dtype
+
+    @property
+    def childCount(self):
+        """
+        Get the number of expanded entries of the snapshot
+        :return: int.
+        """
+        return len(self._values)
+
+    def pending(self):
+        """
+        Get a source of the entries that were never expanded
+
+        :return: object. pending children source, None if all are expanded
+        """
+        if self._pending is None:
+            return None
+        return self._pending.copy()
+
+    def items(self):
+        """
+        Iterate over the expanded (key, value) entries, list entries have a
+        None key
+
+        :return: iterator of tuple.
+        """
+        if self._keys is None:
+            return ((None, value) for value in self._values)
+        return zip(self._keys, self._values)
+
+    def _entries(self, sortKeys=False):
+        """
+        Iterate over every (key, value) entry, the expanded ones first
+
+        :param sortKeys: bool. sort object entries by key
+        :return: iterator of tuple.
+        """
+        entries = self.items()
+        if self._pending is not None:
+            entries = chain(entries, self._pending.rest())
+        if sortKeys and self._dtype is dict:
+            return iter(sorted(entries, key=itemgetter(0)))
+        return entries
+
+    def iterJson(self, indent=4, sortKeys=False, chunkSize=64 * 1024):
+        """
+        Serialize the snapshot to JSON text chunk by chunk, the text is the
+        one QJsonNode.iterJson() gives for the tree it was taken from
+
+        :param indent: int. indentation width, None for compact output
+        :param sortKeys: bool. sort object keys
+        :param chunkSize: int. approximate size of the yielded chunks
+        :return: iterator of str. JSON text chunks
+        """
+        if indent is None:
+            colon = ':'
+            encoder = json.JSONEncoder(sort_keys=sortKeys, separators=(',', ':'))
+        else:
+            colon = ': '
+            encoder = json.JSONEncoder(sort_keys=sortKeys, indent=indent)
+
+        buffer = []
+        size = 0
+        # frames: entries, keyed, level, padding, separator
+        stack = []
+        opening = (self, 0)
+        while opening is not None or stack:
+            if opening is not None:
+                snapshot, level = opening
+                opening = None
+                keyed = snapshot._dtype is dict
+                if not snapshot._values and snapshot._pending is None:
+                    buffer.append('{}' if keyed else '[]')
+                else:
+                    buffer.append('{' if keyed else '[')
+                    pad = '' if indent is None else '\n' + ' ' * (indent * (level + 1))
+                    stack.append([snapshot._entries(sortKeys), keyed, level, pad, pad])
+
+            else:
+                frame = stack[-1]
+                entries, keyed, level, pad, separator = frame
+
+                for key, value in entries:
+                    buffer.append(separator)
+                    separator = frame[4] = ',' + pad
+                    if keyed:
+                        buffer.append(_encodeString(key if key.__class__ is str else json.dumps(key)))
+                        buffer.append(colon)
+
+                    if isinstance(value, QJsonSnapshot):
+                        opening = (value, level + 1)
+                        break
+                    for chunk in encoder.iterencode(value):
+                        buffer.append(chunk if indent is None else chunk.replace('\n', pad))
+                        size += len(chunk)
+
+                    if len(buffer) >= 4096 or size >= chunkSize:
+                        break
+                else:
+                    stack.pop()
+                    if indent is not None:
+                        buffer.append('\n' + ' ' * (indent * level))
+                    buffer.append('}' if keyed else ']')
+
+            if size >= chunkSize or len(buffer) >= 4096:
+                yield ''.join(buffer)
+                buffer = []
+                size = 0
+
+        if buffer:
+            yield ''.join(buffer)
+
+    def dump(self, fp, indent=4, sortKeys=False):
+        """
+        Write the snapshot as JSON text to a file object
+
+        :param fp: file. text file object opened for writing
+        :param indent: int. indentation width, None for compact output
+        :param sortKeys: bool. sort object keys
+        """
+        write = fp.write
+        for chunk in self.iterJson(indent, sortKeys):
+            write(chunk)
+
+    def dumpLines(self, fp):
+        """
+        Write the elements of a list snapshot as JSON Lines, one compact value
+        per line, see QJsonNode.dumpLines()
+
+        :param fp: file. text file object opened for writing
+        """
+        write = fp.write
+        if self._dtype is not list:
+            self.dump(fp, None)
+            write('\n')
+            return
+
+        for _, value in self._entries():
+            if isinstance(value, QJsonSnapshot):
+                self.__class__.dump(value, fp, None)
+            else:
+                write(qjsoncodec.dumps(value, None))
+            write('\n')
+
+    def toPython(self):
+        """
+        Rebuild the plain python value of the snapshot
+
+        :return: dict or list. value
+        """
+        output = self._dtype()
+        stack = [(self, output)]
+        while stack:
+            snapshot, target = stack.pop()
+            keyed = snapshot._keys is not None
+
+            entries = snapshot.items()
+            if snapshot._pending is not None:
+                entries = chain(entries, snapshot._pending.rest())
+
+            for key, value in entries:
+                if isinstance(value, QJsonSnapshot):
+                    child = value._dtype()
+                    stack.append((value, child))
+                    value = child
+
+                if keyed:
+                    target[key] = value
+                else:
+                    target.append(value)
+
+        return output
@@ -0,0 +1,369 @@
+"""
+The source map module relates the entries of a tree to their location in the
+JSON text shown in the Raw View. Entries are addressed by their path of rows
+from the root, which is the same in the text and in the tree since nodes keep
+the document order.
+
+Nothing is computed when a map is created. The first time an entry is looked
+up, the containers on its path are scanned as far as needed, and the offsets
+of their entries are kept in arrays. Scanning skips each entry structurally,
+like the file index (see qjsonindex): strings and scalars are matched by
+regular expressions and nested containers are skipped by counting brackets,
+nothing is decoded. Later lookups are binary searches in these arrays,
+O(log n) per level.
+"""
+
+
+from array import array
+from bisect import bisect_left, bisect_right
+import re
+
+
+# entries scanned at a time when looking for a text position
+SCAN_BATCH = 1000
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# characters outside the basic plane take two positions in a Qt text cursor
+_ASTRAL = re.compile('[\U00010000-\U0010ffff]')
+
+# the characters of a string but a quote or a backslash, written as ranges:
+# the regular expression engine matches them faster than a negated set
+_STRING_CHARS = r'[\x00-\x21\x23-\x5b\x5d-\U0010ffff]*'
+# a string, escapes included
+_STRING = re.compile(r'"' + _STRING_CHARS + r'(?:\\.' + _STRING_CHARS + r')*"', re.DOTALL)
+# a number or a literal, they are not checked
+_SCALAR = re.compile(r'-?[0-9][0-9.eE+\-]*|true|false|null')
+
+
+def _nestedPattern(depth):
+    """
+    Build a regular expression matching a string or a whole container
+    nested at most depth levels deep, see qjsonindex
+
+    :param depth: int. nesting levels
+    :return: str. pattern
+    """
+    text = r'[^"\[\]{}]*'
+    pattern = string = _STRING.pattern
+    for _ in range(depth):
+        pattern = string + r'|[\[{]' + text + r'(?:(?:' + pattern + r')' + text + r')*[\]}]'
+    return pattern
+
+
+# containers up to this deep are skipped by a single match, bounded to
+# NESTED_WINDOW characters, larger containers are entered to be skipped.
+# Entering a container costs more in python than in the file index
+NESTED_DEPTH = 5
+NESTED_WINDOW = 64 * 1024
+# compiled patterns by name, the first time a container is skipped since
+# compiling them takes a tenth of a second
+_PATTERNS = {}
+
+_CLOSING = {'{': '}', '[': ']'}
+
+
+class QJsonSourceMap(object):
+    def __init__(self, text, revision=None):
+        """
+        Initialization
+
+        :param text: str. JSON text of the whole tree, with '\\n' line breaks
+                     like the text of a QTextDocument
+        :param revision: int. revision of the text document holding the text,
+                         see isValid()
+        """
+        self._text = text
+        self._revision = revision
+
+        # offsets of the top-level value, whitespace excluded
+        start = _WHITESPACE.match(text, 1 if text.startswith('\ufeff') else 0).end()
+        self._start = start
+        self._end = max(start, len(text.rstrip(' \t\n\r')))
+        # containers scanned so far, by path
+        self._containers = {}
+
+        # positions of the characters counted twice by Qt, and the same
+        # positions in cursor units
+        self._astral = None
+        self._astralCursor = None
+        if not text.isascii():
+            astral = array('q', (match.start() for match in _ASTRAL.finditer(text)))
+            if astral:
+                self._astral = astral
+                self._astralCursor = array('q', (position + i for i, position in enumerate(astral)))
+        # length of the text in cursor positions
+        self._length = len(text) + (len(self._astral) if self._astral is not None else 0)
+
+    def isValid(self, revision, length):
+        """
+        Check whether the map still describes the text of a document
+
+        :param revision: int. current revision of the document
+        :param length: int. length of its text in cursor positions
+        :return: bool.
+        """
+        return length == self._length and (self._revision is None or self._revision == revision)
+
+    def toCursor(self, position):
+        """
+        Convert a text position to a Qt text cursor position
+
+        :param position: int. index in the text
+        :return: int. cursor position
+        """
+        if self._astral is None:
+            return position
+        return position + bisect_left(self._astral, position)
+
+    def fromCursor(self, position):
+        """
+        Convert a Qt text cursor position to a text position
+
+        :param position: int. cursor position
+        :return: int. index in the text
+        """
+        if self._astral is None:
+            return position
+        return position - bisect_left(self._astralCursor, position)
+
+    def span(self, path):
+        """
+        Get the location of an entry, from the start of its key (for object
+        entries) to the end of its value
+
+        :param path: sequence of int. rows from the root, empty for the root
+        :return: tuple. (start, end) text positions, None if not in the text
+        """
+        start, end = self._start, self._end
+        if start >= end:
+            return None
+
+        for depth, row in enumerate(path):
+            container = self._container(tuple(path[:depth]), start)
+            if container is None:
+                return None
+            if row >= len(container.starts):
+                container.scan(row + 1 - len(container.starts))
+                if row >= len(container.starts):
+                    return None
+
+            if depth == len(path) - 1:
+                return container.entryStart(row), container.ends[row]
+            start = container.starts[row]
+
+        return start, end
+
+    def path(self, position):
+        """
+        Get the deepest entry holding a text position
+
+        :param position: int. index in the text
+        :return: tuple of int. rows from the root, empty for the root or a
+                 position outside of any entry
+        """
+        path = []
+        start = self._start
+        if not start <= position < self._end:
+            return ()
+
+        while True:
+            container = self._container(tuple(path), start)
+            if container is None:
+                break
+
+            ends = container.ends
+            while not container.closed and (not ends or ends[-1] <= position):
+                if not container.scan(SCAN_BATCH):
+                    break
+
+            row = bisect_right(ends, position)
+            if row >= len(ends) or container.entryStart(row) > position:
+                break
+            path.append(row)
+
+            start = container.starts[row]
+            if not start <= position < ends[row]:
+                break
+
+        return tuple(path)
+
+    def _container(self, path, start):
+        """
+        Get the scanned container whose value starts at a position
+
+        :param path: tuple of int. path of the container
+        :param start: int. position of its opening bracket
+        :return: _SourceContainer. container, None for a scalar value
+        """
+        container = self._containers.get(path)
+        if container is None:
+            closing = _CLOSING.get(self._text[start:start + 1])
+            if closing is None:
+                return None
+            container = self._containers[path] = _SourceContainer(self._text, start, closing)
+        return container
+
+
+class _SourceContainer(object):
+    """
+    Positions of the entries of a container, scanned on demand
+    """
+    __slots__ = ('text', 'closing', 'position', 'closed',
+                 'keyStarts', 'starts', 'ends')
+
+    def __init__(self, text, start, closing):
+        self.text = text
+        self.closing = closing
+        self.position = start + 1
+        self.closed = False
+        self.keyStarts = array('q') if closing == '}' else None
+        self.starts = array('q')
+        self.ends = array('q')
+
+        position = _WHITESPACE.match(text, self.position).end()
+        if text[position:position + 1] == closing:
+            self.closed = True
+
+    def entryStart(self, row):
+        """
+        Get the start of an entry, its key for objects
+
+        :param row: int. row of the entry
+        :return: int. text position
+        """
+        if self.keyStarts is not None:
+            return self.keyStarts[row]
+        return self.starts[row]
+
+    def scan(self, count):
+        """
+        Record the positions of the next entries, a text that is not valid
+        JSON stops the scan
+
+        :param count: int. maximum number of entries
+        :return: int. number of entries recorded
+        """
+        text = self.text
+        whitespace = _WHITESPACE.match
+        keyStarts = self.keyStarts
+        found = 0
+        while found < count and not self.closed:
+            try:
+                current = whitespace(text, self.position).end()
+                keyStart = current
+                if keyStarts is not None:
+                    if text[current] != '"':
+                        raise ValueError(current)
+                    current = _skipString(text, current)
+                    current = whitespace(text, current).end()
+                    if text[current] != ':':
+                        raise ValueError(current)
+                    current = whitespace(text, current + 1).end()
+
+                valueStart = current
+                valueEnd = _skipValue(text, current)
+                current = whitespace(text, valueEnd).end()
+                char = text[current]
+                if char != ',' and char != self.closing:
+                    raise ValueError(current)
+            except (ValueError, IndexError):
+                self.closed = True
+                break
+
+            if keyStarts is not None:
+                keyStarts.append(keyStart)
+            self.starts.append(valueStart)
+            self.ends.append(valueEnd)
+            found += 1
+
+            self.position = current + 1
+            if char == self.closing:
+                self.closed = True
+        return found
+
+
+def _skipPatterns():
+    """
+    Get the patterns skipping containers, see _skipValue()
+
+    :return: tuple of re.Pattern. (nested, content) patterns
+    """
+    if not _PATTERNS:
+        nested = _nestedPattern(NESTED_DEPTH)
+        _PATTERNS['nested'] = re.compile(nested, re.DOTALL)
+        # the text up to the next bracket that is not part of a string or of
+        # a small container, or to a string left open or longer than the window
+        _PATTERNS['content'] = re.compile(r'[^"\[\]{}]*(?:(?:' + nested + r')[^"\[\]{}]*)*', re.DOTALL)
+    return _PATTERNS['nested'], _PATTERNS['content']
+
+
+def _skipValue(text, position):
+    """
+    Find the end of the value starting at a position, without decoding it.
+    A nested container is skipped by counting its brackets; the strings it
+    holds, and the containers that are small and shallow enough, are
+    matched whole along with the text between them.
+
+    :param text: str. JSON text
+    :param position: int. position of the first character of the value
+    :return: int. position after the value
+    """
+    char = text[position]
+    if char == '"':
+        return _skipString(text, position)
+    if char not in _CLOSING:
+        match = _SCALAR.match(text, position)
+        if match is None:
+            raise ValueError(position)
+        return match.end()
+
+    nested, content = _skipPatterns()
+    nested = nested.match
+    content = content.match
+    size = len(text)
+    depth = 0
+    while True:
+        char = text[position]
+        if char in _CLOSING:
+            match = nested(text, position, min(size, position + NESTED_WINDOW))
+            if match is None:
+                depth += 1
+                position += 1
+            elif depth:
+                position = match.end()
+            else:
+                return match.end()
+        elif char == '"':
+            # a string longer than the window
+            position = _skipString(text, position)
+        elif char == ']' or char == '}':
+            depth -= 1
+            position += 1
+            if not depth:
+                return position
+        position = content(text, position, min(size, position + NESTED_WINDOW)).end()
+
+
+def _skipString(text, position):
+    """
+    Find the end of the string starting at a position. The closing quote is
+    looked for with str.find, faster than a regular expression on long
+    strings, and skipped over while it is escaped
+
+    :param text: str. JSON text
+    :param position: int. position of the opening quote
+    :return: int. position after the closing quote
+    """
+    find = text.find
+    end = find('"', position + 1)
+    while end != -1 and text[end - 1] == '\\':
+        # the quote is escaped by an odd number of backslashes
+        start = end - 1
+        while text[start - 1] == '\\':
+            start -= 1
+        if not (end - start) % 2:
+            break
+        end = find('"', end + 1)
+    if end == -1:
+        raise ValueError(position)
+    return end + 1
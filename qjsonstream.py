@@ -0,0 +1,464 @@
+"""
+The stream module parses a JSON document from chunks of text instead of one
+string holding the whole file. The top-level container is split into its
+entries as the text arrives, and each entry is decoded on its own with the C
+decoder of the json module. An entry holding a container that does not end
+in the text received so far is split the same way, at any depth, so the
+parser only buffers the string or number cut by the end of the text.
+
+Documents of any size can be read this way, with progress reporting and
+cancellation between chunks. The parsed document is still held in memory as
+python objects, load() can stop once the text goes over a limit.
+"""
+
+
+import codecs
+import json
+import re
+
+
+# bytes read from the file per chunk
+CHUNK_SIZE = 1024 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_BLANKS = ' \t\n\r'
+
+# decoder errors of an entry that is only truncated by the end of the buffer,
+# the other errors report a position well before it
+_TRUNCATED_MESSAGES = ('Unterminated string',)
+_TRUNCATED_MARGIN = 6
+
+_CLOSING = {dict: '}', list: ']'}
+_OPEN = {'{': dict, '[': list}
+
+_scanString = json.decoder.scanstring
+
+
+class StreamCancelled(Exception):
+    """
+    Raised by load() when the progress callback cancels the parsing
+    """
+
+
+class StreamTooLarge(ValueError):
+    """
+    Raised by load() when the document is larger than its limit
+    """
+
+
+class QJsonStreamParser(object):
+    def __init__(self):
+        """
+        Initialization
+        """
+        # the decoder only shares repeated keys within one call, the hook
+        # shares them across the entries of the whole document
+        keys = {}
+        share = keys.setdefault
+
+        def pairs(entries):
+            return {share(key, key): value for key, value in entries}
+
+        self._decode = json.JSONDecoder(object_pairs_hook=pairs).raw_decode
+        self._share = share
+        self._buffer = ''
+        # chunks fed since the buffer was last parsed, joined when it is
+        self._chunks = []
+        self._chunksLength = 0
+        # characters dropped from the front of the buffer so far
+        self._offset = 0
+        # buffer length required before retrying an incomplete entry, so a
+        # long string is not decoded again for every chunk
+        self._retryLength = 0
+        self._dtype = None
+        # containers being read entry by entry, the top-level one first
+        self._stack = []
+        # a container read entry by entry just ended, its delimiter follows
+        self._delimiter = False
+        self._closed = False
+        self._scalar = None
+        # a line break follows the top-level value
+        self._lineBreak = False
+
+    @property
+    def dtype(self):
+        """
+        Get the type of the top-level value, None until it is known
+        """
+        return self._dtype
+
+    @property
+    def closed(self):
+        """
+        Check whether the whole top-level value has been read
+        :return: bool.
+        """
+        return self._closed
+
+    @property
+    def scalar(self):
+        """
+        Get the value of a document that is not a container, after close()
+        """
+        return self._scalar
+
+    def feed(self, text):
+        """
+        Add the next chunk of the document
+
+        :param text: str. next chunk
+        :return: list of tuple. (key, value) entries read from the chunk,
+                 list entries have a None key. A container value that does
+                 not end in the chunk is returned as soon as it opens and
+                 filled as the next chunks are fed
+        """
+        if text:
+            self._chunks.append(text)
+            self._chunksLength += len(text)
+
+        if self._dtype is None:
+            self._join()
+            if not self._start():
+                return []
+        if self._closed:
+            self._join()
+            self._checkTail()
+            return []
+        # scalar documents are decoded as a whole by close()
+        if self._dtype not in _CLOSING or len(self._buffer) + self._chunksLength < self._retryLength:
+            return []
+
+        self._join()
+        return self._parse(final=False)
+
+    def close(self):
+        """
+        Finish the document once all the chunks are fed
+
+        :return: list of tuple. the remaining (key, value) entries
+        """
+        self._join()
+        if self._dtype is None and not self._start():
+            raise self._error('Expecting value', 0)
+
+        entries = []
+        if self._dtype not in _CLOSING:
+            try:
+                self._scalar = json.loads(self._buffer)
+            except json.JSONDecodeError as e:
+                raise self._error(e.msg, e.pos)
+            self._dtype = type(self._scalar)
+            self._consume(len(self._buffer))
+            self._closed = True
+        elif not self._closed:
+            entries = self._parse(final=True)
+
+        self._checkTail()
+        return entries
+
+    def _start(self):
+        """
+        Read the opening of the top-level value
+
+        :return: bool. whether the type of the value is known
+        """
+        buffer = self._buffer
+        # a byte order mark is not part of the document
+        position = 1 if buffer.startswith('\ufeff') and not self._offset else 0
+        position = _WHITESPACE.match(buffer, position).end()
+        if position == len(buffer):
+            self._consume(position)
+            return False
+
+        char = buffer[position]
+        if char == '{':
+            self._dtype = dict
+            position += 1
+        elif char == '[':
+            self._dtype = list
+            position += 1
+        else:
+            self._dtype = object
+        if self._dtype in _CLOSING:
+            self._stack.append(_Frame(self._dtype, None))
+        self._consume(position)
+        return True
+
+    def _parse(self, final):
+        """
+        Decode the complete entries at the front of the buffer. A container
+        value cut by the end of the buffer is entered and its own entries
+        are decoded, its remaining entries are added as the text arrives
+
+        :param final: bool. no more text follows the buffer
+        :return: list of tuple. top-level (key, value) entries
+        """
+        buffer = self._buffer
+        decode = self._decode
+        share = self._share
+        whitespace = _WHITESPACE.match
+        stack = self._stack
+        frame = stack[-1]
+        size = len(buffer)
+
+        entries = []
+        position = 0
+        self._retryLength = 0
+        while True:
+            # each pass starts after an opening bracket, after a comma or
+            # after a container read entry by entry
+            current = whitespace(buffer, position).end()
+            if current == size:
+                if final:
+                    raise self._error('Unexpected end of document', current)
+                break
+
+            char = buffer[current]
+            if self._delimiter:
+                if char != ',' and char != frame.closing:
+                    raise self._error("Expecting ',' delimiter", current)
+                self._delimiter = False
+            elif char == frame.closing and not frame.count:
+                pass
+            else:
+                try:
+                    if frame.keyed:
+                        if char != '"':
+                            raise self._error('Expecting property name enclosed in double quotes', current)
+                        key, current = _scanString(buffer, current + 1)
+                        key = share(key, key)
+                        current = whitespace(buffer, current).end()
+                        if current == size:
+                            raise _Truncated()
+                        if buffer[current] != ':':
+                            raise self._error("Expecting ':' delimiter", current)
+                        current = whitespace(buffer, current + 1).end()
+                    else:
+                        key = None
+
+                    dtype = _OPEN.get(buffer[current:current + 1])
+                    try:
+                        value, current = decode(buffer, current)
+                    except json.JSONDecodeError as e:
+                        if dtype is None or final or not self._truncated(e, size):
+                            raise
+                        # read the container entry by entry
+                        value = dtype()
+                        frame.add(key, value, entries)
+                        frame = _Frame(dtype, value)
+                        stack.append(frame)
+                        position = current + 1
+                        continue
+
+                    # an entry is only complete once its delimiter is there,
+                    # the end of the buffer may cut a number or a literal short
+                    if current == size:
+                        raise _Truncated()
+                    char = buffer[current]
+                    if char in _BLANKS:
+                        current = whitespace(buffer, current).end()
+                        if current == size:
+                            raise _Truncated()
+                        char = buffer[current]
+                    if char != ',' and char != frame.closing:
+                        if current >= size - _TRUNCATED_MARGIN:
+                            raise _Truncated()
+                        raise self._error("Expecting ',' delimiter", current)
+                except json.JSONDecodeError as e:
+                    if final or not self._truncated(e, size):
+                        raise self._error(e.msg, e.pos)
+                    self._retryLength = 2 * (size - position)
+                    break
+                except _Truncated:
+                    if final:
+                        raise self._error('Unexpected end of document', size)
+                    self._retryLength = 2 * (size - position)
+                    break
+
+                frame.add(key, value, entries)
+
+            position = current + 1
+            if char == frame.closing:
+                stack.pop()
+                if not stack:
+                    self._closed = True
+                    break
+                frame = stack[-1]
+                self._delimiter = True
+
+        self._consume(position)
+        return entries
+
+    def _truncated(self, error, size):
+        """
+        Check whether a decoder error comes from the end of the buffer
+
+        :param error: json.JSONDecodeError. error
+        :param size: int. buffer length
+        :return: bool.
+        """
+        if error.pos >= size - _TRUNCATED_MARGIN:
+            return True
+        return error.msg.startswith(_TRUNCATED_MESSAGES)
+
+    def _join(self):
+        """
+        Append the chunks fed since the last parsing to the buffer
+        """
+        if self._chunks:
+            self._chunks.insert(0, self._buffer)
+            self._buffer = ''.join(self._chunks)
+            self._chunks = []
+            self._chunksLength = 0
+
+    def _consume(self, position):
+        """
+        Drop the parsed text from the front of the buffer
+
+        :param position: int. length of the parsed text
+        """
+        if position:
+            self._buffer = self._buffer[position:]
+            self._offset += position
+
+    def _checkTail(self):
+        """
+        Only whitespace may follow the top-level value
+        """
+        buffer = self._buffer
+        position = _WHITESPACE.match(buffer).end()
+        if not self._lineBreak:
+            self._lineBreak = '\n' in buffer[:position]
+        if position != len(buffer):
+            error = self._error('Extra data', position)
+            raise StreamExtraData(str(error), self._lineBreak)
+        self._consume(position)
+
+    def _error(self, message, position):
+        """
+        Build a decoding error positioned in the whole document
+
+        :param message: str. error message
+        :param position: int. position in the current buffer
+        :return: ValueError. the error
+        """
+        return ValueError('{}: char {}'.format(message, self._offset + position))
+
+
+class _Frame(object):
+    """
+    A container read entry by entry
+    """
+    __slots__ = ('keyed', 'closing', 'container', 'count')
+
+    def __init__(self, dtype, container):
+        """
+        Initialization
+
+        :param dtype: type. dict or list
+        :param container: dict or list. value the entries are added to, None
+                          for the top-level container, whose entries are
+                          returned by the parser
+        """
+        self.keyed = dtype is dict
+        self.closing = _CLOSING[dtype]
+        self.container = container
+        self.count = 0
+
+    def add(self, key, value, entries):
+        """
+        Add an entry to the container
+
+        :param key: str. key of the entry, None in a list
+        :param value: mixed. value
+        :param entries: list. top-level entries returned by the parser
+        """
+        if self.container is None:
+            entries.append((key, value))
+        elif self.keyed:
+            self.container[key] = value
+        else:
+            self.container.append(value)
+        self.count += 1
+
+
+class StreamExtraData(ValueError):
+    """
+    Raised by the parser when more content follows the top-level value
+    """
+    def __init__(self, message, lineBreak):
+        """
+        Initialization
+
+        :param message: str. error message
+        :param lineBreak: bool. a line break separates the content from the
+                          value, as the records of JSON Lines
+        """
+        super(StreamExtraData, self).__init__(message)
+        self.lineBreak = lineBreak
+
+
+class _Truncated(Exception):
+    """
+    An entry stops at the end of the buffer
+    """
+
+
+def load(fp, size=None, progress=None, chunkSize=CHUNK_SIZE, limit=None):
+    """
+    Parse a JSON document from a binary file object, chunk by chunk
+
+    :param fp: file. binary file object, read until its end
+    :param size: int. total size of the file for progress reports, if known
+    :param progress: callable. called as progress(bytesRead, size) after each
+                     chunk, returning False cancels the parsing
+    :param chunkSize: int. bytes read per chunk
+    :param limit: int. maximum size of the document in bytes, StreamTooLarge
+                  is raised once more is read; None for no limit
+    :return: mixed. parsed document
+    """
+    parser = QJsonStreamParser()
+    decoder = codecs.getincrementaldecoder('utf-8')()
+
+    output = None
+    bytesRead = 0
+    while True:
+        chunk = fp.read(chunkSize)
+        final = not chunk
+        bytesRead += len(chunk)
+        checkLimit(bytesRead, limit)
+
+        entries = parser.feed(decoder.decode(chunk, final))
+        if final:
+            entries.extend(parser.close())
+
+        if entries:
+            if output is None:
+                output = parser.dtype()
+            if parser.dtype is dict:
+                output.update(entries)
+            else:
+                output.extend(value for _, value in entries)
+
+        if progress is not None and progress(bytesRead, size) is False:
+            raise StreamCancelled()
+        if final:
+            break
+
+    if parser.dtype not in _CLOSING:
+        return parser.scalar
+    if output is None:
+        output = parser.dtype()
+    return output
+
+
+def checkLimit(size, limit):
+    """
+    Stop reading a document that is larger than its limit
+
+    :param size: int. bytes of the document read so far
+    :param limit: int. maximum size in bytes, None for no limit
+    """
+    if limit is not None and size > limit:
+        raise StreamTooLarge('The document is larger than {} MB, the limit for documents '
+                             'read as a stream'.format(limit // (1024 * 1024)))
@@ -12,11 +12,11 @@ https://doc.qt.io/qt-5/qmouseevent.html#button
 """
 
 
-import ast
 import os
 
 from Qt import QtWidgets, QtCore, QtGui
 
+import qjsoncodec
 from qjsonnode import QJsonNode
 
 
@@ -24,6 +24,8 @@ class QJsonView(QtWidgets.QTreeView):
     # Emitted when a local file path is dropped onto the view (PyQt5)
     fileDropped = QtCore.pyqtSignal(str)
     dragStartPosition = None
+    # number of edits that can be undone
+    historySize = 50
 
     def __init__(self):
         """
@@ -32,8 +34,11 @@ class QJsonView(QtWidgets.QTreeView):
         super(QJsonView, self).__init__()
 
         self._clipBroad = ''
+        # snapshots of the document taken before each structural edit
+        self._history = []
 
-        # set flags
+        # set flags, rows keep the document order until a header is clicked
+        self.header().setSortIndicator(-1, QtCore.Qt.AscendingOrder)
         self.setSortingEnabled(True)
         self.setDragEnabled(True)
         self.setAcceptDrops(True)
@@ -45,12 +50,49 @@ class QJsonView(QtWidgets.QTreeView):
 
     def setModel(self, model):
         """
-        Extend: set the current model and sort it
+        Extend: set the current model, drop the undo history of the previous
+        one and apply the display order once. The history is also dropped
+        whenever the proxy gets another source model, its snapshots belong
+        to the previous document
 
         :param model: QSortFilterProxyModel. model
         """
+        previous = self.model()
+        if previous is not None and hasattr(previous, 'sourceModelChanged'):
+            try:
+                previous.sourceModelChanged.disconnect(self.clearHistory)
+            except (RuntimeError, TypeError):
+                pass
+
         super(QJsonView, self).setModel(model)
-        self.model().sort(0, QtCore.Qt.AscendingOrder)
+        if model is not None and hasattr(model, 'sourceModelChanged'):
+            model.sourceModelChanged.connect(self.clearHistory)
+        self.clearHistory()
+        self.applySortOrder()
+
+    def setSortKeys(self, enabled):
+        """
+        Custom: choose between sorted keys and the document order
+
+        :param enabled: bool. sort rows by key when True
+        """
+        if enabled:
+            self.header().setSortIndicator(0, QtCore.Qt.AscendingOrder)
+        else:
+            self.header().setSortIndicator(-1, QtCore.Qt.AscendingOrder)
+        self.applySortOrder()
+
+    def applySortOrder(self):
+        """
+        Custom: sort the rows according to the header indicator, a column of
+        -1 restores the document order. QJsonModel sorts its own rows and
+        keeps the order of each container until its children change, edits
+        do not sort the whole tree again
+        """
+        if self.model() is None:
+            return
+        header = self.header()
+        self.model().sort(header.sortIndicatorSection(), header.sortIndicatorOrder())
 
     def openContextMenu(self):
         """
@@ -58,27 +100,36 @@ class QJsonView(QtWidgets.QTreeView):
         """
         contextMenu = QtWidgets.QMenu()
 
+        sourceModel = self.model().sourceModel()
+        editable = sourceModel.structureEditable
+
         indices = self.getSelectedIndices()
         # no selection
         if not indices:
-            addAction = contextMenu.addAction('add entry')
-            addAction.triggered.connect(self.customAdd)
+            if editable:
+                addAction = contextMenu.addAction('add entry')
+                addAction.triggered.connect(self.customAdd)
 
             clearAction = contextMenu.addAction('clear')
             clearAction.triggered.connect(self.clear)
+
+            if editable and self._history:
+                undoAction = contextMenu.addAction('undo')
+                undoAction.triggered.connect(self.undo)
         else:
-            removeAction = contextMenu.addAction('remove entry(s)')
-            removeAction.triggered.connect(lambda: self.remove(indices))
+            if editable:
+                removeAction = contextMenu.addAction('remove entry(s)')
+                removeAction.triggered.connect(lambda: self.remove(indices))
 
             copyAction = contextMenu.addAction('copy entry(s)')
             copyAction.triggered.connect(self.copy)
 
         # single selection
-        if len(indices) == 1:
+        if len(indices) == 1 and editable:
             index = indices[0]
 
             # only allow add when the index is a dictionary or list
-            if index.internalPointer().dtype in [list, dict]:
+            if sourceModel.dataType(index) in [list, dict]:
                 addAction = contextMenu.addAction('add entry')
                 addAction.triggered.connect(lambda: self.customAdd(index=index))
 
@@ -143,7 +194,7 @@ class QJsonView(QtWidgets.QTreeView):
             mimeData = QtCore.QMimeData()
 
             selected = self.asDict(self.getSelectedIndices())
-            mimeData.setText(str(selected))
+            mimeData.setText(qjsoncodec.dumps(selected, None, exact=False))
             drag.setMimeData(mimeData)
 
             drag.exec_()
@@ -182,8 +233,10 @@ class QJsonView(QtWidgets.QTreeView):
         dropIndex = self.model().mapToSource(dropIndex)
 
         # not allowing drop to non dictionary or list
-        if not dropIndex == QtCore.QModelIndex():
-            if dropIndex.internalPointer().dtype not in [list, dict]:
+        if not self.model().sourceModel().structureEditable:
+            event.ignore()
+        elif not dropIndex == QtCore.QModelIndex():
+            if self.model().sourceModel().dataType(dropIndex) not in [list, dict]:
                 event.ignore()
 
     def dropEvent(self, event):
@@ -219,45 +272,94 @@ class QJsonView(QtWidgets.QTreeView):
             return
 
         # Fallback: internal text-based drag/drop
+        if not self.model().sourceModel().structureEditable:
+            event.ignore()
+            return
         dropIndex = self.indexAt(event.pos())
         dropIndex = self.model().mapToSource(dropIndex)
 
-        self.remove(self.getSelectedIndices())
-        self.add(data.text(), dropIndex)
+        # a move is undone in one step, text that cannot be parsed leaves
+        # the document and its history unchanged
+        root = QJsonNode.load(qjsoncodec.loadsLenient(data.text()))
+        self.pushHistory()
+        self._remove(self.getSelectedIndices())
+        self._add(root, dropIndex)
         event.acceptProposedAction()
 
     # custom behavior
 
+    def pushHistory(self):
+        """
+        Custom: record a snapshot of the document before an edit,
+        the snapshot shares all unchanged subtrees with the previous one
+        """
+        sourceModel = self.model().sourceModel()
+        if not sourceModel.structureEditable:
+            return
+
+        self._history.append(sourceModel.snapshot())
+        if len(self._history) > self.historySize:
+            del self._history[0]
+
+    def undo(self):
+        """
+        Custom: restore the document as it was before the last edit
+        """
+        if not self._history:
+            return
+        self.model().sourceModel().restore(self._history.pop())
+
+    def clearHistory(self):
+        """
+        Custom: forget the recorded snapshots, e.g. when a new file is loaded
+        """
+        self._history = []
+
     def remove(self, indices):
         """
         Custom: remove node(s) of specified indices
 
         :param indices: QModelIndex. specified indices
         """
-        for index in indices:
-            currentNode = index.internalPointer()
-            position = currentNode.row()
+        self.pushHistory()
+        self._remove(indices)
 
-            # let the model know we are removing
-            self.model().sourceModel().removeChild(position, index.parent())
+    def _remove(self, indices):
+        """
+        Remove node(s) of specified indices without recording history, as
+        one edit of the model
+
+        :param indices: QModelIndex. specified indices
+        """
+        self.model().sourceModel().removeIndices(indices)
 
     def add(self, text=None, index=QtCore.QModelIndex()):
         """
         Custom: add node(s) under the specified index
 
-        :param text: str. input text for de-serialization
+        :param text: str. JSON text, Python literals are accepted too
         :param index: QModelIndex. parent index
         """
-        # populate items with a temp root
-        root = QJsonNode.load(ast.literal_eval(text))
+        # parsed first, text that cannot be parsed records no history
+        root = QJsonNode.load(qjsoncodec.loadsLenient(text))
+        self.pushHistory()
+        self._add(root, index)
 
+    def _add(self, root, index=QtCore.QModelIndex()):
+        """
+        Add the children of a temp root under the specified index without
+        recording history
+
+        :param root: QJsonNode. temp root holding the node(s) to add
+        :param index: QModelIndex. parent index
+        """
         self.model().sourceModel().addChildren(root.children, index)
-        self.model().sort(0, QtCore.Qt.AscendingOrder)
 
     def clear(self):
         """
         Custom: clear the entire view
         """
+        self.pushHistory()
         self.model().sourceModel().clear()
 
     def copy(self):
@@ -265,7 +367,7 @@ class QJsonView(QtWidgets.QTreeView):
         Custom: copy the selected indices by store the serialized value
         """
         selected = self.asDict(self.getSelectedIndices())
-        self._clipBroad = str(selected)
+        self._clipBroad = qjsoncodec.dumps(selected, None, exact=False)
 
     def paste(self, index):
         """
@@ -287,7 +389,7 @@ class QJsonView(QtWidgets.QTreeView):
 
         # test value
         if not text:
-            text = "{'food': 'pizza', 'fruit': {'apple': 20, 'orange': 15}}"
+            text = '{"food": "pizza", "fruit": {"apple": 20, "orange": 15}}'
 
         dialog = TextEditDialog(text)
         if dialog.exec_():
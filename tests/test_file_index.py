@@ -0,0 +1,95 @@
+"""
+Tests of the structural scan of the indexed file loader
+"""
+
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qjsonindex  # noqa: E402
+from qjsonindex import QJsonFileIndex, QJsonSpan  # noqa: E402
+import qjsonlines  # noqa: E402
+
+
+def entries(span):
+    children = span.children()
+    return list(children.rest()) if children is not None else []
+
+
+def value(item):
+    # the decoded value of an entry handed out by the index
+    if not isinstance(item, QJsonSpan):
+        return item
+    if item.dtype is dict:
+        return {key: value(child) for key, child in entries(item)}
+    return [value(child) for _, child in entries(item)]
+
+
+class QJsonFileIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.document = {
+            'meta': {'note': 'brackets ] } [ { and "escapes" \\ in strings', 'deep': [[[[[[1, {'x': []}]]]]]]},
+            'data': [{'id': i, 'tags': ['a', ']'], 'more': {'z': [i, {}]}} for i in range(200)],
+            'text': 'x' * 300,
+            'last': [1.5e3, True, False, None, -2],
+        }
+        self.indexes = []
+
+    def tearDown(self):
+        for index in self.indexes:
+            index.close()
+        shutil.rmtree(self.directory)
+
+    def index(self, text):
+        path = os.path.join(self.directory, '{}.json'.format(len(self.indexes)))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        index = QJsonFileIndex(path)
+        self.indexes.append(index)
+        return index
+
+    def checkDocument(self):
+        for indent in (None, 4):
+            root = self.index(json.dumps(self.document, indent=indent)).root()
+            self.assertEqual([key for key, _ in entries(root)], list(self.document))
+            self.assertEqual(value(root), self.document)
+
+    def test_scan(self):
+        self.checkDocument()
+
+    def test_scan_small_window(self):
+        # containers and strings larger than the window are entered or
+        # matched on their own
+        window = qjsonindex.NESTED_WINDOW
+        qjsonindex.NESTED_WINDOW = 16
+        try:
+            self.checkDocument()
+        finally:
+            qjsonindex.NESTED_WINDOW = window
+
+    def test_errors(self):
+        for text in ('{"a": [1, 2}, "b": 1', '{"a": [1, "open]}', '{"a": {"b": 1}', '[1 2]', '{"a" 1}'):
+            with self.assertRaises(ValueError, msg=text):
+                entries(self.index(text).root())
+
+    def test_sniff_json_lines(self):
+        # the first line is read to its end, longer than the first read
+        record = {'text': 'x' * (2 * qjsonlines.SNIFF_BYTES)}
+        for text, expected in ((json.dumps(record) + '\n' + json.dumps(record) + '\n', True),
+                               (json.dumps(record, indent=4) + '\n', False),
+                               (json.dumps([record, record]) + '\n\n', False)):
+            path = os.path.join(self.directory, 'records.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            self.assertEqual(qjsonlines.isJsonLines(path), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
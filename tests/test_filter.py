@@ -0,0 +1,154 @@
+"""
+Tests of the filter proxy model over a QJsonModel
+
+Requires a Qt binding, runs without a display (offscreen platform).
+"""
+
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtCore, QtWidgets  # noqa: E402
+
+from qjsonfilter import QJsonFilterIndex, QJsonFilterProxyModel  # noqa: E402
+from qjsonindex import QJsonFileIndex  # noqa: E402
+from qjsonmodel import QJsonModel  # noqa: E402
+from qjsonnode import QJsonNode  # noqa: E402
+
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def keys(proxy, parent=QtCore.QModelIndex()):
+    return [proxy.index(row, 0, parent).data() for row in range(proxy.rowCount(parent))]
+
+
+class QJsonFilterProxyModelTest(unittest.TestCase):
+    def setUp(self):
+        self.model = QJsonModel(QJsonNode.load({'object': {'b': 1, 'd': 2, 'f': 3}, 'other': {'q': 1}}))
+        self.proxy = QJsonFilterProxyModel()
+        self.proxy.setSourceModel(self.model)
+
+    def test_filter(self):
+        self.proxy.setFilterText('q')
+        self.assertEqual(keys(self.proxy), ['other'])
+        self.proxy.setFilterText('')
+        self.assertEqual(keys(self.proxy), ['object', 'other'])
+
+    def test_add_while_sorted_and_filtered(self):
+        # rows added to a sorted object are announced at their sorted
+        # position, not at their row in the document
+        self.proxy.sort(0, QtCore.Qt.AscendingOrder)
+        parent = self.model.index(0, 0)
+        self.assertEqual(self.model.getNode(parent).key, 'object')
+        # the rows are shown once, as when the object was expanded
+        self.assertEqual(keys(self.proxy, self.proxy.mapFromSource(parent)), ['b', 'd', 'f'])
+        self.proxy.setFilterText('q')
+        self.assertEqual(keys(self.proxy), ['other'])
+
+        self.model.addChildren(QJsonNode.load({'aq': 9}).children, parent)
+        proxyParent = self.proxy.mapFromSource(parent)
+        self.assertEqual(keys(self.proxy), ['object', 'other'])
+        self.assertEqual(keys(self.proxy, proxyParent), ['aq'])
+
+        self.proxy.setFilterText('')
+        self.assertEqual(keys(self.proxy, self.proxy.mapFromSource(parent)), ['aq', 'b', 'd', 'f'])
+
+    def test_batch_remove(self):
+        entries = {}
+        for i in range(40):
+            entries['q{}'.format(i)] = i
+            entries['z{}'.format(i)] = i
+        self.model = QJsonModel(QJsonNode.load({'many': entries, 'other': {'q': 1}}))
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterText('q')
+        self.assertEqual(keys(self.proxy), ['many', 'other'])
+
+        # more ranges than batchRangeLimit, removed as one layout change
+        parent = self.model.index(0, 0)
+        self.model.removeIndices([self.model.index(row, 0, parent) for row in range(0, 80, 2)])
+        self.assertEqual(keys(self.proxy), ['other'])
+
+    def test_lazy_entries(self):
+        # entries not created yet keep their lazily loaded node visible,
+        # they are filtered as they are expanded
+        document = {'object': {'b': 1, 'deep': {'needle': [1, 2]}}, 'other': {'q': 1}}
+        self.model = QJsonModel(QJsonNode.load(document, lazy=True))
+        self.model.fetchMore(QtCore.QModelIndex())
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterText('needle')
+        self.assertEqual(keys(self.proxy), ['object'])
+        self.assertFalse(self.proxy.isPartial())
+
+        parent = self.model.index(0, 0)
+        self.model.fetchMore(parent)
+        self.assertEqual(keys(self.proxy, self.proxy.mapFromSource(parent)), ['deep'])
+
+    def test_edit(self):
+        self.proxy.setFilterText('q')
+        self.assertEqual(keys(self.proxy), ['other'])
+
+        # the edited row is filtered again, the index is kept
+        parent = self.model.index(0, 0)
+        self.model.setData(self.model.index(0, 0, parent), 'bq', QtCore.Qt.EditRole)
+        self.assertEqual(keys(self.proxy), ['object', 'other'])
+        self.assertEqual(keys(self.proxy, self.proxy.mapFromSource(parent)), ['bq'])
+        self.model.setData(self.model.index(0, 0, self.model.index(1, 0)), 'z', QtCore.Qt.EditRole)
+        self.assertEqual(keys(self.proxy), ['object'])
+        self.assertIsNotNone(self.proxy._filterIndex)
+
+        # rows created after an edit are still indexed
+        self.model = QJsonModel(QJsonNode.load({'a': {'q': 1}, 'b': {'c': {'q': 2}}}, lazy=True))
+        self.model.fetchMore(QtCore.QModelIndex())
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterText('q')
+        self.model.setData(self.model.index(0, 0), 'aa', QtCore.Qt.EditRole)
+        self.assertEqual(keys(self.proxy), ['aa', 'b'])
+        parent = self.model.index(1, 0)
+        self.model.fetchMore(parent)
+        self.assertEqual(keys(self.proxy, self.proxy.mapFromSource(parent)), ['c'])
+
+    def test_edit_longer_text(self):
+        # an edited node matching the shorter text only is dropped when the
+        # text gets longer, like in a fresh index
+        index = QJsonFilterIndex({'B': None, 'C': None}.get)
+        index.add([('C', 'k1', 'abc'), ('B', 'k2', 'zzz')])
+        index.update([('B', 'k2', 'ab')])
+        self.assertEqual(index.query('ab'), {'B', 'C'})
+        self.assertEqual(index.query('abc'), {'C'})
+
+    def test_partial(self):
+        # entries of an indexed file are only searched once expanded
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'document.json')
+        with open(path, 'w') as f:
+            json.dump({'object': {'needle': 1}, 'other': {'q': 1}}, f)
+        index = QJsonFileIndex(path)
+        self.addCleanup(index.close)
+
+        self.model = QJsonModel(QJsonNode.load(index.root(), lazy=True))
+        self.model.fetchMore(QtCore.QModelIndex())
+        self.proxy.setSourceModel(self.model)
+        changes = []
+        self.proxy.partialChanged.connect(changes.append)
+        self.proxy.setFilterText('needle')
+        self.assertTrue(self.proxy.isPartial())
+        self.assertEqual(changes, [True])
+
+        for row in range(2):
+            self.model.fetchMore(self.model.index(row, 0))
+        self.assertFalse(self.proxy.isPartial())
+        self.assertEqual(keys(self.proxy), ['object'])
+        self.assertEqual(changes, [True, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
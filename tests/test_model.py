@@ -0,0 +1,138 @@
+"""
+Tests of QJsonModel edits
+
+Requires a Qt binding, runs without a display (offscreen platform).
+"""
+
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtCore, QtWidgets  # noqa: E402
+
+from qjsonfilter import QJsonFilterProxyModel  # noqa: E402
+from qjsonloader import QJsonSaver  # noqa: E402
+from qjsonmodel import QJsonModel, QJsonStoreModel  # noqa: E402
+from qjsonnode import QJsonNode  # noqa: E402
+from qjsonstore import QJsonStore  # noqa: E402
+from qjsonview import QJsonView  # noqa: E402
+
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+class QJsonModelTest(unittest.TestCase):
+    def test_add_to_lazy_node(self):
+        # adding a child does not create the children not fetched yet
+        model = QJsonModel(QJsonNode.load({'items': list(range(5000))}, lazy=True))
+        model.fetchMore(QtCore.QModelIndex())
+        items = model.index(0, 0)
+        model.fetchMore(items)
+        self.assertEqual(model.rowCount(items), model.fetchBatchSize)
+
+        model.addChildren(QJsonNode.load(['tail']).children, items)
+        self.assertEqual(model.rowCount(items), model.fetchBatchSize)
+        self.assertEqual(model.data(model.index(0, 1), QtCore.Qt.DisplayRole), '[5,001 items]')
+        self.assertEqual(model.asDict()['items'][-2:], [4999, 'tail'])
+
+        while model.canFetchMore(items):
+            model.fetchMore(items)
+        self.assertEqual(model.rowCount(items), 5001)
+        self.assertEqual(model.getNode(model.index(5000, 0, items)).value, 'tail')
+
+    def test_add_list_to_object(self):
+        # list elements pasted into an object are keyed by their label
+        for lazy in (False, True):
+            model = QJsonModel(QJsonNode.load({'a': 1}, lazy=lazy))
+            model.addChildren(QJsonNode.load([1, 2, 3]).children)
+            expected = {'a': 1, 'list[0]': 1, 'list[1]': 2, 'list[2]': 3}
+            self.assertEqual(model.asDict(), expected)
+            self.assertEqual(QJsonNode.load(expected).toJson(indent=None),
+                             model.getNode(QtCore.QModelIndex()).toJson(indent=None))
+
+    def test_fetch_sorted_with_listener(self):
+        # the order of a container built while its rows are being inserted
+        # covers the new rows
+        model = QJsonModel(QJsonNode.load({'items': list(range(5000))}, lazy=True))
+        model.fetchMore(QtCore.QModelIndex())
+        items = model.index(0, 0)
+        model.fetchMore(items)
+        model.sort(0, QtCore.Qt.DescendingOrder)
+        model.rowsAboutToBeInserted.connect(lambda parent, first, last: model.index(0, 0, parent))
+        inserted = []
+        model.rowsInserted.connect(
+            lambda parent, first, last: inserted.extend(model.index(row, 0, parent) for row in range(first, last + 1)))
+        model.fetchMore(items)
+        self.assertEqual(len(inserted), model.rowCount(items) - model.fetchBatchSize)
+        self.assertEqual(model.index(0, 0, items).data(), 'list[{}]'.format(model.rowCount(items) - 1))
+
+    def test_save_snapshot(self):
+        # the saver writes the tree as it was when the snapshot was taken
+        data = {'items': [{'id': i, 'tags': ['a', 'b']} for i in range(3000)], 'name': 'x'}
+        for lazy in (False, True):
+            model = QJsonModel(QJsonNode.load(data, lazy=lazy))
+            snapshot = model.snapshot()
+            model.addChildren(QJsonNode.load({'added': 1}).children)
+            with tempfile.TemporaryDirectory() as folder:
+                path = os.path.join(folder, 'out.json')
+                saved = []
+                saver = QJsonSaver(snapshot, path)
+                saver.saved.connect(saved.append)
+                saver.run()
+                self.assertEqual(saved, [path])
+                with open(path) as f:
+                    self.assertEqual(json.load(f), data)
+                self.assertEqual(os.listdir(folder), ['out.json'])
+
+    def test_undo_shares_snapshot(self):
+        # the tree restored by an undo keeps sharing the unchanged subtrees
+        model = QJsonModel(QJsonNode.load({'a': {'x': [1, 2]}, 'b': [{'id': 1}]}))
+        first = model.snapshot()
+        model.restore(first)
+        self.assertIs(model.snapshot(), first)
+
+        model.addChildren(QJsonNode.load([3]).children, model.index(1, 0))
+        second = model.snapshot()
+        self.assertIs(dict(second.items())['a'], dict(first.items())['a'])
+        self.assertEqual(model.asDict(), {'a': {'x': [1, 2]}, 'b': [{'id': 1}, 3]})
+
+    def test_add_invalid_text(self):
+        # text that cannot be parsed records no history
+        view = QJsonView()
+        proxy = QJsonFilterProxyModel()
+        proxy.setSourceModel(QJsonModel(QJsonNode.load({'a': 1})))
+        view.setModel(proxy)
+        view.add('{"b": 2}')
+        with self.assertRaises(Exception):
+            view.add('{"c": ')
+        view.undo()
+        self.assertEqual(proxy.sourceModel().asDict(), {'a': 1})
+
+
+class QJsonStoreModelTest(unittest.TestCase):
+    def test_edit_values(self):
+        # edits reuse the value table slots of the values they replace
+        store = QJsonStore.load({'items': [{'name': 'a', 'size': 1}, {'name': 'b', 'size': None}]})
+        model = QJsonStoreModel(store)
+        items = model.index(0, 0)
+        first = model.index(0, 0, items)
+        self.assertEqual(model.parent(first), items)
+
+        slots = len(store._values)
+        for value in ('x', 2.5, 'y', 3, None):
+            model.setData(model.index(0, 1, first), value, QtCore.Qt.EditRole)
+            self.assertEqual(model.data(model.index(0, 1, first), QtCore.Qt.EditRole), value)
+        model.setData(model.index(1, 1, model.index(1, 0, items)), 7, QtCore.Qt.EditRole)
+        self.assertEqual(len(store._values), slots)
+        self.assertEqual(store.toPython(), {'items': [{'name': None, 'size': 1}, {'name': 'b', 'size': 7}]})
+        self.assertEqual(store.find('y'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Tests of the line index of the paged Raw View
+"""
+
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import pagedTextView  # noqa: E402
+from pagedTextView import TextLineIndex  # noqa: E402
+
+
+class TextLineIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.line = '{"名前": "ünïcödé", "x": "€€€ target"}'
+        path = os.path.join(self.directory, 'text.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('[\n' + self.line + '\n]')
+        self.index = TextLineIndex(path)
+        self.index.build()
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.directory)
+
+    def checkColumns(self):
+        start, end = self.index.lineRange(1)
+        offset = self.index.search(re.compile(b'target'))[0]
+        self.assertEqual(self.index.column(start, offset), self.line.index('target'))
+        for column in range(len(self.line)):
+            offset = self.index.offset(start, end, column)
+            self.assertEqual(self.index.decode(offset, end), self.line[column:])
+        self.assertEqual(self.index.offset(start, end, len(self.line) + 5), end)
+
+    def test_columns(self):
+        self.checkColumns()
+
+    def test_columns_across_chunks(self):
+        # chunks end inside multi-byte characters
+        chunkBytes = pagedTextView.COLUMN_CHUNK_BYTES
+        pagedTextView.COLUMN_CHUNK_BYTES = 5
+        try:
+            self.checkColumns()
+        finally:
+            pagedTextView.COLUMN_CHUNK_BYTES = chunkBytes
+
+
+if __name__ == '__main__':
+    unittest.main()
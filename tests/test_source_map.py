@@ -0,0 +1,66 @@
+"""
+Tests of the structural scan of the Raw View source map
+"""
+
+
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qjsonsourcemap  # noqa: E402
+from qjsonsourcemap import QJsonSourceMap  # noqa: E402
+
+
+def walk(value, path=()):
+    # paths of every entry, in document order
+    items = value.items() if isinstance(value, dict) else enumerate(value) if isinstance(value, list) else ()
+    for row, (key, child) in enumerate(items):
+        yield path + (row,), key, child
+        yield from walk(child, path + (row,))
+
+
+class QJsonSourceMapTest(unittest.TestCase):
+    def setUp(self):
+        self.document = {
+            'meta': {'note': 'brackets ] } [ { and "escapes" \\\\" in strings', 'deep': [[[[[[[1, {'x': []}]]]]]]]},
+            'data': [{'id': i, 'tags': ['a', ']'], 'more': {'z': [i, {}]}} for i in range(200)],
+            'text': 'x' * 300 + '\U0001f600',
+            'last': [1.5e3, True, False, None, -2],
+        }
+
+    def test_span(self):
+        # each entry spans its key and its value as they are written
+        for indent in (None, 4):
+            text = json.dumps(self.document, indent=indent, ensure_ascii=False)
+            sourceMap = QJsonSourceMap(text)
+            for path, key, child in walk(self.document):
+                start, end = sourceMap.span(path)
+                source = text[start:end]
+                if isinstance(key, str):
+                    name, _, source = source.partition(':')
+                    self.assertEqual(json.loads(name), key)
+                self.assertEqual(json.loads(source), child)
+                self.assertEqual(sourceMap.path(end - 1), path)
+
+    def test_long_container(self):
+        # containers larger than the window are entered to be skipped
+        document = {'big': [{'a': [[['x' * 100]]]} for _ in range(2000)], 'after': 1}
+        text = json.dumps(document)
+        self.assertGreater(len(text), qjsonsourcemap.NESTED_WINDOW)
+        sourceMap = QJsonSourceMap(text)
+        start, end = sourceMap.span((1,))
+        self.assertEqual(text[start:end], '"after": 1')
+
+    def test_invalid(self):
+        # text that is not valid JSON stops the scan, entries before it are found
+        for text in ('{"a": 1, "b": [1, 2', '[1, {"a": "x}', '{"a": 1, "b" 2}', '[1, 2,, 3]'):
+            sourceMap = QJsonSourceMap(text)
+            self.assertEqual(sourceMap.span((0,)), (1, text.index('1') + 1))
+            self.assertEqual(sourceMap.span((5,)), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Tests of the chunked streaming parser
+"""
+
+
+import io
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qjsonstream  # noqa: E402
+from qjsonstream import QJsonStreamParser  # noqa: E402
+
+
+def chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class QJsonStreamParserTest(unittest.TestCase):
+    def setUp(self):
+        self.records = [{'id': i, 'name': 'user {}'.format(i), 'tags': ['a', ']'], 'more': {'x': [i, {}]}}
+                        for i in range(2000)]
+        self.document = {'meta': {'count': 2000}, 'data': self.records, 'tail': 'é "end"'}
+        self.text = json.dumps(self.document, indent=2, ensure_ascii=False)
+
+    def test_large_nested_entry(self):
+        # the records are read as they arrive, without waiting for the end
+        # of the single entry holding them, and the buffer stays small
+        parser = QJsonStreamParser()
+        output = {}
+        sizes = []
+        for chunk in chunks(self.text, 1000):
+            output.update(parser.feed(chunk))
+            if 'data' in output:
+                sizes.append(len(output['data']))
+            self.assertLess(len(parser._buffer), 1000)
+        output.update(parser.close())
+
+        self.assertTrue(parser.closed)
+        self.assertEqual(output, self.document)
+        self.assertEqual(len(sizes), len(set(sizes)))
+        self.assertLess(sizes[0], 10)
+
+    def test_load(self):
+        data = self.text.encode('utf-8')
+        for chunkSize in (1, 7, 1000, len(data)):
+            self.assertEqual(qjsonstream.load(io.BytesIO(data), chunkSize=chunkSize), self.document)
+        self.assertEqual(qjsonstream.load(io.BytesIO(b' "text" '), chunkSize=3), 'text')
+
+    def test_limit(self):
+        data = self.text.encode('utf-8')
+        self.assertEqual(qjsonstream.load(io.BytesIO(data), chunkSize=1000, limit=len(data)), self.document)
+        with self.assertRaises(qjsonstream.StreamTooLarge):
+            qjsonstream.load(io.BytesIO(data), chunkSize=1000, limit=len(data) - 1)
+
+    def test_errors(self):
+        for text in ('{"data": [1, 2}', '{"data": [[1], {"a" 1}]}', '{"data": [1, 2]', '[1, [2,]]', '[1] 2'):
+            with self.assertRaises(ValueError, msg=text):
+                qjsonstream.load(io.BytesIO(text.encode('utf-8')), chunkSize=4)
+
+    def test_extra_data(self):
+        # content on the next lines is told apart, as JSON Lines records
+        for text, lineBreak in (('[1] 2', False), ('[1]  \n  [2]\n', True), ('{"a": 1}\r\n{"a": 2}', True)):
+            for chunkSize in (1, 3, 100):
+                with self.assertRaises(qjsonstream.StreamExtraData, msg=text) as context:
+                    qjsonstream.load(io.BytesIO(text.encode('utf-8')), chunkSize=chunkSize)
+                self.assertEqual(context.exception.lineBreak, lineBreak)
+
+
+if __name__ == '__main__':
+    unittest.main()